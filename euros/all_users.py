@@ -1,42 +1,167 @@
+import math
+import re
+
+import numpy as np
 import pandas as pd
 from dash import dash_table
 
-from euros.flags import FLAG_UNICODE
+from euros.registry import Registry
 
+PAGE_SIZE = 25
 
-def create_all_users(
-    user_choices: pd.DataFrame, fixtures: pd.DataFrame
-) -> dash_table.DataTable:
-    """Create a table of all users and their token choices."""
+# Sorted and filtered orders of every user kept by each worker.
+ORDER_CACHE_ENTRIES = 16
+
+TOKENS_LEFT = "Tokens Left"
+
+# One clause of a DataTable filter query, e.g. {France} >= 3 or {user} icontains ja.
+FILTER_PART = re.compile(
+    r"\{(?P<column>[^}]+)\}\s+(?P<case>[si]?)(?P<operator>[^\s]+)\s+(?P<value>.+)"
+)
+
+OPERATORS = {
+    ">=": "ge",
+    "<=": "le",
+    "<": "lt",
+    ">": "gt",
+    "!=": "ne",
+    "=": "eq",
+}
+
+
+def all_users_frame(
+    registry: Registry, tokens: np.ndarray, fixtures: pd.DataFrame
+) -> pd.DataFrame:
+    """Return one row per user of their tokens on each team and the tokens left.
+
+    tokens is the team x user token matrix, indexed by the registry's ids. The
+    columns are "user", every team in the registry and TOKENS_LEFT, the tokens
+    still on teams with a fixture to play.
+    """
     unplayed_fixtures = fixtures[fixtures["Result"] == ""]
 
     remaining_teams = pd.concat(
         [unplayed_fixtures["Home Team"], unplayed_fixtures["Away Team"]]
     ).drop_duplicates()
 
-    remaining_points = user_choices[user_choices["team"].isin(remaining_teams)].sum()
+    remaining = np.isin(registry.teams, remaining_teams)
 
-    remaining_points["team"] = "Tokens Left"
+    frame = pd.DataFrame(tokens.T, columns=registry.teams)
+    frame.insert(0, "user", registry.users)
+    frame[TOKENS_LEFT] = remaining.astype(np.int64) @ tokens
 
-    user_choices["team"] = user_choices["team"].apply(
-        lambda x: x + " " + FLAG_UNICODE[x]
-    )
+    return frame
+
+
+def _filter_mask(frame: pd.DataFrame, filter_query: str | None) -> np.ndarray:
+    mask = np.ones(len(frame), dtype=bool)
+
+    for part in (filter_query or "").split(" && "):
+        if (match := FILTER_PART.fullmatch(part.strip())) is None:
+            continue
+        if (column := match["column"]) not in frame.columns:
+            continue
+
+        values = frame[column]
+        value = match["value"].strip()
+        if len(value) > 1 and value[0] == value[-1] and value[0] in "\"'`":
+            value = value[1:-1]
+
+        operator = OPERATORS.get(match["operator"], match["operator"])
+        if operator == "contains":
+            mask &= (
+                values.astype(str)
+                .str.contains(value, case=match["case"] != "i", regex=False)
+                .to_numpy()
+            )
+        elif operator in OPERATORS.values():
+            if pd.api.types.is_numeric_dtype(values):
+                try:
+                    value = float(value)
+                except ValueError:
+                    continue
+            elif match["case"] == "i":
+                values, value = values.str.lower(), value.lower()
+            mask &= getattr(values, operator)(value).to_numpy()
 
-    table_data = pd.concat(
-        [user_choices, remaining_points.to_frame().T],
-        ignore_index=True,
-    ).to_dict("records")
+    return mask
+
+
+def all_users_order(
+    frame: pd.DataFrame, sort_by: list[dict] | None, filter_query: str | None
+) -> np.ndarray:
+    """Return the rows of frame that pass filter_query, in the order of sort_by.
+
+    sort_by and filter_query are the DataTable properties of the same names.
+    """
+    (rows,) = np.nonzero(_filter_mask(frame, filter_query))
+
+    sort_by = [s for s in sort_by or [] if s["column_id"] in frame.columns]
+    if sort_by:
+        rows = (
+            frame.iloc[rows]
+            .sort_values(
+                by=[s["column_id"] for s in sort_by],
+                ascending=[s["direction"] == "asc" for s in sort_by],
+                kind="stable",
+            )
+            .index.to_numpy()
+        )
+
+    return rows
+
+
+def all_users_page(
+    frame: pd.DataFrame, rows: np.ndarray, page_current: int, page_size: int
+) -> tuple[list[dict], int]:
+    """Return the records of one page of rows, and the number of pages.
+
+    page_size comes from the client, so it is clamped to between 1 and PAGE_SIZE.
+    """
+    page_size = min(max(page_size, 1), PAGE_SIZE)
+    start = page_current * page_size
+    records: list[dict] = frame.iloc[rows[start : start + page_size]].to_dict("records")
+
+    return records, max(math.ceil(len(rows) / page_size), 1)
+
+
+def create_all_users(
+    frame: pd.DataFrame, registry: Registry, page_size: int = PAGE_SIZE
+) -> dash_table.DataTable:
+    """Create a table of all users and their token choices, a page at a time.
+
+    Only the first page is sent with the table. Paging, sorting and filtering
+    are done on the server by a callback reading all_users_page.
+    """
+    records, page_count = all_users_page(
+        frame, np.arange(len(frame)), page_current=0, page_size=page_size
+    )
+    totals = frame[registry.teams].sum()
 
     return dash_table.DataTable(
         id="all-users",
-        data=table_data,
+        data=records,
+        columns=[{"name": ["user", "total"], "id": "user"}]
+        + [
+            {"name": [label, str(total)], "id": team, "type": "numeric"}
+            for team, label, total in zip(registry.teams, registry.labels, totals)
+        ]
+        + [{"name": [TOKENS_LEFT, ""], "id": TOKENS_LEFT, "type": "numeric"}],
+        page_action="custom",
+        page_current=0,
+        page_size=page_size,
+        page_count=page_count,
+        sort_action="custom",
+        sort_mode="multi",
+        sort_by=[],
+        filter_action="custom",
+        filter_query="",
         style_table={"overflowX": "auto", "width": "100%"},
         style_data_conditional=[
             {
-                "if": {"row_index": len(table_data) - 1},
+                "if": {"column_id": TOKENS_LEFT},
                 "fontWeight": "bold",
-                "borderBottom": "3px solid black",
-                "borderTop": "3px solid black",
+                "borderLeft": "3px solid black",
             }
         ],
     )
@@ -0,0 +1,275 @@
+"""Read-only JSON API over the cached data, for bots and status screens."""
+
+import hashlib
+import json
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from dataclasses import dataclass
+from datetime import date
+from threading import Lock
+from typing import Any
+
+import numpy as np
+import pandas as pd
+from dash import Dash
+from flask import Response, jsonify, request
+from werkzeug.wrappers import Response as BaseResponse
+
+from euros.cache import CHOICES, FIXTURES, DataCache
+
+API_ROUTE = "api"
+
+# Users per response of /api/standings unless ?limit= is given.
+STANDINGS_LIMIT = 100
+
+# make_conditional() returns werkzeug's Response, which flask's extends.
+ApiResponse = BaseResponse | tuple[BaseResponse, int]
+
+FIXTURE_COLUMNS = [
+    "Match Number",
+    "Round Number",
+    "Date",
+    "Location",
+    "Home Team",
+    "Away Team",
+    "Group",
+    "Result",
+]
+
+
+@dataclass(frozen=True)
+class FixturesIndex:
+    """The fixtures as records, with the rows of each team, round and date.
+
+    teams and rounds map a name to the sorted positions of its fixtures, and
+    by_date lists the positions in order of dates, so each filter is a lookup
+    or a binary search rather than a scan of the fixtures.
+    """
+
+    records: list[dict]
+    teams: dict[str, np.ndarray]
+    rounds: dict[str, np.ndarray]
+    dates: np.ndarray
+    by_date: np.ndarray
+
+    @classmethod
+    def from_fixtures(cls, fixtures: pd.DataFrame) -> "FixturesIndex":
+        """Index the fixtures, as produced by Loader.load_fixtures."""
+        positions = np.arange(len(fixtures))
+        teams = pd.concat(
+            [
+                pd.Series(positions, index=fixtures["Home Team"]),
+                pd.Series(positions, index=fixtures["Away Team"]),
+            ]
+        )
+        rounds = pd.Series(positions, index=fixtures["Round Number"].astype(str))
+        dates = fixtures["datestamp"].to_numpy(dtype="datetime64[D]")
+        by_date = np.argsort(dates, kind="stable")
+
+        return cls(
+            records=fixtures[FIXTURE_COLUMNS].to_dict("records"),
+            teams={
+                team: np.sort(rows.to_numpy()) for team, rows in teams.groupby(level=0)
+            },
+            rounds={
+                match_round: rows.to_numpy()
+                for match_round, rows in rounds.groupby(level=0)
+            },
+            dates=dates[by_date],
+            by_date=by_date,
+        )
+
+    def select(
+        self,
+        team: str | None = None,
+        match_round: str | None = None,
+        start: date | None = None,
+        end: date | None = None,
+    ) -> list[dict]:
+        """Return the fixtures matching every filter given, dates inclusive."""
+        rows = np.arange(len(self.records))
+
+        if start is not None or end is not None:
+            lower = (
+                0
+                if start is None
+                else int(np.searchsorted(self.dates, np.datetime64(start, "D"), "left"))
+            )
+            upper = (
+                len(self.dates)
+                if end is None
+                else int(np.searchsorted(self.dates, np.datetime64(end, "D"), "right"))
+            )
+            rows = np.sort(self.by_date[lower:upper])
+        if team is not None:
+            rows = np.intersect1d(rows, self.teams.get(team, []), assume_unique=True)
+        if match_round is not None:
+            rows = np.intersect1d(
+                rows, self.rounds.get(match_round, []), assume_unique=True
+            )
+
+        return [self.records[row] for row in rows]
+
+
+def _parse_date(value: str | None) -> date | None:
+    if value is None:
+        return None
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid date: {value}, expected YYYY-MM-DD") from None
+
+
+def _parse_int(value: str | None, name: str) -> int | None:
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError(f"Invalid {name}: {value}") from None
+
+
+class JsonApi:
+    """Serve the fixtures, standings, group tables and choices as JSON.
+
+    Responses are built from the DataCache, serialised once per data version
+    and kept by request, with an ETag of their body, so repeated polling is
+    answered from memory, or with a 304 if the client has the body already.
+    """
+
+    def __init__(self, data: DataCache, max_entries: int = 512) -> None:
+        """Serve data, keeping up to max_entries serialised responses."""
+        self.data = data
+        self.max_entries = max_entries
+        self._responses: OrderedDict[Hashable, tuple[bytes, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def respond(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        depends: tuple[str, ...] = (FIXTURES, CHOICES),
+    ) -> BaseResponse:
+        """Return the JSON of build(), cached under key and the data version."""
+        key = (key, self.data.version(depends), self.data.load.show_users())
+
+        with self._lock:
+            cached = self._responses.get(key)
+            if cached is not None:
+                self._responses.move_to_end(key)
+
+        if cached is None:
+            body = json.dumps(build(), separators=(",", ":"), default=str).encode()
+            cached = (body, hashlib.sha1(body, usedforsecurity=False).hexdigest())
+
+            with self._lock:
+                self._responses[key] = cached
+                while len(self._responses) > self.max_entries:
+                    self._responses.popitem(last=False)
+
+        body, etag = cached
+        response = Response(body, mimetype="application/json")
+        response.set_etag(etag)
+        response.headers["Cache-Control"] = "private, no-cache"
+
+        return response.make_conditional(request)
+
+    def init_app(self, app: Dash) -> None:
+        """Register the API routes on the Dash app's Flask server.
+
+        They sit behind the app's basic auth like every other route.
+        """
+        prefix = f"{app.config.routes_pathname_prefix}{API_ROUTE}"
+        server = app.server
+
+        server.route(f"{prefix}/fixtures")(self.fixtures)
+        server.route(f"{prefix}/standings")(self.standings)
+        server.route(f"{prefix}/groups/<letter>")(self.group)
+        server.route(f"{prefix}/users/<name>/choices")(self.choices)
+
+    def fixtures(self) -> ApiResponse:
+        """Fixtures, filtered by ?team=, ?round= and ?from= and ?to= dates."""
+        team = request.args.get("team")
+        match_round = request.args.get("round")
+
+        try:
+            start = _parse_date(request.args.get("from"))
+            end = _parse_date(request.args.get("to"))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        return self.respond(
+            ("fixtures", team, match_round, start, end),
+            lambda: self.data.fixtures_index().select(team, match_round, start, end),
+            depends=(FIXTURES,),
+        )
+
+    def standings(self) -> ApiResponse:
+        """Ranked users after ?match=, or the latest, paged by ?offset= and ?limit=."""
+        try:
+            match_number = _parse_int(request.args.get("match"), "match")
+            offset = _parse_int(request.args.get("offset"), "offset") or 0
+            limit = _parse_int(request.args.get("limit"), "limit")
+            leaderboard = self.data.leaderboard(match_number)
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+
+        start = max(offset, 0)
+        stop = start + max(STANDINGS_LIMIT if limit is None else limit, 0)
+
+        return self.respond(
+            ("standings", match_number, start, stop),
+            lambda: {
+                "count": 0 if leaderboard is None else len(leaderboard),
+                "standings": (
+                    [] if leaderboard is None else leaderboard.records(start, stop)
+                ),
+            },
+        )
+
+    def group(self, letter: str) -> ApiResponse:
+        """The table of a group stage group."""
+        from euros.groups import create_table
+
+        letter = letter.upper()
+        fixtures = self.data.fixtures_df()
+
+        if f"Group {letter}" not in set(fixtures["Group"]):
+            return jsonify({"error": f"Unknown group: {letter}"}), 404
+
+        return self.respond(
+            ("group", letter),
+            lambda: create_table(
+                letter,
+                fixtures.copy(),
+                self.data.custom_orderings().get(letter),
+            ).to_dict("records"),
+            depends=(FIXTURES,),
+        )
+
+    def choices(self, name: str) -> ApiResponse:
+        """A user's tokens on each team, only their own before the cutoff."""
+        user = name.capitalize()
+        auth = request.authorization
+
+        if not self.data.load.show_users() and (
+            auth is None or str(auth.username).capitalize() != user
+        ):
+            return jsonify({"error": "Choices are private until the cutoff"}), 403
+
+        registry = self.data.registry()
+        (user_id,) = registry.user_ids(pd.Series([user]))
+
+        if user_id < 0:
+            return jsonify({"error": f"Unknown user: {name}"}), 404
+
+        return self.respond(
+            ("choices", user),
+            lambda: {
+                "user": user,
+                "choices": dict(
+                    zip(registry.teams, self.data.tokens()[:, user_id].tolist())
+                ),
+            },
+            depends=(CHOICES,),
+        )
@@ -0,0 +1,24 @@
+/* Clientside callbacks for live updates. */
+window.dash_clientside = Object.assign({}, window.dash_clientside);
+window.dash_clientside.euros = Object.assign({}, window.dash_clientside.euros, {
+    /*
+     * Open one server-sent events connection per page and copy each data
+     * version it announces into the data-version store.
+     */
+    listenForVersions: function (url) {
+        const noUpdate = window.dash_clientside.no_update;
+
+        if (!url || !window.EventSource || window.eurosEvents) {
+            return noUpdate;
+        }
+
+        window.eurosEvents = new EventSource(url);
+        window.eurosEvents.onmessage = function (event) {
+            window.dash_clientside.set_props("data-version", {
+                data: JSON.parse(event.data),
+            });
+        };
+
+        return noUpdate;
+    },
+});
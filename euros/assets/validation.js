@@ -0,0 +1,56 @@
+/* Clientside callbacks for the Play tab. */
+window.dash_clientside = Object.assign({}, window.dash_clientside);
+window.dash_clientside.euros = Object.assign({}, window.dash_clientside.euros, {
+    /*
+     * Mirror of euros.choices.validate_tokens, run on every edit of the
+     * choices table so invalid selections never reach the server.
+     */
+    validateTokens: function (data, rules) {
+        const rows = data || [];
+        const errorStyle = {backgroundColor: "#f8d7da", color: "red"};
+        const styles = [];
+
+        let total = 0;
+        let notInteger = false;
+        let outOfRange = false;
+
+        rows.forEach(function (row, index) {
+            const value = row.tokens;
+            const tokens = Number(value);
+
+            if (value === null || value === "" || !Number.isInteger(tokens)) {
+                notInteger = true;
+            } else {
+                total += tokens;
+
+                if (tokens >= 0 && tokens <= rules.max) {
+                    return;
+                }
+                outOfRange = true;
+            }
+
+            styles.push(
+                Object.assign({if: {row_index: index, column_id: "tokens"}}, errorStyle)
+            );
+        });
+
+        let message = null;
+
+        if (notInteger) {
+            message = "Please enter integers only";
+        } else if (outOfRange) {
+            message = "Please enter values between 0 and " + rules.max;
+        } else if (total !== rules.total) {
+            message = "Token values must sum to " + rules.total;
+        }
+
+        const summary = total + " / " + rules.total + " tokens";
+
+        return [
+            message === null ? summary : summary + " - " + message,
+            {fontSize: "14px", color: message === null ? "blue" : "red"},
+            styles,
+            message !== null,
+        ];
+    },
+});
@@ -0,0 +1,219 @@
+"""Benchmarks of the data loading and tab builders over synthetic leagues."""
+
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import asdict, dataclass
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytz
+from dash import dcc
+
+from euros.fixtures import create_fixtures_tab
+from euros.generate import generate
+from euros.groups import create_groups_tab
+from euros.knockout import create_knockout_tab
+from euros.load import Loader
+from euros.play import create_play_tab
+from euros.standings import create_figure, get_standings
+
+USERS = (10, 1_000, 10_000, 100_000)
+TEAMS = (24, 48)
+
+# Above this many users the choices are written as a frozen snapshot, the
+# consolidated format the app reads after the cutoff, rather than one csv each.
+SNAPSHOT_USERS = 10_000
+
+
+@dataclass
+class Result:
+    """Timings of one benchmark on one league, in seconds."""
+
+    name: str
+    users: int
+    teams: int
+    rounds: int
+    min: float
+    median: float
+    mean: float
+
+    @property
+    def key(self) -> str:
+        """Identify the benchmark and league, to compare against a baseline."""
+        return f"{self.name}[users={self.users},teams={self.teams}]"
+
+
+def _league(base_path: Path, n_users: int, n_teams: int, seed: int) -> Loader:
+    generate(
+        base_path,
+        n_users=n_users,
+        n_teams=n_teams,
+        n_groups=n_teams // 4,
+        seed=seed,
+        user_group="bench",
+        snapshot=n_users > SNAPSHOT_USERS,
+    )
+
+    return Loader(
+        user_group="bench",
+        base_path=base_path,
+        cutoff_time=datetime(2024, 6, 14, 12, tzinfo=pytz.UTC),
+    )
+
+
+def _benchmarks(load: Loader) -> dict[str, Callable[[], object]]:
+    fixtures = pd.DataFrame(load.load_fixtures())
+    user_choices = load.create_user_choices()
+    standings = get_standings(user_choices.copy(), fixtures.copy())
+    dropdown = dcc.Dropdown(id="fixtures-filter-value")
+
+    return {
+        "load_fixtures": load.load_fixtures,
+        "create_user_choices": load.create_user_choices,
+        "get_standings": lambda: get_standings(user_choices.copy(), fixtures.copy()),
+        "create_figure": lambda: create_figure(standings),
+        "create_groups_tab": lambda: create_groups_tab(fixtures.copy(), {}),
+        "create_knockout_tab": lambda: create_knockout_tab(fixtures.copy()),
+        "create_fixtures_tab": lambda: create_fixtures_tab(
+            fixtures.copy(), dropdown, user_choices=user_choices, show_users=True
+        ),
+        "create_play_tab": lambda: create_play_tab(
+            "user0",
+            load.user_group,
+            base_path=load.base_path,
+            show_users=True,
+            cutoff=load.cutoff_time,
+            user_choices=user_choices,
+            fixtures=fixtures,
+        ),
+    }
+
+
+def _time(func: Callable[[], object], min_time: float, max_rounds: int) -> list[float]:
+    times: list[float] = []
+    while len(times) < max_rounds and (not times or sum(times) < min_time):
+        start = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def run(
+    users: tuple[int, ...] = USERS,
+    teams: tuple[int, ...] = TEAMS,
+    only: list[str] | None = None,
+    min_time: float = 1.0,
+    max_rounds: int = 20,
+    max_seconds: float = 60.0,
+    seed: int = 0,
+) -> list[Result]:
+    """Time every benchmark on every league size and tournament format.
+
+    Leagues are run smallest first. Once a benchmark takes longer than
+    max_seconds it is skipped for the larger leagues of the same format.
+    """
+    results = []
+
+    for n_teams in teams:
+        too_slow: set[str] = set()
+
+        for n_users in sorted(users):
+            with tempfile.TemporaryDirectory() as tmpdir:
+                load = _league(Path(tmpdir), n_users, n_teams, seed)
+
+                for name, func in _benchmarks(load).items():
+                    if (only and name not in only) or name in too_slow:
+                        continue
+
+                    times = _time(func, min_time, max_rounds)
+                    result = Result(
+                        name=name,
+                        users=n_users,
+                        teams=n_teams,
+                        rounds=len(times),
+                        min=min(times),
+                        median=statistics.median(times),
+                        mean=statistics.fmean(times),
+                    )
+                    results.append(result)
+                    print(f"{result.key}: {result.median:.4f}s", file=sys.stderr)
+
+                    if result.median > max_seconds:
+                        too_slow.add(name)
+
+    return results
+
+
+def compare(
+    results: list[Result], baseline: dict, tolerance: float
+) -> list[tuple[str, float, float]]:
+    """Return the (key, baseline, current) medians slower than the tolerance allows."""
+    medians = {row["key"]: row["median"] for row in baseline["results"]}
+
+    return [
+        (result.key, medians[result.key], result.median)
+        for result in results
+        if result.key in medians
+        and result.median > medians[result.key] * (1 + tolerance)
+    ]
+
+
+def main() -> None:
+    """Run the benchmarks, write them to json and compare against a baseline."""
+    parser = ArgumentParser(description="Benchmark the Euros app.")
+    parser.add_argument("--users", type=int, nargs="+", default=list(USERS))
+    parser.add_argument("--teams", type=int, nargs="+", default=list(TEAMS))
+    parser.add_argument("--only", nargs="+", default=None, help="benchmark names.")
+    parser.add_argument("--min-time", type=float, default=1.0)
+    parser.add_argument("--max-rounds", type=int, default=20)
+    parser.add_argument("--max-seconds", type=float, default=60.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", type=Path, default=Path("bench.json"))
+    parser.add_argument("--baseline", type=Path, default=None)
+    parser.add_argument(
+        "--tolerance", type=float, default=0.2, help="allowed slowdown, e.g. 0.2."
+    )
+    args = parser.parse_args()
+
+    results = run(
+        users=tuple(args.users),
+        teams=tuple(args.teams),
+        only=args.only,
+        min_time=args.min_time,
+        max_rounds=args.max_rounds,
+        max_seconds=args.max_seconds,
+        seed=args.seed,
+    )
+
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "time": datetime.now().isoformat(),
+                "results": [{"key": r.key, **asdict(r)} for r in results],
+            },
+            file,
+            indent=2,
+        )
+
+    if args.baseline is not None:
+        with open(args.baseline) as file:
+            regressions = compare(results, json.load(file), args.tolerance)
+
+        for key, before, after in regressions:
+            print(f"REGRESSION {key}: {before:.4f}s -> {after:.4f}s", file=sys.stderr)
+
+        if regressions:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,361 @@
+"""Per-worker cache of data derived from the fixtures and choices files."""
+
+import logging
+import threading
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
+from contextlib import AbstractContextManager, nullcontext
+from datetime import date, datetime, time
+from typing import TYPE_CHECKING, Any
+
+import numpy as np
+import pandas as pd
+
+from euros.load import Loader
+from euros.registry import Registry
+
+if TYPE_CHECKING:
+    from euros.api import FixturesIndex
+    from euros.standings import Leaderboard, StandingsCheckpoints
+
+FIXTURES = "fixtures"
+CHOICES = "choices"
+
+
+class DataCache:
+    """Memoise fixtures, choices and everything built from them.
+
+    Each entry remembers the data version it was built against. Reading an entry
+    checks the shared version counters (an O(1) memory read) and rebuilds it if
+    another worker has written to disk since, so cached values stay correct
+    under multi-worker deployments.
+
+    If measure is given, e.g. Metrics.measure, every build runs inside
+    measure("build", key=name), where name is the key or its first element.
+
+    If shared is given, the fixtures and anything else built only from them
+    are cached there instead, so that the caches of several user groups under
+    one base path hold a single copy.
+    """
+
+    def __init__(
+        self,
+        load: Loader,
+        max_entries: int = 256,
+        measure: Callable[..., AbstractContextManager] | None = None,
+        shared: "DataCache | None" = None,
+    ) -> None:
+        """Cache up to max_entries values built from load's data."""
+        self.load = load
+        self.max_entries = max_entries
+        self.measure = measure
+        self.shared = shared if shared is not None else self
+        self._entries: OrderedDict[Hashable, tuple[tuple[int, ...], Any]] = (
+            OrderedDict()
+        )
+        self._building: dict[Hashable, threading.Lock] = {}
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def version(self, depends: tuple[str, ...] = (FIXTURES, CHOICES)) -> tuple:
+        """Return the current value of each counter in depends."""
+        counters = {
+            FIXTURES: self.load.fixtures_version,
+            CHOICES: self.load.choices_version,
+        }
+        return tuple(counters[name].get() for name in depends)
+
+    def get(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        depends: tuple[str, ...] = (FIXTURES, CHOICES),
+    ) -> Any:
+        """Return the cached value for key, rebuilding it if its data changed.
+
+        Each key is built under its own lock, so a rebuild only holds up readers
+        of the same key, never hits on other keys.
+        """
+        version = self.version(depends)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+            building = self._building.setdefault(key, threading.Lock())
+
+        with building:
+            # Another reader may have built it while this one waited.
+            with self._lock:
+                entry = self._entries.get(key)
+                if entry is not None and entry[0] == version:
+                    return entry[1]
+
+            with self._measure(key):
+                value = build()
+
+            with self._lock:
+                self._entries[key] = (version, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    evicted, _ = self._entries.popitem(last=False)
+                    self._building.pop(evicted, None)
+
+        return value
+
+    def get_later(
+        self,
+        key: Hashable,
+        build: Callable[[], Any],
+        depends: tuple[str, ...] = (FIXTURES, CHOICES),
+    ) -> Any | None:
+        """Return the cached value for key if it is current, or else None.
+
+        A missing or stale value is built on a background thread rather than
+        by the caller, so that a slow build never holds up a request.
+        """
+        version = self.version(depends)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == version:
+                self._entries.move_to_end(key)
+                return entry[1]
+            building = self._building.setdefault(key, threading.Lock())
+            if building.locked():
+                return None
+
+        def run() -> None:
+            try:
+                self.get(key, build, depends)
+            except Exception:
+                logging.getLogger(__name__).exception("Building %s failed.", key)
+
+        threading.Thread(target=run, name="euros-build", daemon=True).start()
+
+        return None
+
+    def _measure(self, key: Hashable) -> AbstractContextManager:
+        if self.measure is None:
+            return nullcontext()
+        name = key[0] if isinstance(key, tuple) and key else key
+        return self.measure("build", key=str(name))
+
+    def watch(self, on_change: Callable[[], None], interval: float) -> None:
+        """Call on_change from a background thread whenever the data version moves.
+
+        Lets every worker rebuild its cache as soon as any process writes, rather
+        than on the first request that reads the new data.
+        """
+
+        def run() -> None:
+            version = self.version()
+            while not self._closed.wait(interval):
+                if (current := self.version()) != version:
+                    version = current
+                    try:
+                        on_change()
+                    except Exception:
+                        logging.getLogger(__name__).exception("Refresh failed.")
+
+        threading.Thread(target=run, name="euros-data-watch", daemon=True).start()
+
+    def clear(self) -> None:
+        """Drop every cached entry."""
+        with self._lock:
+            self._entries.clear()
+            self._building.clear()
+
+    def close(self) -> None:
+        """Stop watching for changes and drop every cached entry."""
+        self._closed.set()
+        self.clear()
+
+    def fixtures(self) -> list[dict]:
+        """Return the fixtures records, as produced by Loader.load_fixtures."""
+        fixtures: list[dict] = self.shared.get(
+            FIXTURES, self.shared.load.load_fixtures, depends=(FIXTURES,)
+        )
+        return fixtures
+
+    def fixtures_df(self) -> pd.DataFrame:
+        """Return the fixtures as a dataframe.
+
+        The dataframe is shared between callers, so copy it before mutating it.
+        """
+        fixtures_df: pd.DataFrame = self.shared.get(
+            "fixtures-df", lambda: pd.DataFrame(self.fixtures()), depends=(FIXTURES,)
+        )
+        return fixtures_df
+
+    def custom_orderings(self) -> dict[str, list[str]]:
+        """Return the custom group orderings."""
+        custom_orderings: dict[str, list[str]] = self.shared.get(
+            "custom-orderings", self.shared.load.custom_orderings, depends=(FIXTURES,)
+        )
+        return custom_orderings
+
+    def fixtures_index(self) -> "FixturesIndex":
+        """Return the fixtures indexed by team, round and date for the JSON API."""
+        from euros.api import FixturesIndex
+
+        fixtures_index: FixturesIndex = self.shared.get(
+            "fixtures-index",
+            lambda: FixturesIndex.from_fixtures(self.fixtures_df()),
+            depends=(FIXTURES,),
+        )
+        return fixtures_index
+
+    def user_choices(self) -> pd.DataFrame:
+        """Return every user's choices, as produced by Loader.create_user_choices.
+
+        The dataframe is shared between callers, so copy it before mutating it.
+        """
+        user_choices: pd.DataFrame = self.get(
+            CHOICES, self.load.create_user_choices, depends=(CHOICES,)
+        )
+        return user_choices
+
+    def registry(self) -> Registry:
+        """Return the registry of the teams and users in the choices."""
+        registry: Registry = self.get(
+            "registry",
+            lambda: Registry.from_choices(self.user_choices()),
+            depends=(CHOICES,),
+        )
+        return registry
+
+    def tokens(self) -> np.ndarray:
+        """Return the team x user token matrix, indexed by the registry's ids."""
+        tokens: np.ndarray = self.get(
+            "tokens",
+            lambda: self.registry().tokens(self.user_choices()),
+            depends=(CHOICES,),
+        )
+        return tokens
+
+    def rivals(self, wait: bool = True) -> tuple[np.ndarray, np.ndarray] | None:
+        """Return each user's closest rivals and their similarity, as top_similar.
+
+        They take seconds to build for a large league. Unless wait is set,
+        None is returned until they have been built in the background.
+        """
+        from euros.rivals import top_similar
+
+        get = self.get if wait else self.get_later
+        rivals: tuple[np.ndarray, np.ndarray] | None = get(
+            "rivals", lambda: top_similar(self.tokens()), depends=(CHOICES,)
+        )
+        return rivals
+
+    def all_users(self) -> pd.DataFrame:
+        """Return every user's tokens and tokens left, as in all_users_frame."""
+        from euros.all_users import all_users_frame
+
+        all_users: pd.DataFrame = self.get(
+            "all-users",
+            lambda: all_users_frame(self.registry(), self.tokens(), self.fixtures_df()),
+        )
+        return all_users
+
+    def user_choices_records(self) -> list[dict]:
+        """Return every user's choices as records for the layout store."""
+        records: list[dict] = self.get(
+            "user-choices-records",
+            lambda: self.user_choices().to_dict("records"),
+            depends=(CHOICES,),
+        )
+        return records
+
+    def standings(self) -> pd.DataFrame | None:
+        """Return the standings, or None if no fixture has completed."""
+        from euros.standings import get_standings
+
+        standings: pd.DataFrame | None = self.get(
+            "standings",
+            lambda: get_standings(
+                self.user_choices().copy(deep=True),
+                fixtures=self.fixtures_df().copy(deep=True),
+            ),
+        )
+        return standings
+
+    def checkpoints(self) -> "StandingsCheckpoints | None":
+        """Return the cumulative points after each match, or None if none played."""
+        from euros.standings import StandingsCheckpoints
+
+        checkpoints: StandingsCheckpoints | None = self.get(
+            "checkpoints",
+            lambda: (
+                StandingsCheckpoints.from_standings(standings)
+                if (standings := self.standings()) is not None
+                else None
+            ),
+        )
+        return checkpoints
+
+    def leaderboard(self, match_number: int | None = None) -> "Leaderboard | None":
+        """Return the users ranked after match_number, or the latest match.
+
+        Returns None if no match has been played.
+        """
+        from euros.standings import Leaderboard
+
+        leaderboard: Leaderboard | None = self.get(
+            ("leaderboard", match_number),
+            lambda: (
+                Leaderboard.from_totals(checkpoints.as_of(match_number))
+                if (checkpoints := self.checkpoints()) is not None
+                else None
+            ),
+        )
+        return leaderboard
+
+    def leaderboard_on(self, day: date) -> "Leaderboard | None":
+        """Return the users ranked after the last match kicking off by day.
+
+        Returns None if no match has been played.
+        """
+        from euros.standings import Leaderboard
+
+        leaderboard: Leaderboard | None = self.get(
+            ("leaderboard-on", day),
+            lambda: (
+                Leaderboard.from_totals(
+                    checkpoints.as_of_date(datetime.combine(day, time.max))
+                )
+                if (checkpoints := self.checkpoints()) is not None
+                else None
+            ),
+        )
+        return leaderboard
+
+    def played_match(self, match_number: int | None) -> int | None:
+        """Return match_number if it has been played, else the match to show instead.
+
+        For a match whose result has been cleared since, that is the latest
+        match played when its result was recorded, from the results journal.
+        Otherwise it is None, for the latest match.
+        """
+        checkpoints = self.checkpoints()
+
+        if (
+            match_number is None
+            or checkpoints is None
+            or match_number in checkpoints.match_numbers
+        ):
+            return match_number
+
+        def build() -> int | None:
+            state = self.load.results_journal.replay_match(match_number)
+            if state is None:
+                return None
+            recorded = [
+                number for number, (result, *_) in state.results.items() if result
+            ]
+            (rows,) = np.nonzero(np.isin(checkpoints.match_numbers, recorded))
+            return int(checkpoints.match_numbers[rows[-1]]) if len(rows) else None
+
+        played: int | None = self.get(("played-match", match_number), build)
+        return played
@@ -0,0 +1,152 @@
+"""Validation and persistence of users' token choices."""
+
+import logging
+import math
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future
+from contextlib import nullcontext
+from pathlib import Path
+
+import pandas as pd
+
+from euros.storage import atomic_write, file_lock
+
+TOTAL_TOKENS = 12
+MAX_TEAM_TOKENS = 11
+
+
+class ChoicesFrozenError(RuntimeError):
+    """Raised for a write after the choices have been frozen."""
+
+
+def validate_tokens(tokens: pd.Series) -> str | None:
+    """Return why a token allocation is invalid, or None if it is valid."""
+    numeric = pd.to_numeric(tokens, errors="coerce")
+
+    if numeric.isna().any() or (numeric.round() != numeric).any():
+        return "Please enter integers only"
+
+    if not ((numeric >= 0) & (numeric <= MAX_TEAM_TOKENS)).all():
+        return f"Please enter values between 0 and {MAX_TEAM_TOKENS}"
+
+    if numeric.sum() != TOTAL_TOKENS:
+        return f"Token values must sum to {TOTAL_TOKENS}"
+
+    return None
+
+
+class ChoiceWriter:
+    """Write users' choices atomically, coalescing bursts of submissions.
+
+    A submission is written straight away unless the same file was written less
+    than `window` seconds ago. In that case it is held back and only the latest
+    submission is written once the window has passed, so repeated clicks just
+    before the cutoff cost a single write.
+
+    If snapshot_path is given, every write holds a shared lock on it and is
+    refused once the snapshot exists. freeze_choices holds the lock exclusively,
+    so each write lands either before the freeze reads the choices or not at
+    all, whichever worker it was submitted to.
+    """
+
+    def __init__(
+        self,
+        window: float = 2.0,
+        on_write: Callable[[Path, pd.DataFrame], None] | None = None,
+        snapshot_path: Path | None = None,
+    ) -> None:
+        """Coalesce writes within window seconds, calling on_write after each."""
+        self.window = window
+        self.on_write = on_write
+        self.snapshot_path = snapshot_path
+        self._lock = threading.Lock()
+        self._path_locks: dict[Path, threading.Lock] = {}
+        self._pending: dict[Path, tuple[bytes, pd.DataFrame, Future]] = {}
+        self._timers: dict[Path, threading.Timer] = {}
+        self._last_write: dict[Path, float] = {}
+
+    def submit(self, path: Path, choices: pd.DataFrame) -> Future:
+        """Queue choices to be written to path.
+
+        Returns a future that completes once the choices, or later ones that
+        replaced them, are on disk, or raises the error the write failed with.
+        It is already done if the choices were written immediately.
+        """
+        if (message := validate_tokens(choices["tokens"])) is not None:
+            raise ValueError(message)
+
+        data = choices.to_csv(index=False).encode()
+
+        with self._lock:
+            future = self._pending[path][2] if path in self._pending else Future()
+            self._pending[path] = (data, choices, future)
+
+            if path in self._timers:
+                return future
+
+            wait = self._last_write.get(path, -math.inf) + self.window
+            wait -= time.monotonic()
+
+            if wait > 0:
+                timer = threading.Timer(wait, self.flush, args=(path,))
+                timer.daemon = True
+                self._timers[path] = timer
+                timer.start()
+                return future
+
+        self.flush(path)
+        return future
+
+    def flush(self, path: Path) -> None:
+        """Write the latest pending submission for path, if there is one."""
+        with self._lock:
+            path_lock = self._path_locks.setdefault(path, threading.Lock())
+
+        with path_lock:
+            with self._lock:
+                self._timers.pop(path, None)
+                pending = self._pending.pop(path, None)
+                if pending is None:
+                    return
+                self._last_write[path] = time.monotonic()
+
+            data, choices, future = pending
+
+            try:
+                self._write(path, data, choices)
+            except ChoicesFrozenError as e:
+                future.set_exception(e)
+            except Exception as e:
+                logging.getLogger(__name__).exception("Writing %s failed.", path)
+                future.set_exception(e)
+            else:
+                future.set_result(None)
+
+    def _write(self, path: Path, data: bytes, choices: pd.DataFrame) -> None:
+        frozen = self.snapshot_path
+
+        with file_lock(frozen, shared=True) if frozen is not None else nullcontext():
+            if frozen is not None and frozen.exists():
+                raise ChoicesFrozenError("Selections closed at the cutoff time.")
+
+            with file_lock(path):
+                # Compared with the file, not what this worker last wrote, as
+                # another worker may have written different choices since.
+                if path.exists() and path.read_bytes() == data:
+                    return
+                atomic_write(path, data)
+
+        if self.on_write is not None:
+            self.on_write(path, choices)
+
+    def flush_all(self) -> None:
+        """Write every pending submission now, e.g. at shutdown."""
+        with self._lock:
+            paths = list(self._pending)
+            for timer in self._timers.values():
+                timer.cancel()
+
+        for path in paths:
+            self.flush(path)
@@ -0,0 +1,99 @@
+"""Compression of large responses from the Flask server."""
+
+import gzip
+from collections import OrderedDict
+from collections.abc import Callable
+from threading import Lock
+
+from dash import Dash
+from flask import Response, request
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "text/javascript",
+    "text/html",
+    "text/css",
+    "image/svg+xml",
+}
+
+
+class Compressor:
+    """Compress responses with brotli or gzip, depending on what the client accepts.
+
+    Brotli is used when the optional brotli package is installed. Responses
+    carrying an ETag (cached callback renders and static files) are compressed
+    once and the compressed bytes are kept keyed by ETag, so replaying a cached
+    render never compresses it again.
+    """
+
+    def __init__(self, min_size: int = 1024, level: int = 6, max_entries: int = 256):
+        """Compress bodies of min_size bytes or more, keeping max_entries of them."""
+        self.min_size = min_size
+        self.level = level
+        self.max_entries = max_entries
+        self.encoders: dict[str, Callable[[bytes], bytes]] = {
+            "gzip": lambda data: gzip.compress(data, compresslevel=self.level)
+        }
+        if brotli is not None:
+            self.encoders = {
+                "br": lambda data: brotli.compress(data, quality=self.level),
+                **self.encoders,
+            }
+        self._compressed: OrderedDict[tuple[str, str], bytes] = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app: Dash) -> None:
+        """Register the compression hook on the Dash app's Flask server.
+
+        Register it before any other after_request hook that sets ETags, as
+        Flask runs after_request hooks in reverse order of registration.
+        """
+        app.server.after_request(self.after_request)
+
+    def after_request(self, response: Response) -> Response:
+        """Compress the response if it is large enough and the client accepts it."""
+        if (
+            response.status_code != 200
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or "Content-Encoding" in response.headers
+        ):
+            return response
+
+        encoding = request.accept_encodings.best_match(list(self.encoders))
+        if encoding is None:
+            return response
+
+        response.direct_passthrough = False
+
+        etag, _ = response.get_etag()
+        key = (etag, encoding) if etag is not None else None
+
+        with self._lock:
+            data = self._compressed.get(key) if key is not None else None
+            if data is not None and key is not None:
+                self._compressed.move_to_end(key)
+
+        if data is None:
+            body = response.get_data()
+            if len(body) < self.min_size:
+                return response
+
+            data = self.encoders[encoding](body)
+
+            if key is not None:
+                with self._lock:
+                    self._compressed[key] = data
+                    while len(self._compressed) > self.max_entries:
+                        self._compressed.popitem(last=False)
+
+        response.set_data(data)
+        response.headers["Content-Encoding"] = encoding
+        response.vary.add("Accept-Encoding")
+
+        return response
@@ -0,0 +1,112 @@
+"""Push data version changes to open browsers with server-sent events."""
+
+import json
+import time
+from collections.abc import Iterator
+
+from dash import ClientsideFunction, Dash, Input, Output, State, dcc, no_update
+from dash.exceptions import PreventUpdate
+from flask import Response
+
+from euros.cache import DataCache
+
+EVENTS_ROUTE = "events"
+
+
+def _version(data: DataCache) -> dict[str, int]:
+    fixtures, choices = data.version()
+    return {"fixtures": fixtures, "choices": choices}
+
+
+def version_stream(data: DataCache, interval: float, heartbeat: float) -> Iterator[str]:
+    """Yield an event whenever the data version changes.
+
+    Checking the version is an O(1) read of the shared counters, so an idle
+    connection costs next to nothing. A comment is sent every heartbeat seconds
+    to keep proxies from closing the connection.
+    """
+    version = None
+    last_sent = time.monotonic()
+
+    while True:
+        current = _version(data)
+
+        if current != version:
+            version = current
+            last_sent = time.monotonic()
+            yield f"data: {json.dumps(current)}\n\n"
+        elif time.monotonic() - last_sent > heartbeat:
+            last_sent = time.monotonic()
+            yield ": heartbeat\n\n"
+
+        time.sleep(interval)
+
+
+def add_live_updates(
+    app: Dash, data: DataCache, interval: float = 1.0, heartbeat: float = 15.0
+) -> None:
+    """Add the events route and the callbacks that apply version changes.
+
+    When the fixtures change the fixtures stores are refreshed, which re-renders
+    the open tab unless it is Play. When the choices change the user choices
+    store is refreshed, which updates the standings figure if it is shown, and
+    show-users only if it has flipped at the cutoff.
+    """
+
+    @app.server.route(f"{app.config.routes_pathname_prefix}{EVENTS_ROUTE}")
+    def events() -> Response:
+        return Response(
+            version_stream(data, interval, heartbeat),
+            mimetype="text/event-stream",
+            headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        )
+
+    app.clientside_callback(
+        ClientsideFunction(namespace="euros", function_name="listenForVersions"),
+        Output("data-version", "data"),
+        Input("events-url", "data"),
+    )
+
+    @app.callback(
+        Output("fixtures-table", "data"),
+        Output("user-choices", "data"),
+        Output("show-users", "data"),
+        Output("data-version-applied", "data"),
+        Input("data-version", "data"),
+        State("data-version-applied", "data"),
+        State("show-users", "data"),
+        prevent_initial_call=True,
+    )
+    def apply_data_version(
+        version: dict[str, int], applied: dict[str, int], shown: bool
+    ) -> tuple:
+        if version is None or version == applied:
+            raise PreventUpdate
+
+        fixtures_changed = version["fixtures"] != applied["fixtures"]
+        choices_changed = version["choices"] != applied["choices"]
+
+        # show-users re-renders the open tab, Play included, so it is only
+        # written when it flips at the cutoff, not for every submission.
+        show_users = data.load.show_users()
+
+        return (
+            data.fixtures() if fixtures_changed else no_update,
+            data.user_choices_records() if choices_changed else no_update,
+            show_users if show_users != shown else no_update,
+            version,
+        )
+
+
+def live_update_stores(app: Dash, data: DataCache) -> list[dcc.Store]:
+    """Create the layout stores that track the data version of the page."""
+    version = _version(data)
+
+    return [
+        dcc.Store(
+            id="events-url",
+            data=f"{app.config.requests_pathname_prefix}{EVENTS_ROUTE}",
+        ),
+        dcc.Store(id="data-version", data=version),
+        dcc.Store(id="data-version-applied", data=version),
+    ]
@@ -5,12 +5,11 @@ from dash import dcc, html
 
 def lookup_team_owners(team: str, user_choices: pd.DataFrame) -> str:
     """Lookup the users who have tokens for a given team."""
-    user_tokens: list[str] = (
-        user_choices[(user_choices["team"] == team) & (user_choices["tokens"] > 0)]
-        .apply(lambda row: f"""{row["user"]} ({row["tokens"]})""", axis=1)
-        .tolist()
+    owners = user_choices[(user_choices["team"] == team) & (user_choices["tokens"] > 0)]
+
+    return ", ".join(
+        f"{user} ({tokens})" for user, tokens in zip(owners["user"], owners["tokens"])
     )
-    return ", ".join(user_tokens)
 
 
 def get_day_with_suffix(day: int) -> str:
@@ -124,9 +123,11 @@ def create_fixtures_tab(
                                     dbc.Col(
                                         [
                                             html.H5(
-                                                row.loc["timestamp"]
-                                                if row["Result"] == ""
-                                                else row["Result"],
+                                                (
+                                                    row.loc["timestamp"]
+                                                    if row["Result"] == ""
+                                                    else row["Result"]
+                                                ),
                                                 className="primaryText",
                                             )
                                         ],
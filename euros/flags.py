@@ -1,3 +1,5 @@
+from functools import cache
+
 FLAG_UNICODE: dict[str, str] = {
     "Germany": "\U0001F1E9\U0001F1EA",
     "Scotland": "\U0001F3F4\U000E0067\U000E0062\U000E0073\U000E0063\U000E0074\U000E007F",  # noqa: E501
@@ -24,3 +26,12 @@ FLAG_UNICODE: dict[str, str] = {
     "Portugal": "\U0001F1F5\U0001F1F9",
     "Czechia": "\U0001F1E8\U0001F1FF",
 }
+
+# Shown for teams without a known flag, e.g. in generated tournaments.
+UNKNOWN_FLAG = "\U0001F3F3"
+
+
+@cache
+def team_label(team: str) -> str:
+    """Return the team name followed by its flag, built once per team."""
+    return team + " " + FLAG_UNICODE.get(team, UNKNOWN_FLAG)
@@ -0,0 +1,265 @@
+"""Generate synthetic leagues and tournaments for scale testing."""
+
+import json
+from argparse import ArgumentParser
+from datetime import date, datetime, timedelta
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import yaml
+
+from euros.choices import TOTAL_TOKENS
+from euros.flags import FLAG_UNICODE
+from euros.snapshot import ChoicesSnapshot
+
+KNOCKOUT_ROUNDS = [
+    ("Round of 16", 8),
+    ("Quarter Finals", 4),
+    ("Semi Finals", 2),
+    ("Final", 1),
+]
+
+# Home and away pairs of each group round, so every team plays at home and away.
+GROUP_SCHEDULES = {
+    3: [[(0, 1)], [(1, 2)], [(2, 0)]],
+    4: [[(0, 1), (2, 3)], [(1, 2), (3, 0)], [(0, 2), (3, 1)]],
+}
+
+KICK_OFFS = ["14:00", "17:00", "20:00"]
+
+
+def team_names(n_teams: int) -> list[str]:
+    """Return the teams with flags first, then numbered teams."""
+    teams = list(FLAG_UNICODE)[:n_teams]
+    return teams + [f"Team {i}" for i in range(len(teams) + 1, n_teams + 1)]
+
+
+def _score(rng: np.random.Generator, knockout: bool) -> str:
+    home, away = rng.poisson(1.3, size=2)
+    if knockout and home == away:
+        penalties = rng.choice([(4, 3), (3, 4), (5, 4), (4, 5), (3, 2), (2, 3)])
+        return f"{home}-{away} ({penalties[0]}-{penalties[1]})"
+    return f"{home}-{away}"
+
+
+def _winner(home: str, away: str, result: str) -> str:
+    score = result.split("(")[-1].strip(")")
+    home_goals, away_goals = map(int, score.split("-"))
+    return home if home_goals > away_goals else away
+
+
+def generate_fixtures(
+    n_teams: int,
+    n_groups: int,
+    completion: float,
+    rng: np.random.Generator,
+    start: date = date(2024, 6, 14),
+) -> pd.DataFrame:
+    """Generate a group stage and a 16 team knockout, the first matches played.
+
+    Groups have three or four teams and play three rounds. completion is the
+    fraction of all matches, in kick-off order, that have a result.
+    """
+    sizes = [n_teams // n_groups + (i < n_teams % n_groups) for i in range(n_groups)]
+    if not set(sizes) <= set(GROUP_SCHEDULES) or n_teams < 16:
+        raise ValueError("Groups must have 3 or 4 teams and at least 16 teams.")
+
+    teams = team_names(n_teams)
+    groups: list[tuple[str, list[str]]] = []
+    for i, size in enumerate(sizes):
+        offset = sum(sizes[:i])
+        groups.append((chr(ord("A") + i), teams[offset : offset + size]))  # noqa: E203
+
+    rows = [
+        [str(round_number + 1), group_teams[home], group_teams[away], f"Group {letter}"]
+        for round_number in range(3)
+        for letter, group_teams in groups
+        for home, away in GROUP_SCHEDULES[len(group_teams)][round_number]
+    ]
+    for name, matches in KNOCKOUT_ROUNDS:
+        rows += [[name, "", "", ""] for _ in range(matches)]
+
+    n_played = round(completion * len(rows))
+    results = [""] * len(rows)
+
+    # The knockout is seeded at random and each round is fed by the previous one.
+    entrants = list(rng.permutation(teams)[:16])
+    first = len(rows) - sum(matches for _, matches in KNOCKOUT_ROUNDS)
+    feeders: list[int] = []
+
+    for i, row in enumerate(rows):
+        knockout = i >= first
+        if knockout:
+            k = i - first
+            if k < 8:
+                row[1], row[2] = entrants[2 * k], entrants[2 * k + 1]
+            else:
+                home, away = feeders[2 * (k - 8)], feeders[2 * (k - 8) + 1]
+                row[1] = (
+                    _winner(rows[home][1], rows[home][2], results[home])
+                    if results[home]
+                    else f"Winner Match {home + 1}"
+                )
+                row[2] = (
+                    _winner(rows[away][1], rows[away][2], results[away])
+                    if results[away]
+                    else f"Winner Match {away + 1}"
+                )
+            feeders.append(i)
+
+        if i < n_played:
+            results[i] = _score(rng, knockout)
+
+    kick_off = datetime.combine(start, datetime.min.time())
+    dates = [
+        (kick_off + timedelta(days=i // len(KICK_OFFS))).strftime("%d/%m/%Y ")
+        + KICK_OFFS[i % len(KICK_OFFS)]
+        for i in range(len(rows))
+    ]
+
+    return pd.DataFrame(
+        {
+            "Match Number": range(1, len(rows) + 1),
+            "Round Number": [row[0] for row in rows],
+            "Date": dates,
+            "Location": [f"Stadium {i % 10 + 1}" for i in range(len(rows))],
+            "Home Team": [row[1] for row in rows],
+            "Away Team": [row[2] for row in rows],
+            "Group": [row[3] for row in rows],
+            "Result": results,
+        }
+    )
+
+
+def generate_tokens(
+    n_users: int, n_teams: int, skew: float, rng: np.random.Generator
+) -> np.ndarray:
+    """Generate a valid team x user token matrix.
+
+    Team popularity follows a Zipf law with exponent skew, so 0 spreads tokens
+    evenly and larger values pile them onto the favourites.
+    """
+    popularity = 1 / np.arange(1, n_teams + 1) ** skew
+    tokens = rng.multinomial(TOTAL_TOKENS, popularity / popularity.sum(), n_users)
+
+    # Nobody may put every token on one team, so move one to the next team.
+    (all_in,) = np.nonzero(tokens.max(axis=1) == TOTAL_TOKENS)
+    favourite = tokens[all_in].argmax(axis=1)
+    tokens[all_in, favourite] -= 1
+    tokens[all_in, (favourite + 1) % n_teams] += 1
+
+    return tokens.T.astype(np.int8)
+
+
+def generate(
+    base_path: Path,
+    n_users: int = 1_000,
+    n_teams: int = 24,
+    n_groups: int = 6,
+    completion: float = 0.5,
+    skew: float = 1.0,
+    seed: int = 0,
+    user_group: str = "generated",
+    snapshot: bool = False,
+) -> None:
+    """Write a complete base path for a synthetic league.
+
+    With snapshot, the choices are written as the frozen choices.npz the app
+    reads after the cutoff instead of one csv per user, which is much faster
+    for large leagues.
+    """
+    rng = np.random.default_rng(seed)
+
+    fixtures = generate_fixtures(n_teams, n_groups, completion, rng)
+    base_path.mkdir(parents=True, exist_ok=True)
+    fixtures.to_csv(base_path / "fixtures.csv", index=False)
+
+    group_path = base_path / user_group
+    (group_path / "choices").mkdir(parents=True, exist_ok=True)
+
+    users = [f"user{i}" for i in range(n_users)]
+    with open(group_path / "users.json", "w") as file:
+        json.dump({user: f"{user}-password" for user in users}, file)
+
+    teams = np.array(team_names(n_teams))
+    tokens = generate_tokens(n_users, n_teams, skew, rng)
+
+    if snapshot:
+        names = np.array([user.capitalize() for user in users])
+        ChoicesSnapshot(
+            teams=teams,
+            users=names,
+            tokens=tokens,
+            checksum=ChoicesSnapshot.compute_checksum(teams, names, tokens),
+        ).save(group_path / "choices.npz")
+        return
+
+    # Every possible csv line, indexed by team and token count.
+    lines = np.array(
+        [[f"{team},{count}\n" for count in range(TOTAL_TOKENS + 1)] for team in teams],
+        dtype=object,
+    )
+    user_lines = lines[np.arange(len(teams))[:, None], tokens].T
+
+    for user, column in zip(users, user_lines):
+        (group_path / "choices" / f"{user}.csv").write_text(
+            "team,tokens\n" + "".join(column)
+        )
+
+
+def main() -> None:
+    """Generate a synthetic league from the command line."""
+    parser = ArgumentParser(description="Generate a synthetic Euros league.")
+    parser.add_argument("base_path", type=Path)
+    parser.add_argument("--users", type=int, default=1_000)
+    parser.add_argument("--teams", type=int, default=24)
+    parser.add_argument("--groups", type=int, default=6)
+    parser.add_argument(
+        "--completion", type=float, default=0.5, help="fraction of matches played."
+    )
+    parser.add_argument(
+        "--skew", type=float, default=1.0, help="Zipf exponent of team popularity."
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--user-group", type=str, default="generated")
+    parser.add_argument(
+        "--snapshot", action="store_true", help="write choices.npz, not csvs."
+    )
+    parser.add_argument(
+        "--config", type=Path, default=None, help="also write a config here."
+    )
+    parser.add_argument(
+        "--cutoff",
+        type=datetime.fromisoformat,
+        default=datetime.now().astimezone() + timedelta(days=1),
+        help="cutoff time of the config, ISO 8601, by default in a day.",
+    )
+    args = parser.parse_args()
+
+    generate(
+        args.base_path,
+        n_users=args.users,
+        n_teams=args.teams,
+        n_groups=args.groups,
+        completion=args.completion,
+        skew=args.skew,
+        seed=args.seed,
+        user_group=args.user_group,
+        snapshot=args.snapshot,
+    )
+
+    if args.config is not None:
+        with open(args.config, "w") as file:
+            yaml.safe_dump(
+                {
+                    "user_group": args.user_group,
+                    "base_path": str(args.base_path),
+                    "cutoff_time": args.cutoff.isoformat(),
+                },
+                file,
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+"""A leaderboard across every user group under one base path."""
+
+import heapq
+import itertools
+import logging
+import multiprocessing
+import os
+import threading
+from collections.abc import Callable
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from euros.load import Loader
+
+GLOBAL_TOP = 100
+
+# Seconds between checks of every group's data version, without refresh_interval.
+BOARD_REFRESH_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class GroupShard:
+    """Every user's total points in one user group, best first."""
+
+    group: str
+    users: np.ndarray
+    points: np.ndarray
+
+    @classmethod
+    def from_choices(
+        cls, group: str, user_choices: pd.DataFrame, fixtures: pd.DataFrame
+    ) -> "GroupShard":
+        """Total the group's standings, as computed by get_standings."""
+        from euros.standings import get_standings
+
+        users = user_choices["user"].cat.categories.to_numpy(dtype=object)
+        points = np.zeros(len(users))
+
+        if (standings := get_standings(user_choices, fixtures)) is not None:
+            # Unobserved, so every user is there, in the order of the categories.
+            points = (
+                standings.groupby("user", observed=False)["points_allocated"]
+                .sum()
+                .to_numpy()
+            )
+
+        order = np.lexsort((users, -points))
+
+        return cls(group=group, users=users[order], points=points[order])
+
+    def summary(self) -> dict[str, Any]:
+        """Return the number of users and the mean, median and top score."""
+        if len(self.points) == 0:
+            return {"group": self.group, "users": 0}
+
+        return {
+            "group": self.group,
+            "users": len(self.points),
+            "mean": self.points.mean(),
+            "median": np.median(self.points),
+            "top": self.points[0],
+        }
+
+
+def merge_top(shards: list[GroupShard], n: int = GLOBAL_TOP) -> pd.DataFrame:
+    """Return the n best users of all shards, merging their sorted totals.
+
+    Each shard is already sorted, so only the first n users are looked at,
+    however many users and groups there are. Ties are broken by name, then
+    group, and share the same rank.
+    """
+    rows = list(
+        itertools.islice(
+            heapq.merge(
+                *(
+                    zip(-shard.points, shard.users, itertools.repeat(shard.group))
+                    for shard in shards
+                )
+            ),
+            n,
+        )
+    )
+
+    top = pd.DataFrame(rows, columns=["points", "user", "group"])
+    top["points"] = -top["points"]
+    top.insert(0, "rank", top["points"].rank(method="min", ascending=False))
+
+    return top.astype({"rank": int}).round({"points": 2})
+
+
+@dataclass(frozen=True)
+class GlobalStandings:
+    """The top users of every group together, and a summary of each group."""
+
+    top: pd.DataFrame
+    summary: pd.DataFrame
+
+    @classmethod
+    def from_shards(
+        cls, shards: list[GroupShard], n: int = GLOBAL_TOP
+    ) -> "GlobalStandings":
+        """Merge the shards of every group."""
+        summary = pd.DataFrame(
+            [shard.summary() for shard in shards],
+            columns=["group", "users", "mean", "median", "top"],
+        )
+
+        return cls(top=merge_top(shards, n), summary=summary.round(2))
+
+
+def _group_shard(config: dict, group: str, fixtures: pd.DataFrame) -> GroupShard:
+    load = Loader(**{**config, "user_group": group})
+
+    return GroupShard.from_choices(group, load.create_user_choices(), fixtures)
+
+
+class GlobalBoard:
+    """Cache of the global standings of groups, rebuilt when their data changes.
+
+    Each group's shard is kept against the fixtures version and the group's
+    choices version, so a choice only rebuilds its own group and a result
+    rebuilds all of them, in parallel on a pool of processes.
+
+    The pool's processes are started from a fork server, not forked from the
+    serving process, so they never inherit its threads or the locks they hold.
+
+    Requests should read latest(), with the standings kept up to date by
+    watch(), so that they never wait for a rebuild.
+    """
+
+    def __init__(
+        self,
+        load: Loader,
+        groups: list[str],
+        n: int = GLOBAL_TOP,
+        processes: int | None = None,
+    ) -> None:
+        """Create an empty board of groups, built in up to processes processes."""
+        self.load = load
+        self.groups = groups
+        self.n = n
+        self.processes = processes or os.cpu_count() or 1
+        self._loaders = {group: load.for_group(group) for group in groups}
+        self._shards: dict[str, tuple[tuple[int, int], GroupShard]] = {}
+        self._standings: tuple[tuple, GlobalStandings] | None = None
+        self._pool: Executor | None = None
+        self._lock = threading.Lock()
+        self._building = threading.Lock()
+        self._closed = threading.Event()
+
+    def version(self) -> tuple:
+        """Return the data version of every group."""
+        return tuple(load.data_version() for load in self._loaders.values())
+
+    def _executor(self) -> Executor:
+        if self._pool is None:
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__, "euros.standings"])
+            self._pool = ProcessPoolExecutor(self.processes, mp_context=context)
+        return self._pool
+
+    def _build(self, groups: list[str], fixtures: pd.DataFrame) -> list[GroupShard]:
+        config = self.load.model_dump()
+
+        if self.processes == 1 or len(groups) == 1:
+            return [_group_shard(config, group, fixtures.copy()) for group in groups]
+
+        return list(
+            self._executor().map(
+                _group_shard,
+                itertools.repeat(config),
+                groups,
+                itertools.repeat(fixtures),
+            )
+        )
+
+    def standings(self, fixtures: pd.DataFrame) -> GlobalStandings:
+        """Return the global standings, rebuilding the shards that are stale.
+
+        Only one rebuild runs at a time, and the shards are built outside the
+        lock that latest() takes, so readers of latest() never wait for it.
+        """
+        with self._building:
+            with self._lock:
+                versions = self.version()
+
+                if self._standings is not None and self._standings[0] == versions:
+                    return self._standings[1]
+
+                current = dict(zip(self.groups, versions))
+                stale = [
+                    group
+                    for group in self.groups
+                    if group not in self._shards
+                    or self._shards[group][0] != current[group]
+                ]
+
+            built = self._build(stale, fixtures)
+
+            with self._lock:
+                for group, shard in zip(stale, built):
+                    self._shards[group] = (current[group], shard)
+
+                standings = GlobalStandings.from_shards(
+                    [self._shards[group][1] for group in self.groups], self.n
+                )
+                self._standings = (versions, standings)
+
+        return standings
+
+    def latest(self) -> GlobalStandings | None:
+        """Return the standings last built, or None if they never have been."""
+        with self._lock:
+            return None if self._standings is None else self._standings[1]
+
+    def watch(self, fixtures: Callable[[], pd.DataFrame], interval: float) -> None:
+        """Build the standings from a background thread, then whenever data moves.
+
+        fixtures is called for the fixtures of each build, e.g.
+        DataCache.fixtures_df.
+        """
+
+        def run() -> None:
+            version = None
+            while True:
+                if (current := self.version()) != version:
+                    version = current
+                    try:
+                        self.standings(fixtures())
+                    except Exception:
+                        logging.getLogger(__name__).exception(
+                            "Building the global standings failed."
+                        )
+                if self._closed.wait(interval):
+                    return
+
+        threading.Thread(target=run, name="euros-global-board", daemon=True).start()
+
+    def close(self) -> None:
+        """Stop watching for changes and shut down the pool of processes."""
+        self._closed.set()
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
@@ -1,8 +1,10 @@
+from collections.abc import Callable
+
 import dash_bootstrap_components as dbc
 import pandas as pd
 from dash import dash_table, html
 
-from euros.flags import FLAG_UNICODE
+from euros.flags import team_label
 
 
 def get_points(home_score: str | int, away_score: str | int) -> pd.Series:
@@ -127,20 +129,21 @@ def create_table(
 
     group_standing = order_table(group_standing, custom_ordering)
 
-    group_standing["team"] = group_standing["team"].apply(
-        lambda team: team + " " + FLAG_UNICODE[team]
-    )
+    group_standing["team"] = group_standing["team"].map(team_label)
 
     return group_standing
 
 
 def make_table(
-    group: str, fixtures: pd.DataFrame, custom_ordering: list[str] | None
+    group: str,
+    fixtures: pd.DataFrame,
+    custom_ordering: list[str] | None,
+    table_builder: Callable[..., pd.DataFrame] = create_table,
 ) -> dash_table.DataTable:
     """Create a table of a group's standings."""
     return dash_table.DataTable(
         id=f"group-table-{group}",
-        data=create_table(group, fixtures, custom_ordering).to_dict("records"),
+        data=table_builder(group, fixtures, custom_ordering).to_dict("records"),
         sort_action="native",
         sort_mode="multi",
         columns=[
@@ -171,44 +174,36 @@ def make_table(
 
 
 def create_groups_tab(
-    fixtures: pd.DataFrame, custom_orderings: dict[str, list[str]]
+    fixtures: pd.DataFrame,
+    custom_orderings: dict[str, list[str]],
+    table_builder: Callable[..., pd.DataFrame] = create_table,
 ) -> dbc.Col:
-    """Create the groups tab frontend."""
+    """Create the groups tab frontend.
+
+    table_builder creates each group's standings, e.g. from a cache.
+    """
+    groups = sorted(
+        group.removeprefix("Group ") for group in fixtures["Group"].unique() if group
+    )
+
     return dbc.Col(
         children=[
             html.Br(),
-            dbc.Row(
-                [
-                    dbc.Col(
-                        children=[
-                            make_table(i, fixtures, custom_orderings.get(i)),
-                            html.Br(),
-                        ]
-                    )
-                    for i in "AB"
-                ]
-            ),
-            dbc.Row(
-                [
-                    dbc.Col(
-                        children=[
-                            make_table(i, fixtures, custom_orderings.get(i)),
-                            html.Br(),
-                        ]
-                    )
-                    for i in "CD"
-                ]
-            ),
-            dbc.Row(
-                [
-                    dbc.Col(
-                        children=[
-                            make_table(i, fixtures, custom_orderings.get(i)),
-                            html.Br(),
-                        ]
-                    )
-                    for i in "EF"
-                ]
-            ),
+            *[
+                dbc.Row(
+                    [
+                        dbc.Col(
+                            children=[
+                                make_table(
+                                    i, fixtures, custom_orderings.get(i), table_builder
+                                ),
+                                html.Br(),
+                            ]
+                        )
+                        for i in groups[row : row + 2]  # noqa: E203
+                    ]
+                )
+                for row in range(0, len(groups), 2)
+            ],
         ],
     )
@@ -0,0 +1,126 @@
+"""HTTP caching of the Dash callbacks that only depend on the data version."""
+
+import hashlib
+from collections import OrderedDict
+from threading import Lock
+
+from dash import Dash
+from flask import Response, g, request
+
+from euros.cache import DataCache
+
+CACHEABLE_OUTPUTS = {
+    "tabs-content.children",
+    "..standings-graph.figure...standings-graph-static.figure..",
+    "fixtures-filter-table.data",
+    "..current-standings.data...current-standings.page_current..",
+}
+
+# The Play tab shares tabs-content with the others but holds per-user editable state.
+UNCACHEABLE_TABS = {"play-tab"}
+
+ASSETS_MAX_AGE = 60 * 60
+FINGERPRINTED_ASSETS_MAX_AGE = 365 * 24 * 60 * 60
+
+
+class HttpCache:
+    """Attach ETags to data-derived callback responses and honour If-None-Match.
+
+    The ETag of a callback response is a digest of the data version, the
+    requesting user and the callback request body, so it changes exactly when
+    the response could. Matching requests get a 304, and responses already
+    rendered by this worker are replayed without running the callback.
+    """
+
+    def __init__(self, data: DataCache, max_entries: int = 512) -> None:
+        """Tag responses from data, replaying up to max_entries of them."""
+        self.data = data
+        self.max_entries = max_entries
+        self._responses: OrderedDict[str, tuple[bytes, str]] = OrderedDict()
+        self._lock = Lock()
+
+    def init_app(self, app: Dash) -> None:
+        """Register the caching hooks on the Dash app's Flask server."""
+        prefix = app.config.routes_pathname_prefix
+        self.callback_path = f"{prefix}_dash-update-component"
+        self.assets_path = f"{prefix}{app.config.assets_url_path.strip('/')}/"
+
+        app.server.before_request(self.before_request)
+        app.server.after_request(self.after_request)
+
+    def etag(self) -> str | None:
+        """Return the ETag for the current callback request, if it is cacheable."""
+        if request.method != "POST" or request.path != self.callback_path:
+            return None
+
+        body = request.get_json(silent=True) or {}
+
+        if body.get("output") not in CACHEABLE_OUTPUTS:
+            return None
+
+        if any(
+            item.get("id") == "tabs" and item.get("value") in UNCACHEABLE_TABS
+            for item in body.get("inputs", [])
+        ):
+            return None
+
+        auth = request.authorization
+        digest = hashlib.sha1(usedforsecurity=False)
+        digest.update(repr(self.data.version()).encode())
+        digest.update(repr(self.data.load.show_users()).encode())
+        digest.update(repr(auth.username if auth else None).encode())
+        digest.update(request.get_data())
+
+        return digest.hexdigest()
+
+    def before_request(self) -> Response | None:
+        """Answer the request from the cache when possible."""
+        g.etag = etag = self.etag()
+
+        if etag is None:
+            return None
+
+        if etag in request.if_none_match:
+            response = Response(status=304)
+            response.set_etag(etag)
+            return response
+
+        with self._lock:
+            cached = self._responses.get(etag)
+            if cached is not None:
+                self._responses.move_to_end(etag)
+
+        if cached is not None:
+            body, mimetype = cached
+            response = Response(body, mimetype=mimetype)
+            response.set_etag(etag)
+            return response
+
+        return None
+
+    def after_request(self, response: Response) -> Response:
+        """Tag and store cacheable responses and set Cache-Control on assets."""
+        etag: str | None = g.get("etag")
+
+        if etag is not None and response.status_code == 200:
+            if response.get_etag()[0] is None:
+                response.set_etag(etag)
+
+                with self._lock:
+                    mimetype = response.mimetype or "application/json"
+                    self._responses[etag] = (response.get_data(), mimetype)
+                    while len(self._responses) > self.max_entries:
+                        self._responses.popitem(last=False)
+
+            response.headers["Cache-Control"] = "private, no-cache"
+
+        elif request.path.startswith(self.assets_path):
+            # Dash fingerprints asset urls with ?m=<mtime>, so those never change.
+            if "m" in request.args:
+                response.headers["Cache-Control"] = (
+                    f"public, max-age={FINGERPRINTED_ASSETS_MAX_AGE}, immutable"
+                )
+            else:
+                response.headers["Cache-Control"] = f"public, max-age={ASSETS_MAX_AGE}"
+
+        return response
@@ -0,0 +1,307 @@
+"""Append-only journal of result updates and choice submissions."""
+
+import gzip
+import json
+import os
+import struct
+import time
+import zlib
+from argparse import ArgumentParser
+from collections.abc import Iterator
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from euros.storage import atomic_write, file_lock
+
+# type, timestamp, payload length, crc32 of the payload
+_HEADER = struct.Struct("<BdII")
+_MATCH = struct.Struct("<H")
+# Sidecar header: end of the last complete record, records since the snapshot.
+_META = struct.Struct("<QI")
+
+RESULT = 1
+CHOICES = 2
+
+
+@dataclass
+class JournalState:
+    """The latest result of each match and the latest choices of each user."""
+
+    offset: int = 0
+    timestamp: float = 0.0
+    results: dict[int, list[str]] = field(default_factory=dict)
+    choices: dict[str, dict[str, int]] = field(default_factory=dict)
+    result_times: dict[int, float] = field(default_factory=dict)
+    choice_times: dict[str, float] = field(default_factory=dict)
+
+    def apply(self, event: "Event") -> None:
+        """Apply one journal event to the state."""
+        if event.type == RESULT:
+            self.results[event.match_number] = [
+                event.result,
+                event.home_team,
+                event.away_team,
+            ]
+            self.result_times[event.match_number] = event.timestamp
+        else:
+            self.choices[event.user] = event.tokens
+            self.choice_times[event.user] = event.timestamp
+
+        self.offset = event.end
+        self.timestamp = event.timestamp
+
+    def to_json(self) -> bytes:
+        """Serialise the state as gzipped json."""
+        state = {
+            "offset": self.offset,
+            "timestamp": self.timestamp,
+            "results": self.results,
+            "choices": self.choices,
+            "result_times": self.result_times,
+            "choice_times": self.choice_times,
+        }
+        return gzip.compress(json.dumps(state, separators=(",", ":")).encode())
+
+    @classmethod
+    def from_json(cls, data: bytes) -> "JournalState":
+        """Load a state serialised by to_json."""
+        state = json.loads(gzip.decompress(data))
+        for name in ("results", "result_times"):
+            state[name] = {int(k): v for k, v in state.get(name, {}).items()}
+        return cls(**state)
+
+
+@dataclass(frozen=True)
+class Event:
+    """A single journal record."""
+
+    type: int
+    timestamp: float
+    end: int
+    match_number: int = 0
+    result: str = ""
+    home_team: str = ""
+    away_team: str = ""
+    user: str = ""
+    tokens: dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def decode(cls, type: int, timestamp: float, end: int, payload: bytes) -> "Event":
+        """Decode an event from its binary payload."""
+        if type == RESULT:
+            (match_number,) = _MATCH.unpack_from(payload)
+            result, home_team, away_team = (
+                payload[_MATCH.size :].decode().split("\0")  # noqa: E203
+            )
+            return cls(
+                type,
+                timestamp,
+                end,
+                match_number=match_number,
+                result=result,
+                home_team=home_team,
+                away_team=away_team,
+            )
+
+        user, *pairs = payload.decode().split("\0")
+        tokens = {pairs[i]: int(pairs[i + 1]) for i in range(0, len(pairs), 2)}
+        return cls(type, timestamp, end, user=user, tokens=tokens)
+
+
+class Journal:
+    """An append-only binary log with periodic snapshots of the replayed state.
+
+    Each record is a small header (type, timestamp, length and checksum)
+    followed by its payload. A record torn by a crash fails its checksum and
+    ends the log. Every snapshot_every records the replayed state is written
+    to a snapshot named after the log offset it covers, so replaying the log
+    only reads the records after the latest snapshot.
+
+    A hidden sidecar header keeps the end of the last complete record and the
+    number of records since the latest snapshot, so appending never replays.
+    """
+
+    def __init__(self, path: Path, snapshot_every: int = 100) -> None:
+        """Log to path, snapshotting the state every snapshot_every records."""
+        self.path = path
+        self.snapshot_every = snapshot_every
+        self.snapshot_dir = path.with_name(f"{path.name}.snapshots")
+        self.meta_path = path.with_name(f".{path.name}.meta")
+
+    def append_result(
+        self,
+        match_number: int,
+        result: str,
+        home_team: str | None = None,
+        away_team: str | None = None,
+    ) -> None:
+        """Record a result update."""
+        payload = (
+            _MATCH.pack(match_number)
+            + "\0".join([result, home_team or "", away_team or ""]).encode()
+        )
+        self._append(RESULT, payload)
+
+    def append_choices(self, user: str, tokens: dict[str, int]) -> None:
+        """Record a choice submission, with every team in order.
+
+        Every team is kept, not only those with tokens, so that the choices
+        replayed for the user are the rows of their choices csv.
+        """
+        fields = [user]
+        for team, count in tokens.items():
+            fields += [team, str(count)]
+        self._append(CHOICES, "\0".join(fields).encode())
+
+    def _append(self, type: int, payload: bytes) -> None:
+        timestamp = time.time()
+        header = _HEADER.pack(type, timestamp, len(payload), zlib.crc32(payload))
+
+        with file_lock(self.path):
+            offset, tail = self._read_meta()
+
+            # Records a crashed writer appended without updating the header.
+            for event in self.events(offset):
+                offset, tail = event.end, tail + 1
+
+            fd = os.open(self.path, os.O_WRONLY | os.O_CREAT, 0o644)
+            try:
+                # Drop a record torn by a crash, so the new one stays readable.
+                os.ftruncate(fd, offset)
+                os.lseek(fd, offset, os.SEEK_SET)
+                os.write(fd, header + payload)
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+            end, tail = offset + len(header) + len(payload), tail + 1
+
+            if tail >= self.snapshot_every:
+                self._write_snapshot(self.replay())
+                tail = 0
+
+            self._write_meta(end, tail)
+
+    def _read_meta(self) -> tuple[int, int]:
+        try:
+            offset, tail = _META.unpack(self.meta_path.read_bytes())
+        except (FileNotFoundError, struct.error):
+            offset, tail = -1, 0
+
+        size = self.path.stat().st_size if self.path.exists() else 0
+
+        if not 0 <= offset <= size:
+            # No header yet, or a stale one: count from the latest snapshot.
+            snapshots = [offset for offset in self.snapshots() if offset <= size]
+            offset, tail = (snapshots[-1] if snapshots else 0), 0
+
+        return offset, tail
+
+    def _write_meta(self, offset: int, tail: int) -> None:
+        fd = os.open(self.meta_path, os.O_WRONLY | os.O_CREAT, 0o644)
+        try:
+            os.pwrite(fd, _META.pack(offset, tail), 0)
+        finally:
+            os.close(fd)
+
+    def events(self, start: int = 0) -> Iterator[Event]:
+        """Yield the events in the log from byte offset start."""
+        if not self.path.exists():
+            return
+
+        with open(self.path, "rb") as file:
+            file.seek(start)
+            offset = start
+
+            while header := file.read(_HEADER.size):
+                if len(header) < _HEADER.size:
+                    return
+
+                type, timestamp, length, crc = _HEADER.unpack(header)
+                payload = file.read(length)
+
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    return
+
+                offset += _HEADER.size + length
+                yield Event.decode(type, timestamp, offset, payload)
+
+    def snapshots(self) -> list[int]:
+        """Return the offsets covered by the snapshots, in ascending order."""
+        if not self.snapshot_dir.exists():
+            return []
+        return sorted(
+            int(path.name.split(".")[0]) for path in self.snapshot_dir.glob("*.json.gz")
+        )
+
+    def replay(self, until: float | None = None) -> JournalState:
+        """Rebuild the state from the latest snapshot plus the tail of the log.
+
+        If until is given, only events recorded up to that timestamp are applied,
+        starting from the latest snapshot taken before it.
+        """
+        state = self._latest_snapshot(until)
+
+        for event in self.events(state.offset):
+            if until is not None and event.timestamp > until:
+                break
+            state.apply(event)
+
+        return state
+
+    def replay_match(self, match_number: int) -> JournalState | None:
+        """Return the state just after the result of match_number was first recorded.
+
+        The snapshots are binary searched for the last one taken before it, so
+        only the records after that snapshot are read. Returns None if no result
+        of match_number has been recorded.
+        """
+        offsets = self.snapshots()
+        state = JournalState()
+        lower, upper = 0, len(offsets)
+
+        while lower < upper:
+            middle = (lower + upper) // 2
+            snapshot = JournalState.from_json(
+                self._snapshot_path(offsets[middle]).read_bytes()
+            )
+            if match_number in snapshot.results:
+                upper = middle
+            else:
+                state, lower = snapshot, middle + 1
+
+        for event in self.events(state.offset):
+            state.apply(event)
+            if event.type == RESULT and event.match_number == match_number:
+                return state
+
+        return None
+
+    def _latest_snapshot(self, until: float | None) -> JournalState:
+        for offset in reversed(self.snapshots()):
+            state = JournalState.from_json(self._snapshot_path(offset).read_bytes())
+            if until is None or state.timestamp <= until:
+                return state
+        return JournalState()
+
+    def _snapshot_path(self, offset: int) -> Path:
+        return self.snapshot_dir / f"{offset:012d}.json.gz"
+
+    def _write_snapshot(self, state: JournalState) -> None:
+        self.snapshot_dir.mkdir(exist_ok=True)
+        atomic_write(self._snapshot_path(state.offset), state.to_json())
+
+
+def main() -> None:
+    """Print the state replayed from a journal, optionally as of a time."""
+    parser = ArgumentParser(description="Replay a Euros journal.")
+    parser.add_argument("path", type=Path)
+    parser.add_argument("--until", type=float, default=None, help="unix timestamp.")
+    args = parser.parse_args()
+
+    state = Journal(args.path).replay(until=args.until)
+    print(json.dumps(asdict(state), indent=2))
+
+
+if __name__ == "__main__":
+    main()
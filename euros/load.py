@@ -1,14 +1,20 @@
 import json
 from argparse import ArgumentParser
 from datetime import datetime
+from functools import cached_property
 from pathlib import Path
+from typing import Literal
 
 import pandas as pd
 import pytz
 import yaml
-from pydantic import BaseModel, field_validator
+from pydantic import BaseModel, PrivateAttr, field_validator
 
 from euros.flags import FLAG_UNICODE
+from euros.journal import Journal
+from euros.registry import Registry
+from euros.snapshot import ChoicesSnapshot
+from euros.version import VersionCounter
 
 
 class Loader(BaseModel):
@@ -25,6 +31,38 @@ class Loader(BaseModel):
     user_group: str
     base_path: Path
     cutoff_time: datetime
+    # More groups to serve from the same process at /<group>/, "*" for all.
+    user_groups: list[str] = []
+
+    # Performance config
+    compression: bool = True
+    compression_min_size: int = 1024
+    compression_level: int = 6
+    # Seconds between checks for writes by any process, which rebuild the caches
+    # in the background. A check is an O(1) read. None rebuilds on read instead.
+    refresh_interval: float | None = 1.0
+    live_updates: bool = False
+    warmup: bool = False
+    preload: bool = False
+    group_idle_seconds: float = 3600.0
+
+    # Profiling config
+    profiling: bool = False
+    profile_dir: Path | None = None
+    profile_every: int = 0
+    memory_profiling: bool = False
+    memory_top_sites: int = 20
+
+    # Payload config, budgets in bytes by component id
+    payload_budgets: dict[str, int] = {}
+    payload_budget_action: Literal["warn", "error"] = "warn"
+
+    # Admin config
+    results_token: str | None = None
+    # Bearer token for /metrics, which is otherwise behind the basic auth.
+    metrics_token: str | None = None
+
+    _snapshot: tuple[tuple, ChoicesSnapshot] | None = PrivateAttr(default=None)
 
     @field_validator("base_path")
     def check_base_path(cls, base_path: Path) -> Path:
@@ -33,20 +71,59 @@ class Loader(BaseModel):
             raise ValueError(f"Path {base_path} does not exist.")
         return base_path
 
+    def for_group(self, user_group: str) -> "Loader":
+        """Return this config for another user group under the same base path."""
+        return Loader(**{**self.model_dump(), "user_group": user_group})
+
+    def served_groups(self) -> list[str]:
+        """Return user_group and user_groups, with "*" expanded to every group.
+
+        A group is a directory of the base path holding a users.json.
+        """
+        groups = {self.user_group, *self.user_groups}
+
+        if "*" in groups:
+            groups.remove("*")
+            groups.update(
+                path.parent.name for path in self.base_path.glob("*/users.json")
+            )
+
+        return sorted(groups)
+
     def show_users(self) -> bool:
         """Determines if all users tokens should be shown on the frontend."""
         return datetime.now(pytz.timezone("Europe/London")) > self.cutoff_time
 
     def load_fixtures(self) -> list[dict]:
-        """Load the fixtures from the csv file and add basic columns used elsewhere."""
+        """Load the fixtures from the csv file and add basic columns used elsewhere.
+
+        Results journaled since the csv was last written, e.g. if a crash lost
+        the write, are replayed on top of it.
+        """
         fixtures_path = self.base_path / "fixtures.csv"
 
         df = pd.read_csv(fixtures_path, keep_default_na=False)
 
-        df["Home Team Short"] = df["Home Team"].apply(self._get_short_team)
-        df["Away Team Short"] = df["Away Team"].apply(self._get_short_team)
-        df["Home Team Long"] = df["Home Team"].apply(self._get_long_team)
-        df["Away Team Long"] = df["Away Team"].apply(self._get_long_team)
+        written = fixtures_path.stat().st_mtime
+        journal = self.results_journal.replay()
+
+        for match_number, (result, home_team, away_team) in journal.results.items():
+            if journal.result_times[match_number] < written:
+                continue
+            rows = df["Match Number"] == match_number
+            df.loc[rows, "Result"] = result
+            if home_team:
+                df.loc[rows, "Home Team"] = home_team
+            if away_team:
+                df.loc[rows, "Away Team"] = away_team
+
+        teams = Registry.create(pd.concat([df["Home Team"], df["Away Team"]]), [])
+        home, away = teams.team_ids(df["Home Team"]), teams.team_ids(df["Away Team"])
+
+        df["Home Team Short"] = teams.short_labels[home]
+        df["Away Team Short"] = teams.short_labels[away]
+        df["Home Team Long"] = teams.long_labels[home]
+        df["Away Team Long"] = teams.long_labels[away]
 
         # Convert the date column to datetime format
         df["datestamp"] = df["Date"].apply(lambda x: x.split(" ")[0])
@@ -57,42 +134,48 @@ class Loader(BaseModel):
 
         return table
 
-    def _get_short_team(self, team: str) -> str:
-        if "Winner Match" in team:
-            return team.replace("Winner Match", "MW")
-        elif FLAG_UNICODE.get(team) is not None:
-            return team[:3] + " " + FLAG_UNICODE[team]
-        else:
-            return team
+    def create_user_choices(self) -> pd.DataFrame:
+        """Create the user choices dataframe.
 
-    def _get_long_team(self, team: str) -> str:
-        if (flag := FLAG_UNICODE.get(team)) is not None:
-            return team + " " + flag
-        else:
-            return team
+        The team and user columns are categoricals whose codes are the ids of a
+        Registry, and the tokens are int8. Once the choices have been frozen
+        they are read from the snapshot.
 
-    def create_user_choices(self) -> pd.DataFrame:
-        """Create the user choices dataframe."""
-        user_choices = []
+        A user's choices are replayed from the journal, unless their csv has
+        been written since they were journaled, e.g. by hand, so only those
+        csvs are read.
+        """
+        if (snapshot := self.load_snapshot()) is not None:
+            return snapshot.to_frame()
+
+        teams: list[str] = []
+        tokens: list[int] = []
+        users: list[str] = []
 
         user_choices_store = self.base_path / self.user_group / "choices"
+        journal = self.choices_journal.replay()
 
         for user in self.load_users().keys():
             path: Path = user_choices_store / f"{user}.csv"
 
-            if path.exists():
-                df = pd.read_csv(path)
+            try:
+                written = path.stat().st_mtime
+            except FileNotFoundError:
+                choices = dict.fromkeys(FLAG_UNICODE, 0)
             else:
-                df = pd.DataFrame(
-                    [{"team": k, "tokens": 0} for k, _ in FLAG_UNICODE.items()]
-                )
+                if user in journal.choices and journal.choice_times[user] >= written:
+                    choices = journal.choices[user]
+                else:
+                    df = pd.read_csv(path)
+                    choices = dict(zip(df["team"], df["tokens"]))
 
-            df["user"] = user.capitalize()
-            user_choices.append(df)
+            teams.extend(choices)
+            tokens.extend(choices.values())
+            users.extend([user.capitalize()] * len(choices))
 
-        user_choices_df = pd.concat(user_choices)
+        user_choices_df = pd.DataFrame({"team": teams, "tokens": tokens, "user": users})
 
-        return user_choices_df
+        return Registry.from_choices(user_choices_df).categorize(user_choices_df)
 
     def custom_orderings(self) -> dict[str, list[str]]:
         """Load the custom orderings from the csv files.
@@ -119,6 +202,54 @@ class Loader(BaseModel):
         """Return the path to the user's choices csv file."""
         return self.base_path / self.user_group / "choices" / f"{username}.csv"
 
+    def snapshot_path(self) -> Path:
+        """Return the path to the frozen choices snapshot of the user group."""
+        return self.base_path / self.user_group / "choices.npz"
+
+    def load_snapshot(self) -> ChoicesSnapshot | None:
+        """Load the frozen choices snapshot, or None if it has not been taken.
+
+        The snapshot is read and its checksum verified once per choices version
+        and file, not on every call.
+        """
+        path = self.snapshot_path()
+
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            return None
+
+        key = (path, self.choices_version.get(), stat.st_ino, stat.st_mtime_ns)
+
+        if self._snapshot is None or self._snapshot[0] != key:
+            self._snapshot = (key, ChoicesSnapshot.load(path))
+
+        return self._snapshot[1]
+
+    @cached_property
+    def fixtures_version(self) -> VersionCounter:
+        """Counter bumped whenever fixtures.csv is rewritten."""
+        return VersionCounter(self.base_path / ".fixtures.version")
+
+    @cached_property
+    def choices_version(self) -> VersionCounter:
+        """Counter bumped whenever a choices csv in the user group is rewritten."""
+        return VersionCounter(self.base_path / self.user_group / ".choices.version")
+
+    @cached_property
+    def results_journal(self) -> Journal:
+        """Journal of every result recorded through the app."""
+        return Journal(self.base_path / "results.journal")
+
+    @cached_property
+    def choices_journal(self) -> Journal:
+        """Journal of every choice submission in the user group."""
+        return Journal(self.base_path / self.user_group / "choices.journal")
+
+    def data_version(self) -> tuple[int, int]:
+        """Return the current (fixtures, choices) data version."""
+        return self.fixtures_version.get(), self.choices_version.get()
+
 
 def create_parser() -> ArgumentParser:
     """Parse cli for args."""
@@ -0,0 +1,367 @@
+"""Drive simulated users through the Dash callbacks and report latencies."""
+
+import base64
+import json
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from argparse import ArgumentParser
+from collections import defaultdict
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+import yaml
+
+from euros.choices import MAX_TEAM_TOKENS, TOTAL_TOKENS
+from euros.flags import team_label
+from euros.generate import generate
+from euros.load import Loader, create_loader
+
+CALLBACK_PATH = "/_dash-update-component"
+LAYOUT_PATH = "/_dash-layout"
+
+TABS = ["play-tab", "groups-tab", "knockout-tab", "fixtures-tab", "standings-tab"]
+AXES = [("Date", "cumulative_points"), ("Match Number", "rank"), ("Date", "rank")]
+
+# Sends a request and returns the status code and response body.
+Send = Callable[[str, dict | None, dict[str, str]], tuple[int, bytes]]
+
+
+@dataclass
+class Sample:
+    """One request made by a simulated user."""
+
+    name: str
+    seconds: float
+    status: int
+    size: int
+
+
+def flask_transport(filepath: str) -> Callable[[], Send]:
+    """Serve requests in process through the Flask test client of a new app."""
+    from euros.main import create_app
+
+    app, _ = create_app(filepath)
+
+    def connect() -> Send:
+        client = app.server.test_client()
+
+        def send(path: str, body: dict | None, headers: dict[str, str]):
+            if body is None:
+                response = client.get(path, headers=headers)
+            else:
+                response = client.post(path, json=body, headers=headers)
+            return response.status_code, response.get_data()
+
+        return send
+
+    return connect
+
+
+def http_transport(url: str) -> Callable[[], Send]:
+    """Send requests to a running server, e.g. a local gunicorn."""
+
+    def connect() -> Send:
+        def send(path: str, body: dict | None, headers: dict[str, str]):
+            request = urllib.request.Request(
+                url.rstrip("/") + path,
+                data=None if body is None else json.dumps(body).encode(),
+                headers={"Content-Type": "application/json", **headers},
+            )
+            try:
+                with urllib.request.urlopen(request) as response:
+                    return response.status, response.read()
+            except urllib.error.HTTPError as e:
+                return e.code, e.read()
+
+        return send
+
+    return connect
+
+
+def _callback(output: str, inputs: list[tuple], state: Sequence[tuple] = ()) -> dict:
+    def props(values: Sequence[tuple]) -> list[dict]:
+        return [{"id": i, "property": p, "value": v} for i, p, v in values]
+
+    if output.startswith(".."):
+        outputs: Any = [
+            {"id": o.rsplit(".", 1)[0], "property": o.rsplit(".", 1)[1]}
+            for o in output.strip(".").split("...")
+        ]
+    else:
+        component_id, prop = output.rsplit(".", 1)
+        outputs = {"id": component_id, "property": prop}
+
+    return {
+        "output": output,
+        "outputs": outputs,
+        "inputs": props(inputs),
+        "state": props(state),
+        "changedPropIds": [f"{inputs[0][0]}.{inputs[0][1]}"],
+    }
+
+
+def _stores(layout: Any, stores: dict[str, Any]) -> dict[str, Any]:
+    if isinstance(layout, dict):
+        props = layout.get("props", {})
+        if layout.get("type") == "Store" and "id" in props:
+            stores[props["id"]] = props.get("data")
+        for value in layout.values():
+            _stores(value, stores)
+    elif isinstance(layout, list):
+        for value in layout:
+            _stores(value, stores)
+    return stores
+
+
+def user_session(
+    send: Send, username: str, password: str, rng: random.Random
+) -> list[Sample]:
+    """Load the page, switch tabs, filter fixtures, toggle axes and submit choices."""
+    credentials = base64.b64encode(f"{username}:{password}".encode()).decode()
+    headers = {"Authorization": f"Basic {credentials}"}
+    samples = []
+
+    def request(name: str, path: str, body: dict | None = None) -> Any:
+        start = time.perf_counter()
+        status, data = send(path, body, headers)
+        samples.append(Sample(name, time.perf_counter() - start, status, len(data)))
+        return json.loads(data) if status == 200 and data else None
+
+    stores = _stores(request("page-load", LAYOUT_PATH), {})
+    fixtures = stores["fixtures-table"]
+    show_users = stores["show-users"]
+
+    request(
+        "username.data",
+        CALLBACK_PATH,
+        _callback("username.data", [("username-dummy-trigger", "data", None)]),
+    )
+
+    def render(tab: str, fixtures_filter: list[dict]) -> None:
+        request(
+            f"tabs-content.children[{tab}]",
+            CALLBACK_PATH,
+            _callback(
+                "tabs-content.children",
+                [
+                    ("tabs", "value", tab),
+                    ("username", "data", username),
+                    ("fixtures-filter-table", "data", fixtures_filter),
+                    ("fixtures-table", "data", fixtures),
+                    ("show-users", "data", show_users),
+                ],
+                [("user-choices", "data", stores["user-choices"])],
+            ),
+        )
+
+    for tab in ["play-tab"] + rng.sample(TABS, k=3):
+        render(tab, fixtures)
+
+    teams = sorted({row["Home Team"] for row in fixtures})
+    fixtures_filter = request(
+        "fixtures-filter-table.data",
+        CALLBACK_PATH,
+        _callback(
+            "fixtures-filter-table.data",
+            [
+                ("fixtures-filter-value", "value", [f"Team:{rng.choice(teams)}"]),
+                ("fixtures-table", "data", fixtures),
+            ],
+        ),
+    )
+    if fixtures_filter is not None:
+        render(
+            "fixtures-tab",
+            fixtures_filter["response"]["fixtures-filter-table"]["data"],
+        )
+
+    for x_axis, y_axis in rng.sample(AXES, k=2):
+        request(
+            "standings-graph.figure",
+            CALLBACK_PATH,
+            _callback(
+                "..standings-graph.figure...standings-graph-static.figure..",
+                [
+                    ("standings-x-axis", "value", x_axis),
+                    ("standings-y-axis", "value", y_axis),
+                    ("user-choices", "data", stores["user-choices"]),
+                ],
+            ),
+        )
+
+    choices = [
+        row for row in stores["user-choices"] if row["user"] == username.capitalize()
+    ]
+    # A new valid allocation, so that the submission is written.
+    tokens = [0] * len(choices)
+    for _ in range(TOTAL_TOKENS):
+        open_teams = [i for i, count in enumerate(tokens) if count < MAX_TEAM_TOKENS]
+        tokens[rng.choice(open_teams)] += 1
+    request(
+        "warning-text.children",
+        CALLBACK_PATH,
+        _callback(
+            "warning-text.children",
+            [("update-button", "n_clicks", 1)],
+            [
+                (
+                    "user-choices-table",
+                    "data",
+                    [
+                        {"team": team_label(row["team"]), "tokens": count}
+                        for row, count in zip(choices, tokens)
+                    ],
+                ),
+                ("username", "data", username),
+            ],
+        ),
+    )
+
+    return samples
+
+
+def run(
+    connect: Callable[[], Send],
+    users: dict[str, str],
+    concurrency: int,
+    sessions: int,
+    seed: int = 0,
+) -> tuple[list[Sample], float]:
+    """Run concurrency simulated users for sessions sessions each.
+
+    Returns every sample and the wall time taken.
+    """
+    samples: list[Sample] = []
+    lock = threading.Lock()
+    names = sorted(users)
+
+    def worker(i: int) -> None:
+        rng = random.Random(seed + i)
+        send = connect()
+        for _ in range(sessions):
+            username = rng.choice(names)
+            result = user_session(send, username, users[username], rng)
+            with lock:
+                samples.extend(result)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(concurrency)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return samples, time.perf_counter() - start
+
+
+def summarise(samples: list[Sample], seconds: float) -> list[dict]:
+    """Return the throughput and latency percentiles of each request type."""
+    by_name: dict[str, list[Sample]] = defaultdict(list)
+    for sample in samples:
+        by_name[sample.name].append(sample)
+    by_name["total"] = samples
+
+    rows = []
+    for name, group in by_name.items():
+        latencies = np.array([sample.seconds for sample in group]) * 1000
+        p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+        rows.append(
+            {
+                "name": name,
+                "requests": len(group),
+                "errors": sum(sample.status >= 400 for sample in group),
+                "per_second": len(group) / seconds,
+                "mean_ms": statistics.fmean(latencies),
+                "p50_ms": p50,
+                "p95_ms": p95,
+                "p99_ms": p99,
+                "mean_bytes": statistics.fmean(sample.size for sample in group),
+            }
+        )
+
+    return rows
+
+
+def main() -> None:
+    """Load test the app in process, or a running server with --url."""
+    parser = ArgumentParser(description="Load test the Euros app.")
+    parser.add_argument("--filepath", "-f", type=str, default=None, help="config.")
+    parser.add_argument(
+        "--generate-users",
+        type=int,
+        default=None,
+        help="run against a generated league of this many users instead.",
+    )
+    parser.add_argument("--url", type=str, default=None, help="e.g. localhost:8080.")
+    parser.add_argument("--concurrency", "-c", type=int, default=10)
+    parser.add_argument("--sessions", "-n", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", "-o", type=Path, default=None)
+    parser.add_argument(
+        "--cutoff",
+        type=datetime.fromisoformat,
+        default=datetime.now().astimezone() + timedelta(days=1),
+        help="cutoff time of the generated league, by default in a day.",
+    )
+    args = parser.parse_args()
+
+    if args.generate_users is not None:
+        tmpdir = Path(tempfile.mkdtemp())
+        generate(tmpdir / "league", n_users=args.generate_users, seed=args.seed)
+        args.filepath = str(tmpdir / "config.yaml")
+        with open(args.filepath, "w") as file:
+            yaml.safe_dump(
+                {
+                    "user_group": "generated",
+                    "base_path": str(tmpdir / "league"),
+                    "cutoff_time": args.cutoff.isoformat(),
+                },
+                file,
+            )
+
+    if args.filepath is None:
+        parser.error("one of --filepath or --generate-users is required.")
+
+    load: Loader = create_loader(Path(args.filepath))
+    connect = (
+        http_transport(args.url)
+        if args.url is not None
+        else flask_transport(args.filepath)
+    )
+
+    samples, seconds = run(
+        connect, load.load_users(), args.concurrency, args.sessions, args.seed
+    )
+    rows = summarise(samples, seconds)
+
+    print(
+        f"{'request':<40} {'n':>6} {'err':>4} {'req/s':>8} "
+        f"{'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}"
+    )
+    for row in rows:
+        print(
+            f"{row['name']:<40} {row['requests']:>6} {row['errors']:>4} "
+            f"{row['per_second']:>8.1f} {row['p50_ms']:>8.1f} "
+            f"{row['p95_ms']:>8.1f} {row['p99_ms']:>8.1f}"
+        )
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(rows, file, indent=2)
+
+    if any(row["errors"] for row in rows):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
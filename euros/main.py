@@ -1,27 +1,102 @@
+import atexit
 import copy
 import tempfile
+import threading
+from datetime import date
 from pathlib import Path
-from typing import Any
+from typing import TYPE_CHECKING, Any
 
 import dash_auth
 import dash_bootstrap_components as dbc
 import diskcache
+import numpy as np
 import pandas as pd
-import plotly.graph_objects as go
-from dash import Dash, DiskcacheManager, Input, Output, State, dcc, html
+from dash import (
+    ClientsideFunction,
+    Dash,
+    DiskcacheManager,
+    Input,
+    Output,
+    State,
+    ctx,
+    dcc,
+    html,
+    no_update,
+)
+from dash.exceptions import PreventUpdate
 from flask import Flask, request
-
-from euros.fixtures import create_fixtures_tab
-from euros.groups import create_groups_tab
-from euros.knockout import create_knockout_tab
+from werkzeug.serving import run_simple
+
+from euros.all_users import ORDER_CACHE_ENTRIES
+from euros.api import JsonApi
+from euros.cache import FIXTURES, DataCache
+from euros.choices import ChoicesFrozenError, ChoiceWriter, validate_tokens
+from euros.compression import Compressor
+from euros.events import add_live_updates, live_update_stores
+from euros.http_cache import HttpCache
 from euros.load import Loader, create_loader, create_parser
+from euros.metrics import Metrics
+from euros.multigroup import GroupApps
+from euros.payload import PayloadBudgets
 from euros.play import create_play_tab
-from euros.standings import create_figure, create_standings_tab, get_standings
+from euros.preload import freeze_heap, run_after_fork
+from euros.results import add_results_route
+from euros.rivals import HEAD_TO_HEAD_ENTRIES
+from euros.snapshot import freeze_choices, schedule_freeze
+
+if TYPE_CHECKING:
+    import plotly.graph_objects as go
+
+    from euros.standings import Leaderboard
+
+
+def create_app(
+    filepath: str,
+    user_group: str | None = None,
+    shared: DataCache | None = None,
+    url_prefix: str = "/",
+) -> Dash:
+    """Create the Dash app.
+
+    user_group replaces the group in the config, shared caches the fixtures for
+    every group's app (see DataCache) and url_prefix is the path the app is
+    served under, e.g. by GroupApps. The app's Flask server holds a function to
+    flush and stop its background work in extensions["euros.close"].
+    """
+    load: Loader = create_loader(Path(filepath))
+    if user_group is not None:
+        load = load.for_group(user_group)
+    metrics = Metrics(
+        enabled=load.profiling or load.memory_profiling,
+        profile_dir=load.profile_dir,
+        profile_every=load.profile_every,
+        memory=load.memory_profiling,
+        top_sites=load.memory_top_sites,
+    )
+    data = DataCache(load, measure=metrics.measure, shared=shared)
+    # Kept apart, so that paging through many sorts and filters of the all users
+    # table, or many head-to-heads, cannot evict the tabs from the main cache.
+    all_users_orders = DataCache(
+        load, max_entries=ORDER_CACHE_ENTRIES, measure=metrics.measure
+    )
+    head_to_heads = DataCache(
+        load, max_entries=HEAD_TO_HEAD_ENTRIES, measure=metrics.measure
+    )
 
+    def on_choices_written(path: Path, choices: pd.DataFrame) -> None:
+        load.choices_journal.append_choices(
+            path.stem, dict(zip(choices["team"], choices["tokens"]))
+        )
+        load.choices_version.bump()
 
-def create_app(filepath: str) -> Dash:
-    """Create the Dash app."""
-    load: Loader = create_loader(Path(filepath))
+    choice_writer = ChoiceWriter(
+        on_write=on_choices_written, snapshot_path=load.snapshot_path()
+    )
+    atexit.register(choice_writer.flush_all)
+    if load.preload and user_group is None and load.show_users():
+        # Past the cutoff, freeze before the caches shared with the workers are
+        # built, so they come from the snapshot. Otherwise the freeze timer does.
+        freeze_choices(load)
     tmpdir = Path(tempfile.mkdtemp())
     cache = diskcache.Cache(tmpdir)
     background_callback_manager = DiskcacheManager(cache)
@@ -32,6 +107,8 @@ def create_app(filepath: str) -> Dash:
         suppress_callback_exceptions=load.suppress_callback_exceptions,
         title="Euros 2024",
         assets_folder=Path(__file__).parent / "assets",
+        routes_pathname_prefix="/",
+        requests_pathname_prefix=url_prefix,
     )
 
     dash_auth.BasicAuth(
@@ -40,7 +117,22 @@ def create_app(filepath: str) -> Dash:
         secret_key="kIwjEmZ4fuv09Gwb+5R7IkI2Ftl8JVcA10ExyQ81",
     )
 
-    fixtures_df = pd.DataFrame(load.load_fixtures())
+    metrics.init_app(app, token=load.metrics_token)
+
+    if load.compression:
+        Compressor(
+            min_size=load.compression_min_size, level=load.compression_level
+        ).init_app(app)
+
+    HttpCache(data).init_app(app)
+    JsonApi(data).init_app(app)
+
+    if load.payload_budgets:
+        PayloadBudgets(
+            load.payload_budgets, action=load.payload_budget_action
+        ).init_app(app)
+
+    fixtures_df = data.fixtures_df()
 
     teams = [
         {
@@ -68,23 +160,27 @@ def create_app(filepath: str) -> Dash:
         placeholder="Filter fixtures by Team or Round",
     )
 
+    if load.live_updates:
+        add_live_updates(app, data)
+
     def create_layout() -> dbc.Container:
         return dbc.Container(
             [
+                *(live_update_stores(app, data) if load.live_updates else []),
                 dcc.Store(id="show-users", data=load.show_users()),
                 dcc.Store(id="username"),
                 dcc.Store(id="username-dummy-trigger"),
                 dcc.Store(
                     id="fixtures-filter-table",
-                    data=load.load_fixtures(),
+                    data=data.fixtures(),
                 ),
                 dcc.Store(
                     id="fixtures-table",
-                    data=load.load_fixtures(),
+                    data=data.fixtures(),
                 ),
                 dcc.Store(
                     id="user-choices",
-                    data=load.create_user_choices().to_dict("records"),
+                    data=data.user_choices_records(),
                 ),
                 html.H2("Euros"),
                 dcc.Tabs(
@@ -110,6 +206,161 @@ def create_app(filepath: str) -> Dash:
             fluid=True,
         )
 
+    def group_table(
+        group: str, fixtures: pd.DataFrame, custom_ordering: list[str] | None
+    ) -> pd.DataFrame:
+        # Keyed on the group's own fixtures, so a result only rebuilds its group.
+        group_fixtures = fixtures[fixtures["Group"] == f"Group {group}"]
+        key = (
+            "group-table",
+            group,
+            tuple(custom_ordering or ()),
+            tuple(map(tuple, group_fixtures.astype(str).to_numpy())),
+        )
+
+        from euros.groups import create_table
+
+        table: pd.DataFrame = data.shared.get(
+            key, lambda: create_table(group, fixtures, custom_ordering), depends=()
+        )
+        return table
+
+    def groups_tab() -> dbc.Col:
+        from euros.groups import create_groups_tab
+
+        return data.shared.get(
+            "groups-tab",
+            lambda: create_groups_tab(
+                fixtures=data.fixtures_df().copy(),
+                custom_orderings=data.custom_orderings(),
+                table_builder=group_table,
+            ),
+            depends=(FIXTURES,),
+        )
+
+    def knockout_tab() -> list:
+        from euros.knockout import create_knockout_tab
+
+        def build() -> list:
+            # Keyed on the knockout fixtures, so group results reuse the bracket.
+            fixtures = data.fixtures_df()
+            ko_fixtures = fixtures[~fixtures["Round Number"].isin(["1", "2", "3"])]
+            key = ("knockout-bracket", tuple(map(tuple, ko_fixtures.to_numpy())))
+
+            bracket: list = data.shared.get(
+                key, lambda: create_knockout_tab(fixtures=fixtures.copy()), depends=()
+            )
+            return bracket
+
+        knockout: list = data.shared.get("knockout-tab", build, depends=(FIXTURES,))
+        return knockout
+
+    def standings_tab() -> html.Div:
+        from euros.standings import create_standings_tab
+
+        return data.get(
+            "standings-tab",
+            lambda: create_standings_tab(data.standings(), data.checkpoints()),
+        )
+
+    def standings_figures(x_axis: str, y_axis: str) -> tuple["go.Figure", "go.Figure"]:
+        from euros.standings import create_figure
+
+        def build() -> tuple["go.Figure", "go.Figure"]:
+            standings: pd.DataFrame | None = data.standings()
+
+            standings_figure = create_figure(standings, x_axis, y_axis)
+
+            standings_figure_small = copy.deepcopy(standings_figure)
+            standings_figure_small.update_xaxes(autorange=True)
+
+            return standings_figure, standings_figure_small
+
+        figures: tuple["go.Figure", "go.Figure"] = data.get(
+            ("standings-figure", x_axis, y_axis), build
+        )
+
+        return figures
+
+    def fixtures_tab(fixtures_filtered: pd.DataFrame, show_users: bool) -> list:
+        from euros.fixtures import create_fixtures_tab
+
+        match_numbers = (
+            tuple(fixtures_filtered["Match Number"])
+            if not fixtures_filtered.empty
+            else ()
+        )
+
+        def build() -> list:
+            # The filtered rows can predate a result pushed since, so the tab is
+            # built from the cached fixtures with the same match numbers.
+            fixtures = data.fixtures_df()
+            tab: list = create_fixtures_tab(
+                fixtures[fixtures["Match Number"].isin(match_numbers)].copy(),
+                fixtures_filter_select,
+                user_choices=data.user_choices(),
+                show_users=show_users,
+            )
+            return tab
+
+        cached: list = data.get(("fixtures-tab", match_numbers, show_users), build)
+        return cached
+
+    def refresh() -> None:
+        """Rebuild everything derived from the data, so readers never pay for it.
+
+        Readers of a key being rebuilt wait for this build rather than starting
+        their own, and reads of every other key carry on.
+        """
+        data.fixtures()
+        data.fixtures_index()
+        data.user_choices_records()
+        groups_tab()
+        knockout_tab()
+        fixtures_tab(data.fixtures_df().copy(), load.show_users())
+        if load.show_users():
+            data.all_users()
+            data.rivals()
+        if data.standings() is not None:
+            standings_tab()
+            standings_figures("Date", "cumulative_points")
+            data.leaderboard()
+
+    add_results_route(app, load, on_result=refresh)
+
+    if load.warmup or load.preload:
+        # Build every cache before the worker takes traffic, so it starts hot.
+        with metrics.measure("warmup"):
+            refresh()
+
+    timers: list[threading.Timer] = []
+
+    def start_background() -> None:
+        timers.append(schedule_freeze(load, before_freeze=choice_writer.flush_all))
+        if load.refresh_interval is not None:
+            data.watch(refresh, load.refresh_interval)
+
+    def close() -> None:
+        choice_writer.flush_all()
+        atexit.unregister(choice_writer.flush_all)
+        for timer in timers:
+            timer.cancel()
+        data.close()
+        all_users_orders.close()
+        head_to_heads.close()
+        cache.close()
+
+    app.server.extensions["euros.close"] = close
+
+    # Group apps are created on demand, in a worker that has already forked.
+    if load.preload and user_group is None:
+        # Threads do not survive a fork, so each worker starts its own, and the
+        # caches built above are shared with the workers copy-on-write.
+        run_after_fork(start_background)
+        freeze_heap()
+    else:
+        start_background()
+
     @app.callback(
         Output("tabs-content", "children"),
         Input("tabs", "value"),
@@ -121,6 +372,7 @@ def create_app(filepath: str) -> Dash:
         prevent_initial_call=True,
         background_callback_manager=background_callback_manager,
     )
+    @metrics.timed("render_content", labels=lambda tab, *args: {"tab": tab})
     def render_content(
         tab: str,
         username: str,
@@ -131,38 +383,32 @@ def create_app(filepath: str) -> Dash:
     ) -> html.Div:
         fixtures: pd.DataFrame = pd.DataFrame(fixtures_table)
 
-        user_choices = pd.DataFrame(user_choices)
-
         if tab == "play-tab":
+            if ctx.triggered_id == "fixtures-table":
+                # Don't throw away unsaved edits when a result comes in.
+                raise PreventUpdate
+
+            registry = data.registry()
+
             return create_play_tab(
                 username,
                 load.user_group,
                 base_path=load.base_path,  # TODO
                 show_users=show_users,
                 cutoff=load.cutoff_time,
-                user_choices=user_choices,
+                user_choices=registry.categorize(pd.DataFrame(user_choices)),
                 fixtures=fixtures,
+                registry=registry,
+                all_users=data.all_users() if show_users else None,
             )
         elif tab == "groups-tab":
-            return create_groups_tab(
-                fixtures=fixtures, custom_orderings=load.custom_orderings()
-            )
+            return groups_tab()
         elif tab == "knockout-tab":
-            return create_knockout_tab(fixtures=fixtures)
+            return knockout_tab()
         elif tab == "fixtures-tab":
-            fixtures_filtered = pd.DataFrame(fixtures_filter_table)
-
-            return create_fixtures_tab(
-                fixtures_filtered,
-                fixtures_filter_select,
-                user_choices=user_choices,
-                show_users=show_users,
-            )
+            return fixtures_tab(pd.DataFrame(fixtures_filter_table), show_users)
         elif tab == "standings-tab":
-            return create_standings_tab(
-                user_choices=user_choices,
-                fixtures=fixtures,
-            )
+            return standings_tab()
 
     @app.callback(
         Output(component_id="username", component_property="data"),
@@ -177,15 +423,26 @@ def create_app(filepath: str) -> Dash:
             username: str | None = auth["username"]
             return username
 
+    app.clientside_callback(
+        ClientsideFunction(namespace="euros", function_name="validateTokens"),
+        Output("token-total", "children"),
+        Output("token-total", "style"),
+        Output("user-choices-table", "style_data_conditional"),
+        Output("update-button", "disabled"),
+        Input("user-choices-table", "data"),
+        State("token-rules", "data"),
+    )
+
     @app.callback(
         Output(
             component_id="warning-text",
             component_property="children",
         ),
         Input(component_id="update-button", component_property="n_clicks"),
-        State(component_id="user-choices", component_property="data"),
+        State(component_id="user-choices-table", component_property="data"),
         State(component_id="username", component_property="data"),
     )
+    @metrics.timed("update_user_choices")
     def update_user_choices(
         n_clicks: int, data: list[dict], username: str
     ) -> dbc.FormText:
@@ -194,58 +451,41 @@ def create_app(filepath: str) -> Dash:
 
         df = pd.DataFrame(data)
 
-        tokens = df["tokens"]
-
         font_size = "14px"
 
-        if (tokens.astype(int) != tokens).all():
+        if load.show_users():
             return dbc.FormText(
-                "Please enter integers only", color="red", style={"fontSize": font_size}
-            )
-
-        if not ((tokens >= 0) & (tokens <= 11)).all():
-            return dbc.FormText(
-                "Please enter values between 0 and 11",
+                "Selections closed at the cutoff time.",
                 color="red",
                 style={"fontSize": font_size},
             )
 
-        if tokens.sum() != 12:
-            return dbc.FormText(
-                "Token values must sum to 12",
-                color="red",
-                style={"fontSize": font_size},
-            )
+        if (message := validate_tokens(df["tokens"])) is not None:
+            return dbc.FormText(message, color="red", style={"fontSize": font_size})
 
         try:
             df["team"] = df["team"].apply(lambda x: " ".join(x.split(" ")[:-1]))
+            df["tokens"] = df["tokens"].astype(int)
 
             user_choices_filepath = load.choices_path(username)
 
-            df.to_csv(user_choices_filepath, index=False)
+            # Replies only once the choices are on disk, with a burst of clicks
+            # sharing one write.
+            choice_writer.submit(user_choices_filepath, df[["team", "tokens"]]).result()
 
             return dbc.FormText(
                 "Updated selection successfully.",
                 color="blue",
                 style={"fontSize": font_size},
             )
+        except ChoicesFrozenError as e:
+            return dbc.FormText(str(e), color="red", style={"fontSize": font_size})
         except Exception as e:
             print(e)
             return dbc.FormText(
                 "Something went wrong", color="red", style={"fontSize": font_size}
             )
 
-    # if config.debug:
-    #     PROF_DIR = "local/dash_profiler"
-    #     Path(PROF_DIR).mkdir(parents=True, exist_ok=True)
-    #     app.server.wsgi_app = ProfilerMiddleware(
-    #         app.server.wsgi_app,
-    #         sort_by=("cumtime", "tottime"),
-    #         restrictions=[50],
-    #         stream=None,
-    #         profile_dir=PROF_DIR,
-    #     )
-
     @app.callback(
         Output("standings-graph", "figure"),
         Output("standings-graph-static", "figure"),
@@ -254,29 +494,178 @@ def create_app(filepath: str) -> Dash:
         Input("user-choices", "data"),
         prevent_initial_call=True,
     )
+    @metrics.timed("update_standing_figure")
     def update_standing_figure(
         x_axis: str, y_axis: str, user_choices: list[dict]
-    ) -> tuple[go.Figure, go.Figure]:
-        standings: pd.DataFrame | None = get_standings(
-            pd.DataFrame(user_choices).copy(deep=True), fixtures=fixtures_df
+    ) -> tuple["go.Figure", "go.Figure"]:
+        return standings_figures(x_axis, y_axis)
+
+    def leaderboard_as_of(
+        match_number: int | None, as_of_date: str | None
+    ) -> "Leaderboard | None":
+        if as_of_date is not None:
+            return data.leaderboard_on(date.fromisoformat(as_of_date))
+        return data.leaderboard(data.played_match(match_number))
+
+    @app.callback(
+        Output("standings-as-of", "value"),
+        Output("standings-as-of-date", "date"),
+        Input("standings-as-of", "value"),
+        Input("standings-as-of-date", "date"),
+        prevent_initial_call=True,
+    )
+    def pick_standings_as_of(
+        match_number: int | None, as_of_date: str | None
+    ) -> tuple[Any, Any]:
+        # Picking a match clears the date and picking a date clears the match.
+        if ctx.triggered_id == "standings-as-of-date":
+            return (no_update if as_of_date is None else None), no_update
+        return no_update, (no_update if match_number is None else None)
+
+    @app.callback(
+        Output("current-standings", "data"),
+        Output("current-standings", "page_current"),
+        Input("standings-as-of", "value"),
+        Input("standings-as-of-date", "date"),
+        Input("current-standings", "page_current"),
+        State("username", "data"),
+    )
+    @metrics.timed("update_current_standings")
+    def update_current_standings(
+        match_number: int | None,
+        as_of_date: str | None,
+        page_current: int | None,
+        username: str | None,
+    ) -> tuple[list[dict], Any]:
+        leaderboard = leaderboard_as_of(match_number, as_of_date)
+
+        if leaderboard is None:
+            raise PreventUpdate
+
+        # Pages are slices of the cached ranking. Anything else, including the
+        # first paint, shows the top of the table and the user's neighbourhood,
+        # back on the first page.
+        if ctx.triggered_id == "current-standings":
+            return leaderboard.page(page_current or 0), no_update
+
+        return leaderboard.first_paint(username), 0
+
+    @app.callback(
+        Output("current-standings", "page_current", allow_duplicate=True),
+        Input("standings-jump", "n_clicks"),
+        State("standings-as-of", "value"),
+        State("standings-as-of-date", "date"),
+        State("username", "data"),
+        prevent_initial_call=True,
+    )
+    @metrics.timed("jump_to_user")
+    def jump_to_user(
+        n_clicks: int,
+        match_number: int | None,
+        as_of_date: str | None,
+        username: str | None,
+    ) -> int:
+        from euros.standings import LEADERBOARD_PAGE_SIZE
+
+        leaderboard = leaderboard_as_of(match_number, as_of_date)
+
+        if leaderboard is None or (position := leaderboard.position(username)) is None:
+            raise PreventUpdate
+
+        return position // LEADERBOARD_PAGE_SIZE
+
+    @app.callback(
+        Output("rival-select", "options"),
+        Output("rival-select", "value"),
+        Input("username", "data"),
+    )
+    @metrics.timed("update_rivals")
+    def update_rivals(username: str | None) -> tuple[list[dict], str | None]:
+        from euros.rivals import rival_options
+
+        # Rivals give away other users' choices, so wait for the cutoff.
+        if not load.show_users():
+            raise PreventUpdate
+
+        registry = data.registry()
+        (user,) = registry.user_ids(pd.Series([str(username).capitalize()]))
+
+        if user < 0:
+            raise PreventUpdate
+
+        # Built in the background the first time, and left empty until then.
+        if (rivals := data.rivals(wait=False)) is None:
+            raise PreventUpdate
+
+        indices, similarities = rivals
+        options = rival_options(registry.users[indices[user]], similarities[user])
+
+        return options, options[0]["value"] if options else None
+
+    @app.callback(
+        Output("head-to-head", "data"),
+        Input("rival-select", "value"),
+        State("username", "data"),
+        prevent_initial_call=True,
+    )
+    @metrics.timed("update_head_to_head")
+    def update_head_to_head(rival: str | None, username: str | None) -> list[dict]:
+        from euros.rivals import head_to_head
+
+        standings: pd.DataFrame | None = data.standings()
+
+        if rival is None or standings is None or not load.show_users():
+            raise PreventUpdate
+
+        user = str(username).capitalize()
+        records: list[dict] = head_to_heads.get(
+            ("head-to-head", user, rival),
+            lambda: head_to_head(standings, user, rival)
+            .astype({"Date": str})
+            .to_dict("records"),
         )
 
-        standings_figure = create_figure(standings, x_axis, y_axis)
+        return records
 
-        standings_figure_small = copy.deepcopy(standings_figure)
-        standings_figure_small.update_xaxes(autorange=True)
+    @app.callback(
+        Output("all-users", "data"),
+        Output("all-users", "page_count"),
+        Input("all-users", "page_current"),
+        Input("all-users", "page_size"),
+        Input("all-users", "sort_by"),
+        Input("all-users", "filter_query"),
+        prevent_initial_call=True,
+    )
+    @metrics.timed("update_all_users")
+    def update_all_users(
+        page_current: int | None,
+        page_size: int,
+        sort_by: list[dict] | None,
+        filter_query: str | None,
+    ) -> tuple[list[dict], int]:
+        from euros.all_users import all_users_order, all_users_page
+
+        all_users = data.all_users()
+        sort_key = tuple((s["column_id"], s["direction"]) for s in sort_by or [])
+
+        # The order of every user is cached, so turning a page is a slice.
+        rows: np.ndarray = all_users_orders.get(
+            ("all-users-order", sort_key, filter_query or ""),
+            lambda: all_users_order(all_users, sort_by, filter_query),
+        )
 
-        return standings_figure, standings_figure_small
+        return all_users_page(all_users, rows, page_current or 0, page_size)
 
     @app.callback(
         Output("fixtures-filter-table", "data"),
         Input("fixtures-filter-value", "value"),
         State("fixtures-table", "data"),
     )
+    @metrics.timed("update_fixture_filter_table")
     def update_fixture_filter_table(
         values: list[str] | None, fixtures_table: list[dict]
     ) -> list[dict]:
-        fixtures: pd.DataFrame = fixtures_df
+        fixtures: pd.DataFrame = data.fixtures_df()
 
         if values is None or len(values) == 0:
             filtered_fixtures = fixtures
@@ -320,8 +709,16 @@ def create_app(filepath: str) -> Dash:
     return app, load
 
 
-def server(filepath) -> Flask:
-    """Function for running the app on a server with gunicorn."""
+def server(filepath) -> Flask | GroupApps:
+    """Function for running the app on a server with gunicorn.
+
+    With user_groups in the config, every group is served from this process.
+    """
+    if create_loader(Path(filepath)).user_groups:
+        apps = GroupApps(filepath).start()
+        atexit.register(apps.close)
+        return apps
+
     app: Dash
     config: Loader
     app, config = create_app(filepath)
@@ -334,6 +731,17 @@ def main() -> None:
     args = create_parser().parse_args()
     app: Dash
     config: Loader
+
+    if (config := create_loader(Path(args.filepath))).user_groups:
+        run_simple(
+            config.host,
+            config.port,
+            GroupApps(args.filepath).start(),
+            threaded=True,
+            use_debugger=config.debug,
+        )
+        return
+
     app, config = create_app(args.filepath)
     app.run(host=config.host, port=config.port, debug=config.debug)
 
@@ -0,0 +1,372 @@
+"""Callback timings, memory, byte counts and sampled profiles, for Prometheus."""
+
+import cProfile
+import functools
+import hmac
+import itertools
+import os
+import resource
+import threading
+import time
+import tracemalloc
+from collections import defaultdict
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+from dash import Dash
+from dash_auth import add_public_routes
+from flask import Response, abort, g, jsonify, request
+
+from euros.preload import private_bytes
+
+METRICS_ROUTE = "/metrics"
+MEMORY_ROUTE = "/metrics/memory"
+
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+class _Timing:
+    """Running totals for one callback (and label set)."""
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.buckets = [0] * len(BUCKETS)
+        self.peak_max = 0
+        self.peak_sum = 0
+
+    def add(self, wall: float, cpu: float, peak: int | None = None) -> None:
+        self.count += 1
+        self.wall += wall
+        self.cpu += cpu
+        for i, bound in enumerate(BUCKETS):
+            if wall <= bound:
+                self.buckets[i] += 1
+        if peak is not None:
+            self.peak_max = max(self.peak_max, peak)
+            self.peak_sum += peak
+
+
+class _Allocation:
+    """Allocations traced during one measured call."""
+
+    def __init__(self, start: int) -> None:
+        self.start = start
+        self.peak = start
+
+
+def rss_bytes() -> int:
+    """Return the resident set size of this process.
+
+    Falls back to the peak resident size where /proc is not available.
+    """
+    try:
+        with open("/proc/self/statm") as file:
+            return int(file.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+class Metrics:
+    """Collect per-callback wall and CPU time and per-route byte counts.
+
+    When disabled every hook is a no-op. With profile_every set, one in every
+    profile_every measured calls is run under cProfile and the profile is
+    dumped to profile_dir, ready for snakeviz.
+
+    With memory set, tracemalloc records the peak bytes allocated during each
+    measured call, and the top allocation sites are served as json. tracemalloc
+    traces every thread, so peaks of concurrent calls include each other's
+    allocations; it also slows allocation down, so only turn it on to
+    investigate.
+    """
+
+    def __init__(
+        self,
+        enabled: bool = False,
+        profile_dir: Path | None = None,
+        profile_every: int = 0,
+        memory: bool = False,
+        top_sites: int = 20,
+    ) -> None:
+        """Collect metrics if enabled, profiling every profile_every-th call."""
+        self.enabled = enabled
+        self.profile_dir = profile_dir
+        self.profile_every = profile_every
+        self.memory = enabled and memory
+        self.top_sites = top_sites
+        self._allocations: list[_Allocation] = []
+        self._memory_lock = threading.Lock()
+        self._calls = itertools.count(1)
+        self._timings: dict[tuple[str, Labels], _Timing] = defaultdict(_Timing)
+        self._bytes: dict[tuple[str, str], int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+        if profile_dir is not None and profile_every:
+            profile_dir.mkdir(parents=True, exist_ok=True)
+
+        if self.memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def measure(self, callback: str, **labels: str) -> Iterator[None]:
+        """Time the body of the with block as a call of callback."""
+        if not self.enabled:
+            yield
+            return
+
+        profile = None
+        if self.profile_every and next(self._calls) % self.profile_every == 0:
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another thread is already being profiled.
+                profile = None
+
+        allocation = self._start_allocation() if self.memory else None
+
+        wall, cpu = time.perf_counter(), time.thread_time()
+        try:
+            yield
+        finally:
+            wall, cpu = time.perf_counter() - wall, time.thread_time() - cpu
+
+            if profile is not None:
+                profile.disable()
+                self._dump(profile, callback, labels)
+
+            peak = self._end_allocation(allocation) if allocation else None
+
+            key = (callback, tuple(sorted(labels.items())))
+            with self._lock:
+                self._timings[key].add(wall, cpu, peak)
+
+    def _start_allocation(self) -> _Allocation:
+        # Resetting the peak would hide it from the calls already being measured,
+        # e.g. the callback around a tab build, so hand it to them first.
+        with self._memory_lock:
+            peak = tracemalloc.get_traced_memory()[1]
+            for allocation in self._allocations:
+                allocation.peak = max(allocation.peak, peak)
+            tracemalloc.reset_peak()
+
+            allocation = _Allocation(tracemalloc.get_traced_memory()[0])
+            self._allocations.append(allocation)
+
+        return allocation
+
+    def _end_allocation(self, allocation: _Allocation) -> int:
+        with self._memory_lock:
+            allocation.peak = max(allocation.peak, tracemalloc.get_traced_memory()[1])
+            self._allocations.remove(allocation)
+
+        return allocation.peak - allocation.start
+
+    def timed(
+        self, callback: str, labels: Callable[..., dict[str, str]] | None = None
+    ) -> Callable:
+        """Decorate a callback so each call is measured.
+
+        labels maps the callback's arguments to extra labels, e.g. the tab.
+        """
+
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                extra = labels(*args, **kwargs) if labels is not None else {}
+                with self.measure(callback, **extra):
+                    return func(*args, **kwargs)
+
+            return wrapper
+
+        return decorator
+
+    def init_app(self, app: Dash, token: str | None = None) -> None:
+        """Count request and response bytes and serve the metrics endpoint.
+
+        Register this before other after_request hooks so that it sees the
+        final, compressed response. The endpoints sit behind the app's basic
+        auth, unless token is given, in which case they need it as a bearer
+        token instead, e.g. for a Prometheus scraper.
+        """
+        if not self.enabled:
+            return
+
+        callback_path = f"{app.config.routes_pathname_prefix}_dash-update-component"
+
+        @app.server.before_request
+        def route_label() -> None:
+            if request.path == callback_path:
+                body = request.get_json(silent=True) or {}
+                g.metrics_route = str(body.get("output", request.path))
+            else:
+                g.metrics_route = request.url_rule.rule if request.url_rule else "404"
+
+        @app.server.after_request
+        def count_bytes(response: Response) -> Response:
+            route = g.get("metrics_route", request.path)
+            with self._lock:
+                self._bytes[(route, "requests")] += 1
+                self._bytes[(route, "request_bytes")] += request.content_length or 0
+                self._bytes[(route, "response_bytes")] += response.content_length or 0
+            return response
+
+        if token is not None:
+            add_public_routes(app, [METRICS_ROUTE, MEMORY_ROUTE])
+
+        def check_token() -> None:
+            bearer = request.headers.get("Authorization", "").removeprefix("Bearer ")
+            if token is not None and not hmac.compare_digest(bearer, token):
+                abort(403)
+
+        @app.server.route(METRICS_ROUTE)
+        def metrics() -> Response:
+            check_token()
+            return Response(self.export(), mimetype="text/plain; version=0.0.4")
+
+        @app.server.route(MEMORY_ROUTE)
+        def memory() -> Response:
+            check_token()
+            return jsonify(self.memory_report())
+
+    def memory_report(self) -> dict:
+        """Return this worker's RSS, peak allocations and top allocation sites."""
+        with self._lock:
+            peaks = {
+                _labels(callback=callback, **dict(labels)): timing.peak_max
+                for (callback, labels), timing in sorted(self._timings.items())
+            }
+
+        report: dict = {
+            "pid": os.getpid(),
+            "rss_bytes": rss_bytes(),
+            "private_bytes": private_bytes(),
+        }
+
+        if self.memory:
+            current, _ = tracemalloc.get_traced_memory()
+            statistics = tracemalloc.take_snapshot().statistics("lineno")
+            report |= {
+                "traced_bytes": current,
+                "peak_bytes": peaks,
+                "top_sites": [
+                    {
+                        "site": str(stat.traceback),
+                        "bytes": stat.size,
+                        "count": stat.count,
+                    }
+                    for stat in statistics[: self.top_sites]
+                ],
+            }
+
+        return report
+
+    def export(self) -> str:
+        """Return the metrics in the Prometheus text exposition format."""
+        with self._lock:
+            timings = {key: _copy(timing) for key, timing in self._timings.items()}
+            counts = dict(self._bytes)
+
+        lines = [
+            "# HELP euros_callback_wall_seconds Wall time spent in callbacks.",
+            "# TYPE euros_callback_wall_seconds histogram",
+        ]
+        for (callback, labels), timing in sorted(timings.items()):
+            base = _labels(callback=callback, **dict(labels))
+            for bound, count in zip(BUCKETS, timing.buckets):
+                bucket = _labels(callback=callback, **dict(labels), le=str(bound))
+                lines.append(f"euros_callback_wall_seconds_bucket{bucket} {count}")
+            inf = _labels(callback=callback, **dict(labels), le="+Inf")
+            lines += [
+                f"euros_callback_wall_seconds_bucket{inf} {timing.count}",
+                f"euros_callback_wall_seconds_sum{base} {timing.wall}",
+                f"euros_callback_wall_seconds_count{base} {timing.count}",
+            ]
+
+        lines += [
+            "# HELP euros_callback_cpu_seconds_total CPU time spent in callbacks.",
+            "# TYPE euros_callback_cpu_seconds_total counter",
+        ]
+        for (callback, labels), timing in sorted(timings.items()):
+            base = _labels(callback=callback, **dict(labels))
+            lines.append(f"euros_callback_cpu_seconds_total{base} {timing.cpu}")
+
+        if self.memory:
+            lines += [
+                "# HELP euros_callback_memory_peak_bytes Largest peak allocation.",
+                "# TYPE euros_callback_memory_peak_bytes gauge",
+            ]
+            for (callback, labels), timing in sorted(timings.items()):
+                base = _labels(callback=callback, **dict(labels))
+                lines.append(
+                    f"euros_callback_memory_peak_bytes{base} {timing.peak_max}"
+                )
+
+            lines += [
+                "# HELP euros_callback_memory_peak_bytes_total Summed peaks.",
+                "# TYPE euros_callback_memory_peak_bytes_total counter",
+            ]
+            for (callback, labels), timing in sorted(timings.items()):
+                base = _labels(callback=callback, **dict(labels))
+                lines.append(
+                    f"euros_callback_memory_peak_bytes_total{base} {timing.peak_sum}"
+                )
+
+        pid = _labels(pid=str(os.getpid()))
+        lines += [
+            "# HELP euros_process_resident_memory_bytes Resident set size.",
+            "# TYPE euros_process_resident_memory_bytes gauge",
+            f"euros_process_resident_memory_bytes{pid} {rss_bytes()}",
+        ]
+        if (private := private_bytes()) is not None:
+            lines += [
+                "# HELP euros_process_private_memory_bytes Memory not shared.",
+                "# TYPE euros_process_private_memory_bytes gauge",
+                f"euros_process_private_memory_bytes{pid} {private}",
+            ]
+
+        for name, help_text in [
+            ("requests", "Requests served."),
+            ("request_bytes", "Request body bytes received."),
+            ("response_bytes", "Response body bytes sent."),
+        ]:
+            lines += [
+                f"# HELP euros_http_{name}_total {help_text}",
+                f"# TYPE euros_http_{name}_total counter",
+            ]
+            for (route, counter), value in sorted(counts.items()):
+                if counter == name:
+                    lines.append(
+                        f"euros_http_{name}_total{_labels(route=route)} {value}"
+                    )
+
+        return "\n".join(lines) + "\n"
+
+    def _dump(self, profile: cProfile.Profile, callback: str, labels: dict) -> None:
+        if self.profile_dir is None:
+            return
+        name = "-".join([callback, *labels.values(), str(time.time_ns())])
+        profile.dump_stats(self.profile_dir / f"{name}.prof")
+
+
+def _copy(timing: _Timing) -> _Timing:
+    copied = _Timing()
+    copied.count, copied.wall, copied.cpu = timing.count, timing.wall, timing.cpu
+    copied.buckets = list(timing.buckets)
+    copied.peak_max, copied.peak_sum = timing.peak_max, timing.peak_sum
+    return copied
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    pairs = (f'{key}="{_escape(value)}"' for key, value in labels.items())
+    return "{" + ",".join(pairs) + "}"
@@ -0,0 +1,233 @@
+"""Serve many user groups from one process, sharing the fixtures between them."""
+
+import hmac
+import threading
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable, Iterable
+from html import escape
+from pathlib import Path
+from typing import Any
+
+from flask import Flask
+from werkzeug.exceptions import NotFound
+from werkzeug.utils import redirect
+from werkzeug.wrappers import Request, Response
+from werkzeug.wsgi import ClosingIterator
+
+from euros.cache import DataCache
+from euros.global_standings import BOARD_REFRESH_SECONDS, GlobalBoard
+from euros.load import Loader, create_loader
+
+
+class GroupApps:
+    """WSGI app serving the Dash app of each user group at /<group>/.
+
+    A group's app, with its own users, choices and caches, is created on the
+    first request for it and closed once it has been idle for
+    group_idle_seconds. An app is never idle while it is serving a request,
+    however long, e.g. a live updates stream. The fixtures and everything built
+    only from them are cached once, in shared, for every group.
+
+    The index at / links every group, above the global standings of all of
+    them. It needs the login of a user in any group, and the standings are
+    rebuilt in the background, never by a request.
+    """
+
+    def __init__(self, filepath: str) -> None:
+        """Serve every group of the config at filepath, starting none of them."""
+        self.filepath = filepath
+        self.load: Loader = create_loader(Path(filepath))
+        self.groups = self.load.served_groups()
+        self.shared = DataCache(self.load)
+        self.board = GlobalBoard(self.load, self.groups)
+        self._apps: dict[str, Flask] = {}
+        self._last_used: dict[str, float] = {}
+        self._in_use: Counter[str] = Counter()
+        self._users: dict[str, dict[str, str]] = {}
+        self._creating: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def running(self) -> list[str]:
+        """Return the groups whose apps are running."""
+        with self._lock:
+            return sorted(self._apps)
+
+    def app(self, group: str) -> Flask:
+        """Return the group's app, creating it if it is not running."""
+        with self._lock:
+            self._last_used[group] = time.monotonic()
+            app = self._apps.get(group)
+            creating = self._creating[group]
+
+        if app is not None:
+            return app
+
+        # Only the group being created waits, not requests for other groups.
+        with creating:
+            with self._lock:
+                if (app := self._apps.get(group)) is not None:
+                    return app
+
+            from euros.main import create_app
+
+            dash_app, _ = create_app(
+                self.filepath,
+                user_group=group,
+                shared=self.shared,
+                url_prefix=f"/{group}/",
+            )
+
+            server: Flask = dash_app.server
+            with self._lock:
+                self._apps[group] = server
+                self._last_used[group] = time.monotonic()
+
+        return server
+
+    def evict_idle(self, now: float | None = None) -> list[str]:
+        """Close the apps of groups idle for longer than group_idle_seconds."""
+        now = time.monotonic() if now is None else now
+
+        with self._lock:
+            idle = [
+                group
+                for group in self._apps
+                if not self._in_use[group]
+                and now - self._last_used[group] > self.load.group_idle_seconds
+            ]
+            apps = [self._apps.pop(group) for group in idle]
+
+        for app in apps:
+            app.extensions["euros.close"]()
+
+        return idle
+
+    def start(self) -> "GroupApps":
+        """Evict idle groups and build the global standings in the background.
+
+        Returns self.
+        """
+        interval = min(self.load.group_idle_seconds / 2, 60.0)
+
+        def run() -> None:
+            while not self._closed.wait(interval):
+                self.evict_idle()
+
+        threading.Thread(target=run, name="euros-group-evict", daemon=True).start()
+
+        self.board.watch(
+            self.shared.fixtures_df,
+            (
+                BOARD_REFRESH_SECONDS
+                if self.load.refresh_interval is None
+                else self.load.refresh_interval
+            ),
+        )
+
+        return self
+
+    def close(self) -> None:
+        """Stop the background threads and close every group's app."""
+        self._closed.set()
+
+        with self._lock:
+            apps = list(self._apps.values())
+            self._apps.clear()
+
+        for app in apps:
+            app.extensions["euros.close"]()
+
+        self.board.close()
+        self.shared.close()
+
+    def _group_users(self, group: str) -> dict[str, str]:
+        # Read once per group, as each group's app reads its users.json once.
+        with self._lock:
+            users = self._users.get(group)
+
+        if users is None:
+            users = self.load.for_group(group).load_users()
+            with self._lock:
+                self._users[group] = users
+
+        return users
+
+    def _authorized(self, request: Request) -> bool:
+        auth = request.authorization
+        if auth is None or auth.username is None:
+            return False
+
+        for group in self.groups:
+            password = self._group_users(group).get(auth.username)
+            if password is not None and hmac.compare_digest(
+                password, auth.password or ""
+            ):
+                return True
+
+        return False
+
+    def _index(self, request: Request) -> Response:
+        if not self._authorized(request):
+            return Response(
+                "Log in as a user of any group.",
+                401,
+                {"WWW-Authenticate": 'Basic realm="Euros"'},
+            )
+
+        links = "".join(
+            f'<li><a href="{escape(group)}/">{escape(group)}</a></li>'
+            for group in self.groups
+        )
+
+        if (standings := self.board.latest()) is None:
+            return Response(
+                f"<ul>{links}</ul><p>The global standings are being built.</p>",
+                mimetype="text/html",
+            )
+
+        return Response(
+            f"<ul>{links}</ul>"
+            f"<h2>Groups</h2>{standings.summary.to_html(index=False)}"
+            f"<h2>Global standings</h2>{standings.top.to_html(index=False)}",
+            mimetype="text/html",
+        )
+
+    def __call__(
+        self, environ: dict[str, Any], start_response: Callable
+    ) -> Iterable[bytes]:
+        """Route a WSGI request to the index or to its group's app."""
+        path = environ.get("PATH_INFO", "")
+        group, slash, rest = path.lstrip("/").partition("/")
+
+        if not group:
+            return self._index(Request(environ))(environ, start_response)
+        if group not in self.groups:
+            return NotFound()(environ, start_response)
+        if not slash:
+            return redirect(f"{group}/")(environ, start_response)
+
+        environ = {
+            **environ,
+            "SCRIPT_NAME": environ.get("SCRIPT_NAME", "") + f"/{group}",
+            "PATH_INFO": f"/{rest}",
+        }
+
+        # Marked in use before the app is looked up, so it cannot be evicted
+        # until the response has been sent.
+        with self._lock:
+            self._in_use[group] += 1
+
+        try:
+            response = self.app(group)(environ, start_response)
+        except BaseException:
+            self._release(group)
+            raise
+
+        return ClosingIterator(response, lambda: self._release(group))
+
+    def _release(self, group: str) -> None:
+        with self._lock:
+            self._in_use[group] -= 1
+            self._last_used[group] = time.monotonic()
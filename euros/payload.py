@@ -0,0 +1,130 @@
+"""Serialized payload sizes by component id, checked against budgets."""
+
+import json
+import warnings
+from typing import Any, Literal
+
+from dash import Dash
+from flask import Response, request
+from plotly.io.json import to_json_plotly
+
+
+class PayloadBudgetExceeded(Exception):
+    """A payload is larger than its budget."""
+
+
+class PayloadBudgetWarning(UserWarning):
+    """A payload is larger than its budget."""
+
+
+def _key(component_id: Any) -> str:
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(",", ":"))
+    return str(component_id)
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, separators=(",", ":")).encode())
+
+
+def _walk(value: Any, sizes: dict[str, int]) -> None:
+    if isinstance(value, dict):
+        props = value.get("props")
+        if isinstance(props, dict) and "type" in value and "id" in props:
+            sizes[_key(props["id"])] = _size(value)
+        for item in value.values():
+            _walk(item, sizes)
+    elif isinstance(value, list):
+        for item in value:
+            _walk(item, sizes)
+
+
+def component_sizes(tree: Any) -> dict[str, int]:
+    """Return the serialized size in bytes of every component with an id.
+
+    The size of a component includes its children, so nested sizes overlap.
+    tree is a component, a list of them or their already decoded json.
+    """
+    if not isinstance(tree, (dict, list)):
+        tree = json.loads(to_json_plotly(tree))
+
+    sizes: dict[str, int] = {}
+    _walk(tree, sizes)
+    return sizes
+
+
+def response_sizes(body: bytes) -> dict[str, int]:
+    """Return the sizes of a callback response by output and nested component id."""
+    outputs = json.loads(body).get("response", {})
+
+    sizes: dict[str, int] = {}
+    for component_id, props in outputs.items():
+        _walk(props, sizes)
+        sizes[component_id] = _size(props)
+
+    return sizes
+
+
+class PayloadBudgets:
+    """Check the layout and callback responses against per-component budgets.
+
+    budgets maps a component id to its largest allowed size in bytes. A payload
+    over budget raises a warning, or PayloadBudgetExceeded with action "error",
+    which is what the tests use to catch regressions. The largest size seen for
+    every component id is kept in largest.
+    """
+
+    def __init__(
+        self,
+        budgets: dict[str, int],
+        action: Literal["warn", "error"] = "warn",
+    ) -> None:
+        """Check payloads against budgets, taking action when one is exceeded."""
+        self.budgets = budgets
+        self.action = action
+        self.largest: dict[str, int] = {}
+
+    def check(self, sizes: dict[str, int], source: str) -> dict[str, int]:
+        """Record sizes and return those over budget, warning or raising."""
+        for component_id, size in sizes.items():
+            self.largest[component_id] = max(size, self.largest.get(component_id, 0))
+
+        over = {
+            component_id: size
+            for component_id, size in sizes.items()
+            if size > self.budgets.get(component_id, size)
+        }
+
+        if over:
+            message = f"Payload over budget in {source}: " + ", ".join(
+                f"{component_id} is {size} bytes (budget {self.budgets[component_id]})"
+                for component_id, size in sorted(over.items())
+            )
+            if self.action == "error":
+                raise PayloadBudgetExceeded(message)
+            warnings.warn(message, PayloadBudgetWarning, stacklevel=2)
+
+        return over
+
+    def init_app(self, app: Dash) -> None:
+        """Measure every layout and callback response served by the app.
+
+        Register this after the compression hook, as Flask runs after_request
+        hooks in reverse order, so that it sees the uncompressed json.
+        """
+        prefix = app.config.routes_pathname_prefix
+        layout_path = f"{prefix}_dash-layout"
+        callback_path = f"{prefix}_dash-update-component"
+
+        @app.server.after_request
+        def measure_payload(response: Response) -> Response:
+            if response.status_code != 200 or response.content_encoding:
+                return response
+
+            if request.path == layout_path:
+                self.check(component_sizes(response.get_json()), "layout")
+            elif request.path == callback_path:
+                output = (request.get_json(silent=True) or {}).get("output", "")
+                self.check(response_sizes(response.get_data()), output)
+
+            return response
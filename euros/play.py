@@ -1,4 +1,5 @@
 """Play Tab Frontend."""
+
 from datetime import datetime
 from pathlib import Path
 
@@ -6,11 +7,15 @@ import dash_bootstrap_components as dbc
 import pandas as pd
 from dash import dash_table, dcc, html
 
-from euros.all_users import create_all_users
+from euros.all_users import all_users_frame, create_all_users
+from euros.choices import MAX_TEAM_TOKENS, TOTAL_TOKENS
 from euros.flags import FLAG_UNICODE
+from euros.registry import Registry
 
 
-def load_user_choices(username: str, group: str, base_path: Path) -> list[dict]:
+def load_user_choices(
+    username: str, group: str, base_path: Path, registry: Registry
+) -> list[dict]:
     """Loads the user choices from the csv file."""
     user_choices_store = base_path / group / "choices"
 
@@ -21,7 +26,24 @@ def load_user_choices(username: str, group: str, base_path: Path) -> list[dict]:
     else:
         df = pd.DataFrame([{"team": k, "tokens": 0} for k, _ in FLAG_UNICODE.items()])
 
-    df["team"] = df["team"].apply(lambda x: x + " " + FLAG_UNICODE[x])
+    df["team"] = registry.team_labels(df["team"])
+
+    records: list[dict] = df.to_dict("records")
+
+    return records
+
+
+def select_user_choices(
+    username: str, user_choices: pd.DataFrame, registry: Registry
+) -> list[dict]:
+    """Select a user's choices from everyone's, e.g. once they have been frozen."""
+    df = user_choices.loc[
+        user_choices["user"] == str(username).capitalize(), ["team", "tokens"]
+    ]
+
+    df = pd.DataFrame(
+        {"team": registry.team_labels(df["team"]), "tokens": df["tokens"].astype(int)}
+    )
 
     records: list[dict] = df.to_dict("records")
 
@@ -88,18 +110,27 @@ def create_play_tab(
     cutoff: datetime,
     user_choices: pd.DataFrame,
     fixtures: pd.DataFrame,
+    registry: Registry | None = None,
+    all_users: pd.DataFrame | None = None,
 ) -> dcc.Tab:
-    """Create the play tab frontend."""
-    user_choices_df = user_choices.pivot(index="team", columns="user", values="tokens")
+    """Create the play tab frontend.
 
-    user_choices_df["total"] = user_choices_df.sum(axis=1)
-
-    user_choices_df = user_choices_df.reset_index()
+    registry and all_users, the output of all_users_frame, are built from
+    user_choices unless given, so pass cached ones to reuse them.
+    """
+    if registry is None:
+        registry = Registry.from_choices(user_choices)
 
     choices_tab = [
         dash_table.DataTable(
-            id="user-choices-table",
-            data=load_user_choices(username, group, base_path),
+            # Another id once frozen, so the validation callback, whose outputs
+            # only exist before the cutoff, has no input either.
+            id="user-choices-final" if show_users else "user-choices-table",
+            data=(
+                select_user_choices(username, user_choices, registry)
+                if show_users
+                else load_user_choices(username, group, base_path, registry)
+            ),
             sort_action="native",
             sort_mode="multi",
             style_cell_conditional=[
@@ -124,6 +155,11 @@ def create_play_tab(
 
     if not show_users:
         choices_tab += [
+            dcc.Store(
+                id="token-rules",
+                data={"total": TOTAL_TOKENS, "max": MAX_TEAM_TOKENS},
+            ),
+            dbc.FormText(id="token-total"),
             html.Br(),
             dbc.Button("Update Selection", id="update-button", color="primary"),
             html.Div(id="warning-text"),
@@ -144,7 +180,16 @@ def create_play_tab(
             html.Br(),
             dbc.Row(
                 (
-                    create_all_users(user_choices_df.copy(deep=True), fixtures)
+                    create_all_users(
+                        (
+                            all_users
+                            if all_users is not None
+                            else all_users_frame(
+                                registry, registry.tokens(user_choices), fixtures
+                            )
+                        ),
+                        registry,
+                    )
                     if show_users
                     else html.H3(
                         "Once they are finalised, everyone's choices will appear here."
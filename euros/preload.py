@@ -0,0 +1,59 @@
+"""Building shared data in the gunicorn master before the workers fork."""
+
+import gc
+import os
+from collections.abc import Callable
+
+# Functions to call after a fork, by the pid of the process that added them.
+_after_fork: list[tuple[int, Callable[[], None]]] = []
+_registered = False
+
+
+def _run_after_fork() -> None:
+    for parent, func in _after_fork:
+        if os.getppid() == parent:
+            func()
+
+
+def run_after_fork(func: Callable[[], None]) -> None:
+    """Call func in every process forked from this one, e.g. gunicorn workers.
+
+    Processes forked by those children do not call it again. A single hook is
+    registered with os.register_at_fork, however many functions are added.
+    """
+    global _registered
+
+    _after_fork.append((os.getpid(), func))
+
+    if not _registered:
+        os.register_at_fork(after_in_child=_run_after_fork)
+        _registered = True
+
+
+def freeze_heap() -> None:
+    """Keep the garbage collector away from everything allocated so far.
+
+    A collection in a forked worker would otherwise write to every object it
+    visits and so copy the shared pages into the worker.
+    """
+    gc.collect()
+    gc.freeze()
+
+
+def private_bytes() -> int | None:
+    """Return the memory private to this process, or None without /proc.
+
+    Unlike RSS this leaves out pages still shared with the master, so it is what
+    each extra worker costs.
+    """
+    try:
+        with open("/proc/self/smaps_rollup") as file:
+            lines = file.read().splitlines()
+    except OSError:
+        return None
+
+    return sum(
+        int(line.split()[1]) * 1024
+        for line in lines
+        if line.startswith(("Private_Clean:", "Private_Dirty:"))
+    )
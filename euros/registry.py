@@ -0,0 +1,133 @@
+"""Every team and user in a league, with integer ids and display labels."""
+
+from collections.abc import Iterable
+from dataclasses import dataclass
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from euros.flags import FLAG_UNICODE, team_label
+
+
+def short_label(team: str) -> str:
+    """Return the short name of a team, e.g. "Fra 🇫🇷", as shown on the knockout."""
+    if "Winner Match" in team:
+        return team.replace("Winner Match", "MW")
+    elif (flag := FLAG_UNICODE.get(team)) is not None:
+        return team[:3] + " " + flag
+    else:
+        return team
+
+
+def long_label(team: str) -> str:
+    """Return the team name, followed by its flag if it has one."""
+    if (flag := FLAG_UNICODE.get(team)) is not None:
+        return team + " " + flag
+    else:
+        return team
+
+
+@dataclass(frozen=True)
+class Registry:
+    """The teams and users of a league, each stored once.
+
+    A team or user's id is its position in teams or users, which are also the
+    categories of team_dtype and user_dtype, so the codes of a categorical
+    column are ids. Display labels are built once per team, so labelling a
+    column is a gather by id rather than string formatting.
+    """
+
+    teams: np.ndarray
+    users: np.ndarray
+    labels: np.ndarray
+    short_labels: np.ndarray
+    long_labels: np.ndarray
+
+    @classmethod
+    def create(cls, teams: Iterable[str], users: Iterable[str]) -> "Registry":
+        """Create a registry of the unique teams and users, in order."""
+        unique_teams: np.ndarray = pd.unique(np.asarray(list(teams), dtype=object))
+        unique_users: np.ndarray = pd.unique(np.asarray(list(users), dtype=object))
+
+        return cls(
+            teams=unique_teams,
+            users=unique_users,
+            labels=np.array([team_label(t) for t in unique_teams], dtype=object),
+            short_labels=np.array([short_label(t) for t in unique_teams], dtype=object),
+            long_labels=np.array([long_label(t) for t in unique_teams], dtype=object),
+        )
+
+    @classmethod
+    def from_choices(cls, user_choices: pd.DataFrame) -> "Registry":
+        """Create the registry of a dataframe shaped like create_user_choices.
+
+        Categorical columns keep their categories, and so their codes, as ids.
+        """
+
+        def values(column: pd.Series) -> Iterable[str]:
+            if isinstance(column.dtype, pd.CategoricalDtype):
+                categories: Iterable[str] = column.cat.categories
+                return categories
+            labels: Iterable[str] = column
+            return labels
+
+        return cls.create(values(user_choices["team"]), values(user_choices["user"]))
+
+    @cached_property
+    def team_dtype(self) -> pd.CategoricalDtype:
+        """Categorical dtype whose codes are team ids."""
+        return pd.CategoricalDtype(self.teams)
+
+    @cached_property
+    def user_dtype(self) -> pd.CategoricalDtype:
+        """Categorical dtype whose codes are user ids."""
+        return pd.CategoricalDtype(self.users)
+
+    @staticmethod
+    def _codes(values: pd.Series, dtype: pd.CategoricalDtype) -> np.ndarray:
+        codes: np.ndarray
+        if isinstance(values.dtype, pd.CategoricalDtype) and values.dtype == dtype:
+            codes = values.cat.codes.to_numpy()
+        else:
+            codes = pd.Categorical(values, dtype=dtype).codes
+        return codes
+
+    def team_ids(self, teams: pd.Series) -> np.ndarray:
+        """Return the id of each team, or -1 for teams not in the registry."""
+        return self._codes(teams, self.team_dtype)
+
+    def user_ids(self, users: pd.Series) -> np.ndarray:
+        """Return the id of each user, or -1 for users not in the registry."""
+        return self._codes(users, self.user_dtype)
+
+    def team_labels(self, teams: pd.Series) -> np.ndarray:
+        """Return the label of each team, e.g. "France 🇫🇷"."""
+        ids = self.team_ids(teams)
+        labels: np.ndarray = self.labels[ids]
+
+        # Teams the registry has not seen are labelled one at a time.
+        for i in np.flatnonzero(ids < 0):
+            labels[i] = team_label(str(teams.iloc[i]))
+
+        return labels
+
+    def categorize(self, user_choices: pd.DataFrame) -> pd.DataFrame:
+        """Store the team and user columns as ids and the tokens as int8."""
+        categorized: pd.DataFrame = user_choices.astype(
+            {"team": self.team_dtype, "user": self.user_dtype, "tokens": np.int8}
+        )
+        return categorized
+
+    def tokens(self, user_choices: pd.DataFrame) -> np.ndarray:
+        """Return the team x user token matrix of user_choices.
+
+        Rows whose team or user is not in the registry are left out.
+        """
+        teams = self.team_ids(user_choices["team"])
+        users = self.user_ids(user_choices["user"])
+        known = (teams >= 0) & (users >= 0)
+
+        tokens = np.zeros((len(self.teams), len(self.users)), dtype=np.int8)
+        tokens[teams[known], users[known]] = user_choices["tokens"].to_numpy()[known]
+        return tokens
@@ -0,0 +1,126 @@
+"""Recording match results."""
+
+import hmac
+import re
+from argparse import ArgumentParser
+from collections.abc import Callable
+from pathlib import Path
+
+import pandas as pd
+from dash import Dash
+from dash_auth import add_public_routes
+from flask import abort, jsonify, request
+
+from euros.load import Loader, create_loader
+from euros.storage import atomic_write, file_lock
+
+RESULT_PATTERN = re.compile(r"\d+-\d+( \(\d+-\d+\))?")
+
+RESULTS_ROUTE = "/admin/results"
+
+
+def record_result(
+    load: Loader,
+    match_number: int,
+    result: str,
+    home_team: str | None = None,
+    away_team: str | None = None,
+) -> dict:
+    """Record a match result in fixtures.csv and bump the fixtures version.
+
+    The result is a score such as "2-1", or "1-1 (4-3)" after penalties, or ""
+    to clear it. Knockout placeholders such as "Winner Match 37" can be replaced
+    with the teams at the same time.
+    """
+    if result != "" and not RESULT_PATTERN.fullmatch(result):
+        raise ValueError(f"Invalid result: {result}")
+
+    path = load.base_path / "fixtures.csv"
+
+    with file_lock(path):
+        df = pd.read_csv(path, keep_default_na=False, dtype=str)
+
+        rows = df["Match Number"] == str(match_number)
+
+        if not rows.any():
+            raise ValueError(f"Unknown match number: {match_number}")
+
+        df.loc[rows, "Result"] = result
+        if home_team is not None:
+            df.loc[rows, "Home Team"] = home_team
+        if away_team is not None:
+            df.loc[rows, "Away Team"] = away_team
+
+        atomic_write(path, df.to_csv(index=False).encode())
+        load.results_journal.append_result(match_number, result, home_team, away_team)
+
+    load.fixtures_version.bump()
+
+    fixture: dict = df[rows].iloc[0].to_dict()
+
+    return fixture
+
+
+def add_results_route(
+    app: Dash, load: Loader, on_result: Callable[[], None] | None = None
+) -> None:
+    """Add the token-protected endpoint for posting results.
+
+    The endpoint only exists if results_token is configured. on_result is called
+    after every recorded result, e.g. to recompute derived data straight away.
+    """
+    if load.results_token is None:
+        return
+
+    add_public_routes(app, [RESULTS_ROUTE])
+
+    @app.server.route(RESULTS_ROUTE, methods=["POST"])
+    def post_result():
+        token = request.headers.get("Authorization", "").removeprefix("Bearer ")
+
+        # Only the token is checked: behind a reverse proxy every request comes
+        # from the proxy's address, so the client address proves nothing.
+        if not hmac.compare_digest(token, load.results_token):
+            abort(403)
+
+        body = request.get_json(silent=True) or {}
+
+        try:
+            fixture = record_result(
+                load,
+                match_number=int(body["match_number"]),
+                result=str(body["result"]),
+                home_team=body.get("home_team"),
+                away_team=body.get("away_team"),
+            )
+        except (KeyError, ValueError) as e:
+            return jsonify({"error": str(e)}), 400
+
+        if on_result is not None:
+            on_result()
+
+        return jsonify(fixture)
+
+
+def main() -> None:
+    """Record a match result from the command line."""
+    parser = ArgumentParser(description="Record a Euros match result.")
+    parser.add_argument("--filepath", "-f", type=str, help="config filepath.")
+    parser.add_argument("match_number", type=int)
+    parser.add_argument("result", type=str, help='e.g. "2-1" or "1-1 (4-3)".')
+    parser.add_argument("--home-team", type=str, default=None)
+    parser.add_argument("--away-team", type=str, default=None)
+    args = parser.parse_args()
+
+    fixture = record_result(
+        create_loader(Path(args.filepath)),
+        match_number=args.match_number,
+        result=args.result,
+        home_team=args.home_team,
+        away_team=args.away_team,
+    )
+    print(fixture)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+"""Closest rivals by portfolio overlap, and head-to-head comparisons."""
+
+import numpy as np
+import pandas as pd
+from dash import dash_table, dcc, html
+
+RIVALS = 5
+
+# Head-to-head comparisons kept by each worker.
+HEAD_TO_HEAD_ENTRIES = 64
+
+# Bound on the similarity block held in memory at once.
+BLOCK_BYTES = 64 * 1024 * 1024
+
+# Columns of each block used to bound the k-th best similarity of its rows.
+SAMPLE = 1024
+
+# Candidates per rival above which a block is ranked by a full partition.
+CANDIDATES = 64
+
+
+def top_similar(
+    tokens: np.ndarray, k: int = RIVALS, block_bytes: int = BLOCK_BYTES
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return the k users with the most similar portfolio to each user.
+
+    tokens is the team x user token matrix. Similarity is the cosine of the
+    angle between two users' token vectors. Users are compared a block at a
+    time with one matrix product per block, so memory stays within block_bytes
+    however large the league. Returns the user x k indices and similarities,
+    most similar first.
+    """
+    n_users = tokens.shape[1]
+    k = min(k, n_users - 1)
+
+    if k <= 0:
+        return np.empty((n_users, 0), np.int64), np.empty((n_users, 0), np.float32)
+
+    vectors = tokens.astype(np.float32)
+    norms = np.linalg.norm(vectors, axis=0)
+    vectors /= np.where(norms > 0, norms, 1)
+
+    # Scores, the candidate mask and partition indices take under 16 bytes a pair.
+    block = max(block_bytes // (16 * n_users), 1)
+    indices = np.empty((n_users, k), dtype=np.int64)
+    similarities = np.empty((n_users, k), dtype=np.float32)
+
+    for start in range(0, n_users, block):
+        stop = min(start + block, n_users)
+        scores = vectors[:, start:stop].T @ vectors
+
+        # Nobody is their own rival.
+        scores[np.arange(stop - start), np.arange(start, stop)] = -np.inf
+
+        # The k-th best of a sample of columns bounds each row's k-th best from
+        # below, so only the few scores above it need ranking. Many identical
+        # portfolios tie above the bound, and then a full partition is quicker.
+        sample = scores[:, : max(SAMPLE, k + 1)]
+        bound = np.partition(sample, -k, axis=1)[:, -k]
+        above = scores >= bound[:, None]
+
+        if np.count_nonzero(above) <= CANDIDATES * k * (stop - start):
+            rows, columns = np.nonzero(above)
+        else:
+            columns = np.argpartition(scores, -k, axis=1)[:, -k:].ravel()
+            rows = np.repeat(np.arange(stop - start), k)
+        values = scores[rows, columns]
+
+        order = np.lexsort((columns, -values, rows))
+        rows, columns, values = rows[order], columns[order], values[order]
+        rank = np.arange(len(rows)) - np.searchsorted(rows, rows)
+        best = rank < k
+
+        indices[start + rows[best], rank[best]] = columns[best]
+        similarities[start + rows[best], rank[best]] = values[best]
+
+    return indices, similarities
+
+
+def head_to_head(standings: pd.DataFrame, user: str, rival: str) -> pd.DataFrame:
+    """Return the points each user won in every match, biggest difference first.
+
+    standings is the output of get_standings. The gap column is user_points
+    minus rival_points, so the top rows are the matches that decided it.
+    """
+    columns = ["Match Number", "Date", "Home Team", "Away Team", "Result"]
+
+    points = (
+        standings[standings["user"].isin([user, rival])]
+        .groupby(columns + ["user"], observed=True)["points_allocated"]
+        .sum()
+        .unstack("user", fill_value=0.0)
+        .reindex(columns=[user, rival], fill_value=0.0)
+        .set_axis(["user_points", "rival_points"], axis=1)
+    )
+    points["gap"] = points["user_points"] - points["rival_points"]
+
+    return (
+        points.reset_index()
+        .sort_values("gap", key=np.abs, ascending=False, kind="stable")
+        .round(3)
+    )
+
+
+def rival_options(names: np.ndarray, similarities: np.ndarray) -> list[dict]:
+    """Return dropdown options for the rivals, with their similarity."""
+    return [
+        {"value": name, "label": f"{name} ({similarity:.0%} similar)"}
+        for name, similarity in zip(names, similarities)
+    ]
+
+
+def create_rivals() -> html.Div:
+    """Create the closest rivals section, filled in by callbacks for each user."""
+    return html.Div(
+        [
+            html.H4("Closest rivals"),
+            dcc.Dropdown(id="rival-select", placeholder="Pick a rival"),
+            html.Br(),
+            dash_table.DataTable(
+                id="head-to-head",
+                columns=[
+                    {"name": "Match", "id": "Match Number"},
+                    {"name": "Home", "id": "Home Team"},
+                    {"name": "Result", "id": "Result"},
+                    {"name": "Away", "id": "Away Team"},
+                    {"name": "You", "id": "user_points"},
+                    {"name": "Rival", "id": "rival_points"},
+                    {"name": "Gap", "id": "gap"},
+                ],
+                page_size=10,
+            ),
+        ]
+    )
@@ -0,0 +1,188 @@
+"""Immutable snapshot of every user's choices, taken at the cutoff."""
+
+import hashlib
+import io
+import os
+import threading
+from argparse import ArgumentParser
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import numpy as np
+import pandas as pd
+import pytz
+
+from euros.registry import Registry
+from euros.storage import atomic_write, file_lock
+
+if TYPE_CHECKING:
+    from euros.load import Loader
+
+
+@dataclass(frozen=True)
+class ChoicesSnapshot:
+    """Every user's tokens as a team x user integer matrix."""
+
+    teams: np.ndarray
+    users: np.ndarray
+    tokens: np.ndarray
+    checksum: str
+
+    @staticmethod
+    def compute_checksum(
+        teams: np.ndarray, users: np.ndarray, tokens: np.ndarray
+    ) -> str:
+        """Return the sha256 of the snapshot contents."""
+        digest = hashlib.sha256()
+        digest.update("\n".join(teams).encode())
+        digest.update(b"\0")
+        digest.update("\n".join(users).encode())
+        digest.update(b"\0")
+        digest.update(np.ascontiguousarray(tokens, dtype=np.int8).tobytes())
+        return digest.hexdigest()
+
+    @classmethod
+    def from_frame(cls, user_choices: pd.DataFrame) -> "ChoicesSnapshot":
+        """Build a snapshot from a dataframe shaped like create_user_choices."""
+        registry = Registry.from_choices(user_choices)
+        teams = registry.teams.astype(str)
+        users = registry.users.astype(str)
+        tokens = registry.tokens(user_choices)
+
+        return cls(
+            teams=teams,
+            users=users,
+            tokens=tokens,
+            checksum=cls.compute_checksum(teams, users, tokens),
+        )
+
+    def to_frame(self) -> pd.DataFrame:
+        """Return the snapshot in the long format of create_user_choices."""
+        n_teams, n_users = self.tokens.shape
+
+        return pd.DataFrame(
+            {
+                "team": pd.Categorical.from_codes(
+                    np.tile(np.arange(n_teams, dtype=np.int32), n_users),
+                    categories=self.teams.astype(object),
+                ),
+                "tokens": self.tokens.T.ravel(),
+                "user": pd.Categorical.from_codes(
+                    np.repeat(np.arange(n_users, dtype=np.int32), n_teams),
+                    categories=self.users.astype(object),
+                ),
+            }
+        )
+
+    def save(self, path: Path) -> None:
+        """Write the snapshot to path and make it read-only."""
+        buffer = io.BytesIO()
+        np.savez(
+            buffer,
+            teams=self.teams,
+            users=self.users,
+            tokens=self.tokens,
+            checksum=np.array(self.checksum),
+        )
+        atomic_write(path, buffer.getvalue())
+        os.chmod(path, 0o444)
+
+    @classmethod
+    def load(cls, path: Path) -> "ChoicesSnapshot":
+        """Read a snapshot from path, checking it has not been altered."""
+        with np.load(path, allow_pickle=False) as arrays:
+            teams, users, tokens = arrays["teams"], arrays["users"], arrays["tokens"]
+            checksum = str(arrays["checksum"])
+
+        if cls.compute_checksum(teams, users, tokens) != checksum:
+            raise ValueError(f"Checksum mismatch in choices snapshot {path}.")
+
+        return cls(teams=teams, users=users, tokens=tokens, checksum=checksum)
+
+
+def freeze_choices(load: "Loader") -> ChoicesSnapshot:
+    """Snapshot the user group's choices, unless a snapshot already exists.
+
+    The snapshot's lock is held throughout, which waits for choice writes in
+    progress in any worker and makes later ones see the snapshot and stop (see
+    ChoiceWriter). Bumps the choices version so that every worker switches to
+    the snapshot.
+    """
+    path = load.snapshot_path()
+
+    with file_lock(path):
+        if path.exists():
+            return ChoicesSnapshot.load(path)
+
+        snapshot = ChoicesSnapshot.from_frame(load.create_user_choices())
+        snapshot.save(path)
+
+    load.choices_version.bump()
+
+    return snapshot
+
+
+def unfreeze_choices(load: "Loader") -> bool:
+    """Delete the snapshot so choices are read from the csv files again.
+
+    Returns whether there was a snapshot. Bumps the choices version so that
+    every worker drops what it built from the snapshot.
+    """
+    path = load.snapshot_path()
+
+    with file_lock(path):
+        if not path.exists():
+            return False
+        path.unlink()
+
+    load.choices_version.bump()
+
+    return True
+
+
+def schedule_freeze(
+    load: "Loader", before_freeze: Callable[[], None] | None = None
+) -> threading.Timer:
+    """Freeze the choices at the cutoff time, or straight away if it has passed.
+
+    before_freeze is called first, e.g. to flush choice writes still pending.
+    """
+
+    def freeze() -> None:
+        if before_freeze is not None:
+            before_freeze()
+        freeze_choices(load)
+
+    delay = load.cutoff_time - datetime.now(pytz.timezone("Europe/London"))
+
+    timer = threading.Timer(max(delay.total_seconds(), 0), freeze)
+    timer.daemon = True
+    timer.start()
+
+    return timer
+
+
+def main() -> None:
+    """Freeze or unfreeze a user group's choices from the command line."""
+    from euros.load import create_loader
+
+    parser = ArgumentParser(description="Freeze or unfreeze the choices.")
+    parser.add_argument("--filepath", "-f", type=str, help="config filepath.")
+    parser.add_argument("action", choices=["freeze", "unfreeze"])
+    args = parser.parse_args()
+
+    load = create_loader(Path(args.filepath))
+
+    if args.action == "freeze":
+        print(f"Froze {len(freeze_choices(load).users)} users' choices.")
+    elif unfreeze_choices(load):
+        print("Unfroze the choices.")
+    else:
+        print("The choices were not frozen.")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,10 +1,16 @@
 import copy
+from dataclasses import dataclass
+from datetime import datetime
 
 import dash_bootstrap_components as dbc
+import numpy as np
 import pandas as pd
 import plotly.graph_objects as go
 from dash import dash_table, dcc, html
 
+from euros.registry import Registry
+from euros.rivals import create_rivals
+
 STANDINGS_COLOR_PALETTE = [
     "#1f77b4",  # Blue
     "#ff7f0e",  # Orange
@@ -20,6 +26,12 @@ STANDINGS_COLOR_PALETTE = [
     "#ffbb78",  # Light orange
 ]
 
+LEADERBOARD_PAGE_SIZE = 50
+
+# The first paint of the leaderboard shows the top users and those around you.
+LEADERBOARD_TOP = 10
+LEADERBOARD_AROUND = 2
+
 
 def get_wdl(result: str) -> str:
     """Get the result of the match."""
@@ -100,35 +112,105 @@ def get_standings(
         return None
 
     results["Points To Allocate"] = results.apply(allocate_points, axis=1)
-    user_choices = user_choices.pivot(index="team", columns="user", values="tokens")
-    user_choices["total"] = user_choices.sum(axis=1)
-    user_choices = user_choices.reset_index()
-    user_choices.set_index("team", inplace=True)
-
-    user_choices_cleaned = (
-        user_choices.div(user_choices["total"], axis=0)
-        .fillna(0)
-        .drop("total", axis=1)
-        .reset_index()
-        .melt(id_vars="team", var_name="user", value_name="ownership")
-    )
-
-    merged_results = pd.merge(results, user_choices_cleaned, on=["team"], how="left")
-
-    merged_results["points_allocated"] = (
-        merged_results["Points To Allocate"] * merged_results["ownership"]
-    )
 
-    merged_results = pd.merge(
-        merged_results,
+    results = pd.merge(
+        results,
         fixtures[["Match Number", "Home Team", "Away Team", "Result"]],
         on="Match Number",
         how="inner",
     )
 
+    # Each team's share of its tokens held by every user, joined on team ids.
+    # Teams nobody picked, e.g. ones missing from the choices, pay out nothing.
+    registry = Registry.from_choices(user_choices)
+    tokens = registry.tokens(user_choices).astype(float)
+    totals = tokens.sum(axis=1, keepdims=True)
+    ownership = np.divide(tokens, totals, out=np.zeros_like(tokens), where=totals > 0)
+
+    team_ids = registry.team_ids(results["team"])
+    ownership = np.where((team_ids >= 0)[:, None], ownership[team_ids], 0.0)
+
+    # One row per result and user. The repeated strings are stored as
+    # categorical codes, so the frame grows by a few bytes per row.
+    for column in ["Round Number", "team", "WDL", "Home Team", "Away Team", "Result"]:
+        results[column] = results[column].astype("category")
+
+    n_users = len(registry.users)
+    merged_results = results.iloc[np.repeat(np.arange(len(results)), n_users)]
+    merged_results = merged_results.reset_index(drop=True)
+
+    merged_results.insert(
+        6,
+        "user",
+        pd.Categorical.from_codes(
+            np.tile(np.arange(n_users, dtype=np.int32), len(results)),
+            dtype=registry.user_dtype,
+        ),
+    )
+    merged_results.insert(7, "ownership", ownership.ravel())
+    merged_results.insert(
+        8,
+        "points_allocated",
+        merged_results["Points To Allocate"].to_numpy() * ownership.ravel(),
+    )
+
     return merged_results
 
 
+@dataclass(frozen=True)
+class StandingsCheckpoints:
+    """Every user's cumulative points after each completed match.
+
+    Rows are the completed matches in kick-off order and columns are the users,
+    so the standings as of any point in the tournament are a single row.
+    """
+
+    match_numbers: np.ndarray
+    dates: np.ndarray
+    users: np.ndarray
+    cumulative_points: np.ndarray
+
+    @classmethod
+    def from_standings(cls, standings: pd.DataFrame) -> "StandingsCheckpoints":
+        """Create the checkpoints from the output of get_standings."""
+        points = standings.pivot_table(
+            index=["Date", "Match Number"],
+            columns="user",
+            values="points_allocated",
+            aggfunc="sum",
+            fill_value=0,
+            observed=True,
+        ).sort_index()
+
+        return cls(
+            match_numbers=points.index.get_level_values("Match Number").to_numpy(),
+            dates=points.index.get_level_values("Date").to_numpy(),
+            users=points.columns.to_numpy(dtype=object),
+            cumulative_points=points.cumsum().to_numpy(),
+        )
+
+    def as_of(self, match_number: int | None = None) -> pd.Series:
+        """Return each user's total after match_number, or after the latest match."""
+        if match_number is None:
+            row = len(self.match_numbers) - 1
+        else:
+            (rows,) = np.nonzero(self.match_numbers == match_number)
+            if len(rows) == 0:
+                raise ValueError(f"Match {match_number} has not been played.")
+            row = rows[0]
+
+        return pd.Series(self.cumulative_points[row], index=self.users)
+
+    def as_of_date(self, date: datetime) -> pd.Series:
+        """Return each user's total after the last match kicking off by date."""
+        row = np.searchsorted(self.dates, np.datetime64(date), side="right") - 1
+
+        if row < 0:
+            return pd.Series(0.0, index=self.users)
+
+        return pd.Series(self.cumulative_points[row], index=self.users)
+
+
 def create_figure(
     standings: pd.DataFrame, x_axis="Date", y_axis="cumulative_points"
 ) -> go.Figure:
@@ -143,12 +225,14 @@ def create_figure(
                 "Home Team",
                 "Away Team",
                 "Result",
-            ]
+            ],
+            observed=True,
         )["points_allocated"]
         .sum()
         .reset_index()
     )
 
+    df["user"] = df["user"].astype(str)
     df["Date"] = pd.to_datetime(df["Date"], dayfirst=True)
     df = df.sort_values(by=["user", x_axis])
     df["cumulative_points"] = df.groupby("user")["points_allocated"].cumsum()
@@ -211,31 +295,105 @@ def create_figure(
     return fig
 
 
-def create_current_standings(standings: pd.DataFrame) -> dash_table.DataTable:
-    """Create the current standings table."""
-    standings_table: pd.DataFrame = (
-        standings.groupby(["user"])["points_allocated"]
-        .sum()
-        .sort_values(ascending=False)
-    )
+@dataclass(frozen=True)
+class Leaderboard:
+    """Every user ranked by total points, best first.
+
+    order lists the users' indices by rank and ranks is its inverse, each
+    user's 0-based rank by index, so finding anyone's position is O(1) and a
+    page of the table is a slice.
+    """
+
+    users: np.ndarray
+    points: np.ndarray
+    order: np.ndarray
+    ranks: np.ndarray
+    index: dict[str, int]
+
+    @classmethod
+    def from_totals(cls, totals: pd.Series) -> "Leaderboard":
+        """Rank the users in the index of totals, e.g. StandingsCheckpoints.as_of."""
+        users = totals.index.to_numpy(dtype=object)
+        points = totals.to_numpy(dtype=float)
+
+        order = np.argsort(-points, kind="stable")
+        ranks = np.empty_like(order)
+        ranks[order] = np.arange(len(order))
+
+        return cls(
+            users=users,
+            points=points,
+            order=order,
+            ranks=ranks,
+            index={str(user): i for i, user in enumerate(users)},
+        )
 
-    df = (
-        standings_table.reset_index()
-        .reset_index()
-        .rename(columns={"index": "position"})
-    )
-    df["position"] = df["position"] + 1
+    def __len__(self) -> int:
+        """Return the number of users on the leaderboard."""
+        return len(self.users)
+
+    def position(self, username: str | None) -> int | None:
+        """Return the 0-based rank of a user, or None if they are not playing."""
+        i = self.index.get(str(username).capitalize())
+        return None if i is None else int(self.ranks[i])
+
+    def records(self, start: int, stop: int) -> list[dict]:
+        """Return the ranks from start to stop as records for the standings table."""
+        return [
+            {
+                "position": start + offset + 1,
+                "user": self.users[i],
+                "points_allocated": round(float(self.points[i]), 3),
+            }
+            for offset, i in enumerate(self.order[start:stop])
+        ]
+
+    def page(
+        self, page_current: int, page_size: int = LEADERBOARD_PAGE_SIZE
+    ) -> list[dict]:
+        """Return one page of the leaderboard as records."""
+        return self.records(page_current * page_size, (page_current + 1) * page_size)
 
-    df["points_allocated"] = df["points_allocated"].round(3)
+    def page_count(self, page_size: int = LEADERBOARD_PAGE_SIZE) -> int:
+        """Return the number of pages of the leaderboard."""
+        return max(-(-len(self) // page_size), 1)
 
+    def first_paint(
+        self,
+        username: str | None,
+        top: int = LEADERBOARD_TOP,
+        around: int = LEADERBOARD_AROUND,
+    ) -> list[dict]:
+        """Return the top users, then the user and those around them if lower."""
+        records = self.records(0, top)
+
+        if (position := self.position(username)) is not None and position >= top:
+            start = max(position - around, top)
+            if start > top:
+                records.append({"position": "...", "user": "", "points_allocated": ""})
+            records += self.records(start, position + around + 1)
+
+        return records
+
+
+def create_current_standings(leaderboard: Leaderboard) -> dash_table.DataTable:
+    """Create the current standings table.
+
+    It is sent with the top of the leaderboard. Callbacks fill in the
+    neighbourhood of the user looking at it and serve each page on request.
+    """
     return dash_table.DataTable(
         id="current-standings",
-        data=df.to_dict("records"),
+        data=leaderboard.first_paint(None),
         columns=[
             {"name": "Pos.", "id": "position"},
             {"name": "Name", "id": "user"},
             {"name": "Total Dividend", "id": "points_allocated"},
         ],
+        page_action="custom",
+        page_current=0,
+        page_size=LEADERBOARD_PAGE_SIZE,
+        page_count=leaderboard.page_count(),
         style_cell_conditional=[
             {"if": {"column_id": "position"}, "minWidth": "20px", "maxWidth": "20px"},
             {"if": {"column_id": "user"}, "minWidth": "75px", "maxWidth": "75px"},
@@ -266,15 +424,11 @@ def create_standings(
 
 
 def create_standings_tab(
-    user_choices: pd.DataFrame,
-    fixtures: pd.DataFrame,
+    standings: pd.DataFrame | None,
+    checkpoints: StandingsCheckpoints | None,
 ) -> html.Div:
-    """Create the standings tab."""
-    standings: pd.DataFrame | None = get_standings(
-        user_choices.copy(deep=True), fixtures=fixtures
-    )
-
-    if standings is None:
+    """Create the standings tab from get_standings and its checkpoints."""
+    if standings is None or checkpoints is None:
         return dbc.Col(
             children=[
                 html.Br(),
@@ -284,7 +438,9 @@ def create_standings_tab(
             ]
         )
     else:
-        standings_table = create_current_standings(standings)
+        standings_table = create_current_standings(
+            Leaderboard.from_totals(checkpoints.as_of())
+        )
         standings_figure = create_figure(standings)
 
         standings_figure_small = copy.deepcopy(standings_figure)
@@ -311,12 +467,55 @@ def create_standings_tab(
             clearable=False,
         )
 
+        standings_as_of = dcc.Dropdown(
+            id="standings-as-of",
+            options=[
+                {
+                    "value": int(match_number),
+                    "label": f"After Match {match_number} "
+                    f"({pd.Timestamp(date).strftime('%d/%m')})",
+                }
+                for match_number, date in zip(
+                    checkpoints.match_numbers, checkpoints.dates
+                )
+            ],
+            persistence=True,
+            persistence_type="memory",
+            placeholder="Standings as of now",
+        )
+
+        standings_as_of_date = dcc.DatePickerSingle(
+            id="standings-as-of-date",
+            min_date_allowed=pd.Timestamp(checkpoints.dates[0]).date(),
+            max_date_allowed=pd.Timestamp(checkpoints.dates[-1]).date(),
+            display_format="DD/MM",
+            placeholder="or a date",
+            clearable=True,
+        )
+
         return dbc.Col(
             [
                 html.Br(),
                 dbc.Row(
                     [
-                        dbc.Col(standings_table, className="standings-table-width"),
+                        dbc.Col(
+                            [
+                                standings_as_of,
+                                standings_as_of_date,
+                                html.Br(),
+                                standings_table,
+                                dbc.Button(
+                                    "Jump to me",
+                                    id="standings-jump",
+                                    color="primary",
+                                    size="sm",
+                                ),
+                                html.Br(),
+                                html.Br(),
+                                create_rivals(),
+                            ],
+                            className="standings-table-width",
+                        ),
                         dbc.Col(
                             [
                                 html.Div(
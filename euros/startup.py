@@ -0,0 +1,73 @@
+"""Import-time and start-up report."""
+
+import re
+import subprocess
+import sys
+import time
+from argparse import ArgumentParser
+from dataclasses import dataclass
+
+_IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+
+@dataclass(frozen=True)
+class ImportTime:
+    """Time spent importing one module, in microseconds."""
+
+    module: str
+    self_us: int
+    cumulative_us: int
+    depth: int
+
+
+def import_times(module: str = "euros.main") -> list[ImportTime]:
+    """Import module in a fresh interpreter and return every import's time."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+    return [
+        ImportTime(name, int(self_us), int(cumulative_us), len(indent) // 2)
+        for self_us, cumulative_us, indent, name in _IMPORT_TIME.findall(process.stderr)
+    ]
+
+
+def main() -> None:
+    """Report the slowest imports and, given a config, the time to create the app."""
+    parser = ArgumentParser(description="Report the Euros app start-up time.")
+    parser.add_argument("--filepath", "-f", type=str, default=None, help="config.")
+    parser.add_argument("--module", type=str, default="euros.main")
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    times = import_times(args.module)
+    total = next(t for t in times if t.module == args.module)
+
+    print(f"import {args.module}: {total.cumulative_us / 1e6:.3f}s")
+    print("\nSlowest top-level imports (cumulative):")
+    top_level = sorted(
+        (t for t in times if t.depth == 1), key=lambda t: -t.cumulative_us
+    )
+    for t in top_level[: args.top]:
+        print(f"  {t.cumulative_us / 1e6:8.3f}s  {t.module}")
+
+    print("\nApp modules (self):")
+    for t in sorted(times, key=lambda t: -t.self_us):
+        if t.module.startswith("euros."):
+            print(f"  {t.self_us / 1e6:8.3f}s  {t.module}")
+
+    if args.filepath is not None:
+        from euros.main import create_app
+
+        start = time.perf_counter()
+        create_app(args.filepath)
+        print(
+            f"\ncreate_app (including any warm-up): {time.perf_counter() - start:.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+import base64
+import shutil
+from pathlib import Path
+
+import pytest
+import yaml
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+@pytest.fixture
+def config_path(tmp_path) -> Path:
+    """Config for a copy of the example base path, safe for tests to write to."""
+    base_path = tmp_path / "example_base_path"
+    shutil.copytree(RESOURCES / "example_base_path", base_path)
+
+    with open(RESOURCES / "test_config.yaml") as file:
+        config = yaml.safe_load(file)
+
+    config["base_path"] = str(base_path)
+
+    path = tmp_path / "config.yaml"
+    with open(path, "w") as file:
+        yaml.safe_dump(config, file)
+
+    return path
+
+
+@pytest.fixture
+def configure(config_path):
+    """Update settings in the test config and return its path."""
+
+    def update(**settings) -> Path:
+        with open(config_path) as file:
+            config = yaml.safe_load(file)
+
+        config.update(settings)
+
+        with open(config_path, "w") as file:
+            yaml.safe_dump(config, file)
+
+        return config_path
+
+    return update
+
+
+@pytest.fixture
+def auth_headers() -> dict[str, str]:
+    """Basic auth headers for one of the example users."""
+    credentials = base64.b64encode(b"james:loud.red.tree").decode()
+    return {"Authorization": f"Basic {credentials}"}
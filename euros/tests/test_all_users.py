@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from euros.all_users import (
+    TOKENS_LEFT,
+    all_users_frame,
+    all_users_order,
+    all_users_page,
+)
+from euros.registry import Registry
+
+
+def _frame() -> pd.DataFrame:
+    registry = Registry.create(["France", "Spain"], ["Ann", "Bob", "Cat"])
+    tokens = np.array([[2, 11, 6], [10, 1, 6]], dtype=np.int8)
+    fixtures = pd.DataFrame(
+        {
+            "Home Team": ["France", "Spain"],
+            "Away Team": ["Spain", "France"],
+            "Result": ["1-0", ""],
+        }
+    )
+    return all_users_frame(registry, tokens, fixtures)
+
+
+def test_all_users_frame():
+    """Each user is a row, with tokens left on teams still to play."""
+    frame = _frame()
+
+    assert list(frame.columns) == ["user", "France", "Spain", TOKENS_LEFT]
+    assert frame.to_dict("records")[1] == {
+        "user": "Bob",
+        "France": 11,
+        "Spain": 1,
+        TOKENS_LEFT: 12,
+    }
+
+
+def test_all_users_order():
+    """Filter queries and sorting select the rows a page is cut from."""
+    frame = _frame()
+
+    rows = all_users_order(frame, [{"column_id": "Spain", "direction": "desc"}], None)
+    assert list(frame["user"].iloc[rows]) == ["Ann", "Cat", "Bob"]
+
+    rows = all_users_order(frame, None, "{France} >= 6 && {user} icontains b")
+    assert list(frame["user"].iloc[rows]) == ["Bob"]
+
+    records, page_count = all_users_page(frame, np.arange(3), 1, page_size=2)
+    assert [record["user"] for record in records] == ["Cat"]
+    assert page_count == 2
+
+    # Page sizes from the client are clamped to between 1 and PAGE_SIZE.
+    records, page_count = all_users_page(frame, np.arange(3), 0, page_size=0)
+    assert len(records) == 1
+    assert page_count == 3
@@ -0,0 +1,69 @@
+import base64
+
+import pytest
+
+from euros.main import create_app
+
+
+@pytest.fixture
+def client(config_path):
+    app, _ = create_app(str(config_path))
+    return app.server.test_client()
+
+
+def test_fixtures(client, auth_headers):
+    """Fixtures are filtered by team, round and dates, and carry an ETag."""
+    response = client.get(
+        "/api/fixtures?team=Germany&round=1&from=2024-06-14&to=2024-06-14",
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert [f["Match Number"] for f in response.json] == [1]
+
+    response = client.get(
+        "/api/fixtures?team=Germany",
+        headers={**auth_headers, "If-None-Match": response.get_etag()[0]},
+    )
+    assert len(response.json) >= 3
+
+    cached = client.get(
+        "/api/fixtures?team=Germany",
+        headers={**auth_headers, "If-None-Match": response.get_etag()[0]},
+    )
+    assert cached.status_code == 304
+
+    assert (
+        client.get("/api/fixtures?from=14/06", headers=auth_headers).status_code == 400
+    )
+    assert client.get("/api/fixtures").status_code == 401
+
+
+def test_standings_groups_and_choices(client, auth_headers):
+    """The standings, group tables and choices are served as JSON."""
+    standings = client.get("/api/standings?limit=3", headers=auth_headers).json
+    assert standings["count"] == 7
+    assert [row["position"] for row in standings["standings"]] == [1, 2, 3]
+
+    table = client.get("/api/groups/a", headers=auth_headers).json
+    assert [row["position"] for row in table] == [1, 2, 3, 4]
+    assert client.get("/api/groups/Z", headers=auth_headers).status_code == 404
+
+    choices = client.get("/api/users/harry/choices", headers=auth_headers).json
+    assert choices["user"] == "Harry"
+    assert sum(choices["choices"].values()) > 0
+    assert (
+        client.get("/api/users/nobody/choices", headers=auth_headers).status_code == 404
+    )
+
+
+def test_choices_are_private_before_the_cutoff(configure):
+    """Before the cutoff users only see their own choices."""
+    app, _ = create_app(str(configure(cutoff_time="2100-01-01 00:00:00+00:00")))
+    client = app.server.test_client()
+    headers = {
+        "Authorization": f"Basic {base64.b64encode(b'harry:silent.bright.flower').decode()}"
+    }
+
+    assert client.get("/api/users/harry/choices", headers=headers).status_code == 200
+    assert client.get("/api/users/james/choices", headers=headers).status_code == 403
@@ -0,0 +1,25 @@
+from euros.bench import compare, run
+
+
+def test_bench_48_teams():
+    """Every benchmark runs on a small 48-team league and regressions are caught."""
+    results = run(users=(10,), teams=(48,), min_time=0, max_rounds=1)
+
+    assert {result.name for result in results} == {
+        "load_fixtures",
+        "create_user_choices",
+        "get_standings",
+        "create_figure",
+        "create_groups_tab",
+        "create_knockout_tab",
+        "create_fixtures_tab",
+        "create_play_tab",
+    }
+
+    baseline = {"results": [{"key": r.key, "median": r.median} for r in results]}
+    assert compare(results, baseline, tolerance=0.2) == []
+
+    baseline["results"][0]["median"] /= 10
+    assert [key for key, *_ in compare(results, baseline, tolerance=0.2)] == [
+        "load_fixtures[users=10,teams=48]"
+    ]
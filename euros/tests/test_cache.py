@@ -0,0 +1,103 @@
+import datetime
+import threading
+
+from euros.cache import CHOICES, FIXTURES, DataCache
+from euros.load import create_loader
+from euros.results import record_result
+from euros.version import VersionCounter
+
+
+def test_version_counter_is_shared(tmp_path):
+    """Bumps through one counter are seen by another mapping of the same file."""
+    writer = VersionCounter(tmp_path / ".version")
+    reader = VersionCounter(tmp_path / ".version")
+
+    assert reader.get() == 0
+    assert writer.bump() == 1
+    assert reader.get() == 1
+
+
+def test_data_cache_rebuilds_after_bump(config_path):
+    """Entries are reused until a counter they depend on is bumped."""
+    data = DataCache(create_loader(config_path))
+
+    builds = []
+
+    def build():
+        builds.append(1)
+        return len(builds)
+
+    assert data.get("key", build, depends=(CHOICES,)) == 1
+    assert data.get("key", build, depends=(CHOICES,)) == 1
+
+    data.load.fixtures_version.bump()
+    assert data.get("key", build, depends=(CHOICES,)) == 1
+
+    data.load.choices_version.bump()
+    assert data.get("key", build, depends=(CHOICES,)) == 2
+
+    assert data.fixtures() is data.get(FIXTURES, list, depends=(FIXTURES,))
+    assert data.standings() is not None
+
+
+def test_data_cache_builds_do_not_block_other_keys(config_path):
+    """A slow build holds up readers of its own key only."""
+    data = DataCache(create_loader(config_path))
+    data.get("fast", lambda: 1)
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 2
+
+    thread = threading.Thread(target=data.get, args=("slow", slow))
+    thread.start()
+    started.wait(5)
+
+    try:
+        assert data.get("fast", lambda: 3) == 1
+        assert data.get("other", lambda: 4) == 4
+    finally:
+        release.set()
+        thread.join()
+
+    assert data.get("slow", lambda: 5) == 2
+
+
+def test_data_cache_as_of_a_cleared_match(config_path):
+    """A match cleared since is shown as of the match played before it."""
+    data = DataCache(create_loader(config_path))
+
+    record_result(data.load, 40, "2-1")
+    record_result(data.load, 41, "1-0")
+    assert data.played_match(41) == 41
+
+    record_result(data.load, 41, "")
+    assert data.played_match(41) == 40
+    assert data.played_match(None) is None
+    assert data.played_match(99) is None
+
+    assert data.leaderboard_on(datetime.date(2024, 6, 1)).points.sum() == 0
+    assert len(data.leaderboard_on(datetime.date(2024, 7, 14))) == len(
+        data.leaderboard()
+    )
+
+
+def test_data_cache_get_later_builds_in_the_background(config_path):
+    """Readers get None until the background build of a key is done."""
+    data = DataCache(create_loader(config_path))
+    started, release = threading.Event(), threading.Event()
+
+    def slow():
+        started.set()
+        release.wait(5)
+        return 1
+
+    assert data.get_later("slow", slow) is None
+    started.wait(5)
+    assert data.get_later("slow", slow) is None
+
+    release.set()
+    assert data.get("slow", lambda: 2) == 1
+    assert data.get_later("slow", slow) == 1
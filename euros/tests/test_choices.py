@@ -0,0 +1,62 @@
+import pandas as pd
+import pytest
+
+from euros.choices import ChoiceWriter, validate_tokens
+
+
+def _choices(tokens: list) -> pd.DataFrame:
+    return pd.DataFrame(
+        {"team": [f"Team {i}" for i in range(len(tokens))], "tokens": tokens}
+    )
+
+
+def test_validate_tokens():
+    """The three token rules are reported in order."""
+    assert validate_tokens(pd.Series([6, 6, 0])) is None
+    assert validate_tokens(pd.Series([6.5, 5.5])) == "Please enter integers only"
+    assert validate_tokens(pd.Series([6, None, 6])) == "Please enter integers only"
+    assert validate_tokens(pd.Series([12, 0])) == "Please enter values between 0 and 11"
+    assert validate_tokens(pd.Series([6, 5])) == "Token values must sum to 12"
+
+
+def test_choice_writer_coalesces_bursts(tmp_path):
+    """Submissions inside the window collapse into a single write of the latest."""
+    path = tmp_path / "james.csv"
+    writes = []
+    writer = ChoiceWriter(window=60, on_write=lambda path, _: writes.append(path))
+
+    assert writer.submit(path, _choices([6, 6])).done()
+    second = writer.submit(path, _choices([11, 1]))
+    third = writer.submit(path, _choices([10, 2]))
+    assert second is third and not third.done()
+    assert pd.read_csv(path)["tokens"].tolist() == [6, 6]
+
+    writer.flush_all()
+
+    assert third.result() is None
+    assert pd.read_csv(path)["tokens"].tolist() == [10, 2]
+    assert writes == [path, path]
+    assert list(tmp_path.glob("*.tmp")) == []
+
+
+def test_choice_writer_compares_with_the_file(tmp_path):
+    """A resubmission is written if another worker changed the file since."""
+    path = tmp_path / "james.csv"
+    first = ChoiceWriter(window=0)
+    second = ChoiceWriter(window=0)
+
+    first.submit(path, _choices([6, 6])).result()
+    second.submit(path, _choices([11, 1])).result()
+    first.submit(path, _choices([6, 6])).result()
+
+    assert pd.read_csv(path)["tokens"].tolist() == [6, 6]
+
+
+def test_choice_writer_surfaces_failures(tmp_path):
+    """A failed write is raised by the submission's future."""
+    writer = ChoiceWriter(window=0)
+
+    future = writer.submit(tmp_path / "missing" / "james.csv", _choices([6, 6]))
+
+    with pytest.raises(FileNotFoundError):
+        future.result()
@@ -0,0 +1,27 @@
+import gzip
+
+from euros.main import create_app
+from euros.tests.test_http_cache import _groups_tab_request
+
+
+def test_callback_responses_are_gzipped(config_path, auth_headers):
+    """Large callback responses are gzipped for clients that accept it."""
+    app, _ = create_app(str(config_path))
+    client = app.server.test_client()
+
+    plain = client.post(
+        "/_dash-update-component", json=_groups_tab_request(), headers=auth_headers
+    )
+
+    for _ in range(2):
+        compressed = client.post(
+            "/_dash-update-component",
+            json=_groups_tab_request(),
+            headers={**auth_headers, "Accept-Encoding": "gzip"},
+        )
+
+        assert compressed.headers["Content-Encoding"] == "gzip"
+        assert len(compressed.data) < len(plain.data)
+        assert gzip.decompress(compressed.data) == plain.data
+
+    assert "Content-Encoding" not in plain.headers
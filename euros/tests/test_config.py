@@ -21,7 +21,25 @@ def test_create_loader():
         "port": 3000,
         "base_path": Path("./euros/tests/resources/example_base_path"),
         "cutoff_time": datetime.datetime(2024, 6, 14, 12, 0, tzinfo=datetime.UTC),
+        "user_groups": [],
         "debug": False,
         "host": "0.0.0.0",
         "suppress_callback_exceptions": False,
+        "compression": True,
+        "compression_min_size": 1024,
+        "compression_level": 6,
+        "refresh_interval": 1.0,
+        "live_updates": False,
+        "warmup": False,
+        "preload": False,
+        "group_idle_seconds": 3600.0,
+        "profiling": False,
+        "profile_dir": None,
+        "profile_every": 0,
+        "memory_profiling": False,
+        "memory_top_sites": 20,
+        "payload_budgets": {},
+        "payload_budget_action": "warn",
+        "results_token": None,
+        "metrics_token": None,
     }
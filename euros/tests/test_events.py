@@ -0,0 +1,53 @@
+import json
+
+from euros.cache import DataCache
+from euros.events import version_stream
+from euros.load import create_loader
+from euros.main import create_app
+
+
+def test_version_stream(config_path):
+    """An event is sent on connect and after every version bump."""
+    data = DataCache(create_loader(config_path))
+    stream = version_stream(data, interval=0, heartbeat=3600)
+
+    first = json.loads(next(stream).removeprefix("data: "))
+
+    data.load.choices_version.bump()
+    second = json.loads(next(stream).removeprefix("data: "))
+
+    assert second == {**first, "choices": first["choices"] + 1}
+
+
+def _apply_version_request(version: dict, applied: dict, shown: bool) -> dict:
+    outputs = ["fixtures-table", "user-choices", "show-users", "data-version-applied"]
+    return {
+        "output": ".." + "...".join(f"{id}.data" for id in outputs) + "..",
+        "outputs": [{"id": id, "property": "data"} for id in outputs],
+        "inputs": [{"id": "data-version", "property": "data", "value": version}],
+        "state": [
+            {"id": "data-version-applied", "property": "data", "value": applied},
+            {"id": "show-users", "property": "data", "value": shown},
+        ],
+        "changedPropIds": ["data-version.data"],
+    }
+
+
+def test_choices_bump_keeps_play_tab(configure, auth_headers):
+    """Another user's submission does not touch the inputs of the open tab."""
+    app, load = create_app(str(configure(live_updates=True)))
+    client = app.server.test_client()
+    applied = {"fixtures": 0, "choices": 0}
+
+    response = client.post(
+        "/_dash-update-component",
+        json=_apply_version_request({**applied, "choices": 1}, applied, shown=True),
+        headers=auth_headers,
+    )
+
+    assert response.status_code == 200
+    assert set(response.json["response"]) == {"user-choices", "data-version-applied"}
+
+    # Results reach the fixtures tab through render_content, not the filter.
+    inputs = app.callback_map["fixtures-filter-table.data"]["inputs"]
+    assert {"id": "fixtures-table", "property": "data"} not in inputs
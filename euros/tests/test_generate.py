@@ -0,0 +1,55 @@
+from datetime import UTC, datetime
+
+import pandas as pd
+
+from euros.choices import validate_tokens
+from euros.generate import generate
+from euros.groups import create_groups_tab
+from euros.load import Loader
+from euros.standings import get_standings
+
+
+def _loader(base_path) -> Loader:
+    return Loader(
+        user_group="generated",
+        base_path=base_path,
+        cutoff_time=datetime(2024, 6, 14, 12, tzinfo=UTC),
+    )
+
+
+def test_generate(tmp_path):
+    """A generated league loads, is valid and only depends on the seed."""
+    for path in [tmp_path / "a", tmp_path / "b"]:
+        generate(path, n_users=20, n_teams=48, n_groups=12, completion=0.9, seed=1)
+
+    assert (tmp_path / "a" / "fixtures.csv").read_bytes() == (
+        tmp_path / "b" / "fixtures.csv"
+    ).read_bytes()
+
+    load = _loader(tmp_path / "a")
+    fixtures = pd.DataFrame(load.load_fixtures())
+    user_choices = load.create_user_choices()
+
+    assert len(fixtures) == 72 + 15
+    assert (fixtures["Result"] != "").sum() == round(0.9 * 87)
+    assert user_choices["user"].nunique() == 20
+    assert all(
+        validate_tokens(tokens) is None
+        for _, tokens in user_choices.groupby("user", observed=True)["tokens"]
+    )
+    assert get_standings(user_choices, fixtures.copy()) is not None
+    assert len(create_groups_tab(fixtures.copy(), {}).children) == 1 + 6
+
+
+def test_generate_snapshot(tmp_path):
+    """Large leagues can be written as the consolidated choices snapshot."""
+    generate(tmp_path, n_users=1_000, n_teams=24, skew=2.0, snapshot=True)
+
+    snapshot = _loader(tmp_path).load_snapshot()
+
+    assert snapshot is not None
+    assert snapshot.tokens.shape == (24, 1_000)
+    assert (snapshot.tokens.sum(axis=0) == 12).all()
+    assert snapshot.tokens.max() <= 11
+    # With a skewed popularity the favourite gets the most tokens.
+    assert snapshot.tokens.sum(axis=1).argmax() == 0
@@ -0,0 +1,85 @@
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from euros.global_standings import GlobalBoard, GroupShard, merge_top
+from euros.load import create_loader
+
+
+def test_merge_top():
+    """The merged top users are the best of every shard, ties sharing a rank."""
+    shards = [
+        GroupShard(
+            "a", np.array(["Ann", "Bob", "Cat"], dtype=object), np.array([5.0, 3, 1])
+        ),
+        GroupShard("b", np.array(["Dan", "Eve"], dtype=object), np.array([5.0, 2])),
+    ]
+
+    top = merge_top(shards, n=4)
+
+    assert top.to_dict("list") == {
+        "rank": [1, 1, 3, 4],
+        "points": [5.0, 5.0, 3.0, 2.0],
+        "user": ["Ann", "Dan", "Bob", "Eve"],
+        "group": ["a", "b", "a", "b"],
+    }
+
+
+def test_global_board(config_path):
+    """Only the groups whose data changed are rebuilt, in a pool of processes."""
+    load = create_loader(config_path)
+    shutil.copytree(load.base_path / "example_group", load.base_path / "other_group")
+    fixtures = pd.DataFrame(load.load_fixtures())
+    groups = ["example_group", "other_group"]
+
+    board = GlobalBoard(load, groups, n=1_000, processes=2)
+    try:
+        standings = board.standings(fixtures)
+        assert board.standings(fixtures) is standings
+    finally:
+        board.close()
+
+    assert list(standings.summary["group"]) == groups
+    assert standings.summary["users"].sum() == len(standings.top)
+    assert standings.top["points"].is_monotonic_decreasing
+
+    shard = GroupShard.from_choices(
+        "example_group", load.create_user_choices(), fixtures.copy()
+    )
+    assert standings.summary["top"].iloc[0] == round(shard.points[0], 2)
+
+    before = dict(board._shards)
+    load.for_group("other_group").choices_version.bump()
+    board.standings(fixtures)
+
+    assert board._shards["example_group"] is before["example_group"]
+    assert board._shards["other_group"] is not before["other_group"]
+
+
+def test_global_board_latest_does_not_wait(config_path, monkeypatch):
+    """latest() answers straight away while the shards are being built."""
+    load = create_loader(config_path)
+    fixtures = pd.DataFrame(load.load_fixtures())
+    board = GlobalBoard(load, ["example_group"], processes=1)
+    started, release = threading.Event(), threading.Event()
+    build = board._build
+
+    def slow_build(groups, fixtures):
+        started.set()
+        release.wait(5)
+        return build(groups, fixtures)
+
+    monkeypatch.setattr(board, "_build", slow_build)
+    thread = threading.Thread(target=board.standings, args=(fixtures,))
+    thread.start()
+    started.wait(5)
+
+    try:
+        assert board.latest() is None
+    finally:
+        release.set()
+        thread.join()
+
+    assert board.latest() is not None
@@ -0,0 +1,65 @@
+from euros.load import create_loader
+from euros.main import create_app
+from euros.snapshot import freeze_choices
+
+
+def _groups_tab_request() -> dict:
+    return {
+        "output": "tabs-content.children",
+        "outputs": {"id": "tabs-content", "property": "children"},
+        "inputs": [
+            {"id": "tabs", "property": "value", "value": "groups-tab"},
+            {"id": "username", "property": "data", "value": "james"},
+            {"id": "fixtures-filter-table", "property": "data", "value": []},
+            {"id": "fixtures-table", "property": "data", "value": []},
+            {"id": "show-users", "property": "data", "value": True},
+        ],
+        "state": [{"id": "user-choices", "property": "data", "value": []}],
+        "changedPropIds": ["tabs.value"],
+    }
+
+
+def test_callback_etags(config_path, auth_headers):
+    """Data-derived callbacks get ETags that change with the data version."""
+    # Past the cutoff, so freeze first rather than race the freeze timer's bump.
+    freeze_choices(create_loader(config_path))
+    app, load = create_app(str(config_path))
+    client = app.server.test_client()
+
+    response = client.post(
+        "/_dash-update-component", json=_groups_tab_request(), headers=auth_headers
+    )
+    etag = response.headers["ETag"]
+
+    assert response.status_code == 200
+
+    response = client.post(
+        "/_dash-update-component",
+        json=_groups_tab_request(),
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+
+    assert response.status_code == 304
+
+    load.fixtures_version.bump()
+
+    response = client.post(
+        "/_dash-update-component",
+        json=_groups_tab_request(),
+        headers={**auth_headers, "If-None-Match": etag},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+
+
+def test_fingerprinted_assets_are_immutable(config_path, auth_headers):
+    """Assets requested with Dash's mtime fingerprint are cached long term."""
+    app, _ = create_app(str(config_path))
+
+    with app.server.test_client() as client:
+        response = client.get("/assets/custom.css?m=1", headers=auth_headers)
+        cache_control = response.headers["Cache-Control"]
+        response.close()
+
+    assert "immutable" in cache_control
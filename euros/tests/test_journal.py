@@ -0,0 +1,93 @@
+import pandas as pd
+
+from euros.journal import Journal
+from euros.load import create_loader
+
+
+def test_journal_replay(tmp_path):
+    """Replaying from the latest snapshot plus the tail gives the latest state."""
+    journal = Journal(tmp_path / "results.journal", snapshot_every=3)
+
+    for match_number in range(1, 6):
+        journal.append_result(match_number, f"{match_number}-0")
+    journal.append_result(1, "0-0")
+    journal.append_choices("james", {"France": 11, "Spain": 1, "Italy": 0})
+
+    assert len(journal.snapshots()) == 2
+
+    state = journal.replay()
+
+    assert state.results[1] == ["0-0", "", ""]
+    assert state.results[5] == ["5-0", "", ""]
+    assert state.choices == {"james": {"France": 11, "Spain": 1, "Italy": 0}}
+    assert state.offset == (tmp_path / "results.journal").stat().st_size
+
+    fourth = list(journal.events())[3]
+
+    assert journal.replay(until=fourth.timestamp).results[4] == ["4-0", "", ""]
+    assert journal.replay(until=fourth.timestamp).results[1] == ["1-0", "", ""]
+
+
+def test_journal_ignores_torn_tail(tmp_path):
+    """A record torn by a crash is dropped and later appends stay readable."""
+    path = tmp_path / "results.journal"
+    journal = Journal(path)
+
+    journal.append_result(1, "1-0")
+    with open(path, "ab") as file:
+        file.write(b"\x01\x00\x00")
+
+    assert len(list(journal.events())) == 1
+
+    journal.append_result(2, "2-0")
+
+    assert [event.match_number for event in journal.events()] == [1, 2]
+
+
+def test_journal_appends_without_replaying(tmp_path, monkeypatch):
+    """Only the appends that take a snapshot replay the journal."""
+    journal = Journal(tmp_path / "results.journal", snapshot_every=2)
+    replays = []
+    replay = journal.replay
+    monkeypatch.setattr(journal, "replay", lambda: replays.append(1) or replay())
+
+    for match_number in range(1, 6):
+        journal.append_result(match_number, f"{match_number}-0")
+
+    assert len(replays) == 2
+    assert len(journal.snapshots()) == 2
+
+
+def test_journal_replay_match(tmp_path):
+    """The state as of a match has the results recorded up to it."""
+    journal = Journal(tmp_path / "results.journal", snapshot_every=2)
+
+    for match_number in range(1, 6):
+        journal.append_result(match_number, f"{match_number}-0")
+    journal.append_result(3, "0-3")
+
+    state = journal.replay_match(3)
+
+    assert sorted(state.results) == [1, 2, 3]
+    assert state.results[3] == ["3-0", "", ""]
+    assert journal.replay_match(6) is None
+
+
+def test_loader_replays_choices_from_journal(config_path):
+    """Journaled choices are used unless the csv was written after them."""
+    load = create_loader(config_path)
+    path = load.choices_path("james")
+    tokens = dict(zip(*pd.read_csv(path).to_dict("list").values()))
+
+    load.choices_journal.append_choices("james", {**tokens, "Germany": 7})
+
+    def germany() -> int:
+        choices = load.create_user_choices()
+        rows = (choices["user"] == "James") & (choices["team"] == "Germany")
+        return int(choices.loc[rows, "tokens"].iloc[0])
+
+    assert germany() == 7
+
+    path.write_text(path.read_text())
+
+    assert germany() == tokens["Germany"]
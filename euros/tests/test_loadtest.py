@@ -0,0 +1,27 @@
+from datetime import datetime, timedelta
+
+from euros.load import create_loader
+from euros.loadtest import flask_transport, run, summarise
+
+
+def test_load_test(configure):
+    """Concurrent simulated sessions exercise every callback without errors."""
+    cutoff = datetime.now().astimezone() + timedelta(days=1)
+    config_path = configure(cutoff_time=cutoff.isoformat())
+    load = create_loader(config_path)
+
+    samples, seconds = run(
+        flask_transport(str(config_path)), load.load_users(), concurrency=2, sessions=1
+    )
+    rows = {row["name"]: row for row in summarise(samples, seconds)}
+
+    assert rows["total"]["requests"] == len(samples)
+    assert rows["total"]["errors"] == 0
+    assert rows["page-load"]["requests"] == 2
+    assert rows["tabs-content.children[play-tab]"]["requests"] >= 2
+    assert rows["standings-graph.figure"]["requests"] == 4
+    assert rows["warning-text.children"]["requests"] == 2
+    assert rows["total"]["p50_ms"] <= rows["total"]["p99_ms"]
+
+    # Every submission is a new allocation, so each one is written.
+    assert len(list(load.choices_journal.events())) == 2
@@ -0,0 +1,75 @@
+import tracemalloc
+
+from euros.main import create_app
+from euros.metrics import Metrics
+from euros.tests.test_http_cache import _groups_tab_request
+
+
+def test_metrics_endpoint(configure, auth_headers, tmp_path):
+    """Callback timings by tab, byte counts and sampled profiles are recorded."""
+    config_path = configure(
+        profiling=True,
+        profile_dir=str(tmp_path / "profiles"),
+        profile_every=1,
+        metrics_token="secret",
+    )
+    app, _ = create_app(str(config_path))
+    client = app.server.test_client()
+
+    client.post(
+        "/_dash-update-component", json=_groups_tab_request(), headers=auth_headers
+    )
+    assert client.get("/metrics").status_code == 403
+    assert client.get("/metrics", headers=auth_headers).status_code == 403
+
+    metrics = client.get(
+        "/metrics", headers={"Authorization": "Bearer secret"}
+    ).get_data(as_text=True)
+
+    assert (
+        'euros_callback_wall_seconds_count{callback="render_content",tab="groups-tab"} 1'
+        in metrics
+    )
+    assert 'euros_http_requests_total{route="tabs-content.children"} 1' in metrics
+    assert (
+        len(list((tmp_path / "profiles").glob("render_content-groups-tab-*.prof"))) == 1
+    )
+
+
+def test_memory_peaks_nest():
+    """An allocation inside a nested measurement counts towards both peaks."""
+    metrics = Metrics(enabled=True, memory=True)
+
+    try:
+        with metrics.measure("outer"):
+            with metrics.measure("inner"):
+                block = bytearray(2**20)
+                del block
+    finally:
+        tracemalloc.stop()
+
+    peaks = {key[0]: timing.peak_max for key, timing in metrics._timings.items()}
+    assert peaks["outer"] >= peaks["inner"] >= 2**20
+
+
+def test_memory_report(configure, auth_headers):
+    """Peak allocations by callback and tab build, top sites and RSS are served."""
+    app, _ = create_app(str(configure(memory_profiling=True, memory_top_sites=5)))
+    client = app.server.test_client()
+
+    try:
+        client.post(
+            "/_dash-update-component", json=_groups_tab_request(), headers=auth_headers
+        )
+        # Without metrics_token, behind the basic auth like every other route.
+        assert client.get("/metrics/memory").status_code == 401
+        report = client.get("/metrics/memory", headers=auth_headers).get_json()
+        metrics = client.get("/metrics", headers=auth_headers).get_data(as_text=True)
+    finally:
+        tracemalloc.stop()
+
+    assert report["rss_bytes"] > 0
+    assert len(report["top_sites"]) == 5
+    assert report["peak_bytes"]['{callback="render_content",tab="groups-tab"}'] > 0
+    assert report["peak_bytes"]['{callback="build",key="groups-tab"}'] > 0
+    assert "euros_process_resident_memory_bytes" in metrics
@@ -0,0 +1,87 @@
+import shutil
+import time
+
+from werkzeug.test import Client, EnvironBuilder
+
+from euros.load import Loader
+from euros.multigroup import GroupApps
+from euros.tests.test_http_cache import _groups_tab_request
+
+
+def test_group_apps(configure, auth_headers, monkeypatch):
+    """Each group is served at its own path, sharing one fixtures cache."""
+    calls = []
+    load_fixtures = Loader.load_fixtures
+    monkeypatch.setattr(
+        Loader, "load_fixtures", lambda self: calls.append(self) or load_fixtures(self)
+    )
+    config_path = configure(user_groups=["*"], group_idle_seconds=60.0)
+    base_path = config_path.parent / "example_base_path"
+    shutil.copytree(base_path / "example_group", base_path / "other_group")
+
+    apps = GroupApps(str(config_path))
+    client = Client(apps)
+
+    assert apps.groups == ["example_group", "other_group"]
+    assert client.get("/").status_code == 401
+    assert b"other_group/" in client.get("/", headers=auth_headers).data
+    assert client.get("/missing/").status_code == 404
+    assert client.get("/other_group").status_code in (301, 302, 308)
+
+    for group in apps.groups:
+        response = client.post(
+            f"/{group}/_dash-update-component",
+            json=_groups_tab_request(),
+            headers=auth_headers,
+        )
+        assert response.status_code == 200
+        # Until its response is closed, a group's app is in use.
+        response.close()
+
+    assert apps.running() == ["example_group", "other_group"]
+    assert calls == [apps.load]
+
+    assert apps.evict_idle() == []
+    assert apps.evict_idle(now=float("inf")) == ["example_group", "other_group"]
+    assert apps.running() == []
+
+    # The index only shows the standings built by the board's watcher.
+    assert b"being built" in client.get("/", headers=auth_headers).data
+    apps.board.watch(apps.shared.fixtures_df, interval=0.01)
+    try:
+        deadline = time.monotonic() + 30
+        while apps.board.latest() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert b"Global standings" in client.get("/", headers=auth_headers).data
+    finally:
+        apps.close()
+
+
+def test_group_apps_in_use_are_not_evicted(configure):
+    """An app serving a request is kept until the response is closed."""
+    apps = GroupApps(str(configure(group_idle_seconds=60.0)))
+    response = apps(
+        EnvironBuilder(path="/example_group/").get_environ(), lambda *args: None
+    )
+
+    assert apps.evict_idle(now=float("inf")) == []
+
+    response.close()
+
+    assert apps.evict_idle(now=float("inf")) == ["example_group"]
+
+
+def test_group_apps_index_reads_users_once(configure, auth_headers, monkeypatch):
+    """Logins to the index are checked against users read once per group."""
+    reads = []
+    load_users = Loader.load_users
+    monkeypatch.setattr(
+        Loader, "load_users", lambda self: reads.append(1) or load_users(self)
+    )
+    apps = GroupApps(str(configure()))
+    client = Client(apps)
+
+    for _ in range(3):
+        assert client.get("/", headers=auth_headers).status_code == 200
+
+    assert len(reads) == 1
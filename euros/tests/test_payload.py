@@ -0,0 +1,78 @@
+import json
+import warnings
+
+import pandas as pd
+import pytest
+import yaml
+
+from euros.flags import FLAG_UNICODE
+from euros.main import create_app
+from euros.payload import PayloadBudgetExceeded, PayloadBudgetWarning, component_sizes
+from euros.tests.test_http_cache import _groups_tab_request
+
+BUDGETS = {"user-choices": 100_000, "fixtures-table": 50_000, "tabs-content": 50_000}
+
+
+def _add_users(config_path, n_users: int) -> None:
+    """Grow the example group into a synthetic large league."""
+    with open(config_path) as file:
+        config = yaml.safe_load(file)
+    group = config["base_path"] + "/" + config["user_group"]
+
+    users = {f"user{i}": "password" for i in range(n_users)}
+    with open(f"{group}/users.json") as file:
+        users.update(json.load(file))
+    with open(f"{group}/users.json", "w") as file:
+        json.dump(users, file)
+
+    tokens = [0] * len(FLAG_UNICODE)
+    tokens[:2] = [6, 6]
+    for user in users:
+        if not user.startswith("user"):
+            continue
+        pd.DataFrame({"team": list(FLAG_UNICODE), "tokens": tokens}).to_csv(
+            f"{group}/choices/{user}.csv", index=False
+        )
+
+
+def test_component_sizes():
+    """Sizes are by component id and include the children."""
+    from dash import dcc, html
+
+    sizes = component_sizes(html.Div([dcc.Store(id="a", data=[1, 2, 3])], id="b"))
+
+    assert set(sizes) == {"a", "b"}
+    assert sizes["a"] < sizes["b"]
+
+
+def test_payload_within_budget(configure, auth_headers):
+    """The example league is within budget."""
+    config_path = configure(payload_budgets=BUDGETS, payload_budget_action="error")
+    app, _ = create_app(str(config_path))
+    client = app.server.test_client()
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", PayloadBudgetWarning)
+        assert client.get("/_dash-layout", headers=auth_headers).status_code == 200
+        client.post(
+            "/_dash-update-component", json=_groups_tab_request(), headers=auth_headers
+        )
+
+
+@pytest.mark.parametrize(
+    "action, expectation",
+    [
+        ("error", lambda: pytest.raises(PayloadBudgetExceeded, match="user-choices")),
+        ("warn", lambda: pytest.warns(PayloadBudgetWarning, match="user-choices")),
+    ],
+)
+def test_payload_over_budget(configure, auth_headers, action, expectation):
+    """A large league pushes the user choices store over its budget."""
+    config_path = configure(payload_budgets=BUDGETS, payload_budget_action=action)
+    _add_users(config_path, 500)
+
+    app, _ = create_app(str(config_path))
+    app.server.testing = True
+
+    with expectation():
+        app.server.test_client().get("/_dash-layout", headers=auth_headers)
@@ -0,0 +1,61 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+
+from euros.choices import MAX_TEAM_TOKENS, TOTAL_TOKENS
+from euros.load import create_loader
+from euros.play import create_play_tab
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+def _components(component) -> dict:
+    """Return every component in the tree with an id, by id."""
+    found = {}
+    if getattr(component, "id", None) is not None:
+        found[component.id] = component
+    children = getattr(component, "children", None)
+    for child in children if isinstance(children, list) else [children]:
+        if child is not None and not isinstance(child, str):
+            found.update(_components(child))
+    return found
+
+
+def _play_tab(show_users: bool) -> dict:
+    load = create_loader(RESOURCES / "test_config.yaml")
+    return _components(
+        create_play_tab(
+            "james",
+            load.user_group,
+            load.base_path,
+            show_users=show_users,
+            cutoff=datetime(2024, 6, 14, 12),
+            user_choices=load.create_user_choices(),
+            fixtures=pd.DataFrame(load.load_fixtures()),
+        )
+    )
+
+
+def test_play_tab_before_cutoff():
+    """The editable table comes with the validation rules, total and button."""
+    components = _play_tab(show_users=False)
+
+    assert components["token-rules"].data == {
+        "total": TOTAL_TOKENS,
+        "max": MAX_TEAM_TOKENS,
+    }
+    assert {"user-choices-table", "token-total", "update-button"} <= set(components)
+
+
+def test_play_tab_after_cutoff():
+    """Once frozen, none of the validation callback's inputs or outputs exist."""
+    components = _play_tab(show_users=True)
+
+    assert "user-choices-final" in components
+    assert not {
+        "user-choices-table",
+        "token-rules",
+        "token-total",
+        "update-button",
+    } & set(components)
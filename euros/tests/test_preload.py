@@ -0,0 +1,61 @@
+import gc
+import os
+import threading
+
+from euros import preload
+from euros.main import create_app
+from euros.tests.test_http_cache import _groups_tab_request
+
+
+def _watchers() -> int:
+    return sum(thread.name == "euros-data-watch" for thread in threading.enumerate())
+
+
+def test_preload(configure, auth_headers):
+    """The master builds the caches and each forked worker starts its threads."""
+    watchers = _watchers()
+    app, _ = create_app(
+        str(configure(preload=True, profiling=True, refresh_interval=1.0))
+    )
+
+    try:
+        assert _watchers() == watchers
+        assert gc.get_freeze_count() > 0
+
+        read, write = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            client = app.server.test_client()
+            client.post(
+                "/_dash-update-component",
+                json=_groups_tab_request(),
+                headers=auth_headers,
+            )
+            metrics = client.get("/metrics", headers=auth_headers).get_data(
+                as_text=True
+            )
+            # The groups tab was built once, in the master.
+            built = 'callback="build",key="groups-tab"} 1' in metrics
+            # Only the forking thread survives a fork, so this watcher is new.
+            os.write(write, bytes([_watchers() == 1 and built]))
+            os._exit(0)
+
+        os.waitpid(pid, 0)
+        assert os.read(read, 1) == b"\x01"
+    finally:
+        gc.unfreeze()
+
+
+def test_run_after_fork_registers_once(monkeypatch):
+    """Every function added shares one at-fork hook."""
+    registered = []
+    monkeypatch.setattr(preload, "_after_fork", [])
+    monkeypatch.setattr(preload, "_registered", False)
+    monkeypatch.setattr(os, "register_at_fork", lambda **hooks: registered.append(1))
+
+    preload.run_after_fork(lambda: None)
+    preload.run_after_fork(lambda: None)
+
+    assert len(registered) == 1
+    assert len(preload._after_fork) == 2
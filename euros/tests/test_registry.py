@@ -0,0 +1,46 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from euros.load import create_loader
+from euros.registry import Registry
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+def test_registry():
+    """Ids are positions in the registry and labels are gathered by id."""
+    registry = Registry.create(["France", "Team 25", "France"], ["James", "Ann"])
+
+    assert list(registry.teams) == ["France", "Team 25"]
+    assert list(registry.team_ids(pd.Series(["Team 25", "Spain", "France"]))) == [
+        1,
+        -1,
+        0,
+    ]
+    assert list(registry.team_labels(pd.Series(["France", "Spain"]))) == [
+        "France \U0001F1EB\U0001F1F7",
+        "Spain \U0001F1EA\U0001F1F8",
+    ]
+    assert list(registry.short_labels) == ["Fra \U0001F1EB\U0001F1F7", "Team 25"]
+
+    user_choices = registry.categorize(
+        pd.DataFrame(
+            {"team": ["France", "Team 25"], "tokens": [7, 5], "user": ["Ann", "Ann"]}
+        )
+    )
+    np.testing.assert_array_equal(registry.tokens(user_choices), [[0, 7], [0, 5]])
+
+
+def test_user_choices_are_categorical():
+    """create_user_choices stores teams and users once, as categories."""
+    load = create_loader(RESOURCES / "test_config.yaml")
+    user_choices = load.create_user_choices()
+
+    registry = Registry.from_choices(user_choices)
+
+    assert user_choices["team"].dtype == registry.team_dtype
+    assert user_choices["user"].dtype == registry.user_dtype
+    assert user_choices["tokens"].dtype == np.int8
+    assert (registry.tokens(user_choices).sum(axis=0) == 12).all()
@@ -0,0 +1,70 @@
+import os
+
+import pandas as pd
+import pytest
+
+from euros.load import create_loader
+from euros.main import create_app
+from euros.results import record_result
+
+
+def test_record_result(config_path):
+    """Results are written to fixtures.csv and bump the fixtures version."""
+    load = create_loader(config_path)
+    version = load.fixtures_version.get()
+
+    fixture = record_result(load, 41, "1-1 (4-3)")
+
+    assert fixture["Result"] == "1-1 (4-3)"
+    assert load.fixtures_version.get() == version + 1
+
+    fixtures = pd.DataFrame(load.load_fixtures()).set_index("Match Number")
+    assert fixtures.loc[41, "Result"] == "1-1 (4-3)"
+    assert fixtures.loc[40, "Result"] == "2-1"
+
+    with pytest.raises(ValueError, match="Invalid result"):
+        record_result(load, 41, "one-nil")
+
+    with pytest.raises(ValueError, match="Unknown match number"):
+        record_result(load, 99, "1-0")
+
+
+def test_fixtures_replay_results(config_path):
+    """Results journaled after fixtures.csv was last written are replayed."""
+    load = create_loader(config_path)
+    path = load.base_path / "fixtures.csv"
+    original = path.read_bytes()
+
+    record_result(load, 41, "3-3")
+
+    # As if the csv write had been lost.
+    path.write_bytes(original)
+    os.utime(path, (0, 0))
+
+    fixtures = pd.DataFrame(load.load_fixtures()).set_index("Match Number")
+    assert fixtures.loc[41, "Result"] == "3-3"
+
+
+def test_results_route(configure):
+    """The results endpoint needs the configured token."""
+    app, load = create_app(str(configure(results_token="secret")))
+    client = app.server.test_client()
+    body = {"match_number": 51, "result": "0-1"}
+
+    response = client.post("/admin/results", json=body)
+    assert response.status_code == 403
+
+    response = client.post(
+        "/admin/results", json=body, headers={"Authorization": "Bearer secret"}
+    )
+    assert response.status_code == 200
+    assert response.get_json()["Result"] == "0-1"
+
+    # Behind a reverse proxy the client address is not local, the token decides.
+    response = client.post(
+        "/admin/results",
+        json={"match_number": 51, "result": "1-1"},
+        headers={"Authorization": "Bearer secret"},
+        environ_base={"REMOTE_ADDR": "10.0.0.5"},
+    )
+    assert response.status_code == 200
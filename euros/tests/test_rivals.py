@@ -0,0 +1,44 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from euros.generate import generate_tokens
+from euros.load import create_loader
+from euros.rivals import head_to_head, top_similar
+from euros.standings import get_standings
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+def test_top_similar():
+    """Blocked top-k similarity matches the full similarity matrix."""
+    tokens = generate_tokens(200, 24, 1.0, np.random.default_rng(0))
+
+    # Small blocks, so several are needed.
+    indices, similarities = top_similar(tokens, k=3, block_bytes=16 * 200 * 16)
+
+    vectors = tokens / np.linalg.norm(tokens, axis=0)
+    full = vectors.T @ vectors
+    np.fill_diagonal(full, -np.inf)
+
+    np.testing.assert_allclose(similarities, -np.sort(-full, axis=1)[:, :3], rtol=1e-5)
+    np.testing.assert_allclose(
+        np.take_along_axis(full, indices, axis=1), similarities, rtol=1e-5
+    )
+
+
+def test_head_to_head():
+    """The matches in a head-to-head add up to the gap between the two users."""
+    load = create_loader(RESOURCES / "test_config.yaml")
+    standings = get_standings(
+        load.create_user_choices(), pd.DataFrame(load.load_fixtures())
+    )
+    totals = standings.groupby("user", observed=True)["points_allocated"].sum()
+    user, rival = totals.index[:2]
+
+    matches = head_to_head(standings, user, rival)
+
+    assert matches["Match Number"].is_unique
+    assert matches["gap"].abs().is_monotonic_decreasing
+    assert np.isclose(matches["gap"].sum(), totals[user] - totals[rival], atol=0.01)
@@ -0,0 +1,76 @@
+import shutil
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from euros.choices import ChoicesFrozenError, ChoiceWriter
+from euros.load import create_loader
+from euros.snapshot import ChoicesSnapshot, freeze_choices, unfreeze_choices
+
+RESOURCES = Path(__file__).parent / "resources"
+
+
+def test_freeze_choices(tmp_path):
+    """Freezing switches create_user_choices to an identical, read-only snapshot."""
+    shutil.copytree(RESOURCES / "example_base_path", tmp_path / "base")
+    load = create_loader(RESOURCES / "test_config.yaml").model_copy(
+        update={"base_path": tmp_path / "base"}
+    )
+
+    before = load.create_user_choices()
+    version = load.choices_version.get()
+
+    snapshot = freeze_choices(load)
+
+    assert load.choices_version.get() == version + 1
+    assert snapshot.tokens.shape == (24, 7)
+    assert freeze_choices(load).checksum == snapshot.checksum
+
+    after = load.create_user_choices()
+
+    assert after.to_dict("records") == before.reset_index(drop=True).to_dict("records")
+
+
+def test_freeze_stops_writes(tmp_path, monkeypatch):
+    """Writes after a freeze are refused and unfreezing bumps the version."""
+    shutil.copytree(RESOURCES / "example_base_path", tmp_path / "base")
+    load = create_loader(RESOURCES / "test_config.yaml").model_copy(
+        update={"base_path": tmp_path / "base"}
+    )
+    writer = ChoiceWriter(window=0, snapshot_path=load.snapshot_path())
+    choices = pd.DataFrame({"team": ["France", "Spain"], "tokens": [6, 6]})
+
+    writer.submit(load.choices_path("james"), choices).result()
+    snapshot = freeze_choices(load)
+
+    with pytest.raises(ChoicesFrozenError):
+        writer.submit(load.choices_path("james"), choices).result()
+
+    # The snapshot is verified once, not on every read.
+    assert load.load_snapshot().checksum == snapshot.checksum
+    loads = []
+    monkeypatch.setattr(ChoicesSnapshot, "load", lambda path: loads.append(path))
+    assert load.load_snapshot().checksum == snapshot.checksum
+    assert loads == []
+
+    version = load.choices_version.get()
+    assert unfreeze_choices(load)
+    assert load.choices_version.get() == version + 1
+    assert load.load_snapshot() is None
+    writer.submit(load.choices_path("james"), choices).result()
+
+
+def test_snapshot_checksum(tmp_path):
+    """A snapshot whose contents do not match its checksum is rejected."""
+    snapshot = ChoicesSnapshot(
+        teams=np.array(["France", "Spain"]),
+        users=np.array(["James"]),
+        tokens=np.array([[11], [1]], dtype=np.int8),
+        checksum="0" * 64,
+    )
+    snapshot.save(tmp_path / "choices.npz")
+
+    with pytest.raises(ValueError, match="Checksum mismatch"):
+        ChoicesSnapshot.load(tmp_path / "choices.npz")
@@ -0,0 +1,122 @@
+import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from euros.load import create_loader
+from euros.main import create_app
+from euros.snapshot import freeze_choices
+from euros.standings import Leaderboard, StandingsCheckpoints, get_standings
+
+
+@pytest.fixture
+def standings() -> pd.DataFrame:
+    load = create_loader(Path(__file__).parent / "resources" / "test_config.yaml")
+    return get_standings(load.create_user_choices(), pd.DataFrame(load.load_fixtures()))
+
+
+def test_checkpoints(standings):
+    """Each checkpoint is the running total of points up to that match."""
+    checkpoints = StandingsCheckpoints.from_standings(standings)
+
+    totals = standings.groupby("user", observed=True)["points_allocated"].sum()
+    pd.testing.assert_series_equal(
+        checkpoints.as_of(),
+        totals,
+        check_names=False,
+        check_index_type=False,
+        check_categorical=False,
+    )
+
+    group_stage = standings[standings["Round Number"].isin(["1", "2", "3"])]
+    pd.testing.assert_series_equal(
+        checkpoints.as_of(36),
+        group_stage.groupby("user", observed=True)["points_allocated"].sum(),
+        check_names=False,
+        check_index_type=False,
+        check_categorical=False,
+    )
+
+    assert (checkpoints.as_of_date(datetime.datetime(2024, 6, 1)) == 0).all()
+    assert checkpoints.as_of_date(datetime.datetime(2024, 6, 14, 21)).sum() == 1
+
+    with pytest.raises(ValueError, match="has not been played"):
+        checkpoints.as_of(99)
+
+
+def test_leaderboard():
+    """Pages are slices of the ranking and the first paint finds the user."""
+    totals = pd.Series(
+        [float(points) for points in range(30)],
+        index=[f"User{i}" for i in range(30)],
+    )
+    leaderboard = Leaderboard.from_totals(totals)
+
+    assert leaderboard.position("user29") == 0
+    assert leaderboard.position("user0") == 29
+    assert leaderboard.position("nobody") is None
+    assert leaderboard.page_count(page_size=8) == 4
+
+    page = leaderboard.page(1, page_size=8)
+    assert [record["position"] for record in page] == list(range(9, 17))
+    assert page[0] == {"position": 9, "user": "User21", "points_allocated": 21.0}
+
+    first_paint = leaderboard.first_paint("user10", top=3, around=1)
+    assert [record["position"] for record in first_paint] == [
+        1,
+        2,
+        3,
+        "...",
+        19,
+        20,
+        21,
+    ]
+    assert first_paint[5]["user"] == "User10"
+
+
+def _standings_request(trigger: str, match_number: int | None, page: int) -> dict:
+    return {
+        "output": "..current-standings.data...current-standings.page_current..",
+        "outputs": [
+            {"id": "current-standings", "property": "data"},
+            {"id": "current-standings", "property": "page_current"},
+        ],
+        "inputs": [
+            {"id": "standings-as-of", "property": "value", "value": match_number},
+            {"id": "standings-as-of-date", "property": "date", "value": None},
+            {"id": "current-standings", "property": "page_current", "value": page},
+        ],
+        "state": [{"id": "username", "property": "data", "value": "james"}],
+        "changedPropIds": [trigger],
+    }
+
+
+def test_standings_as_of_resets_page(config_path, auth_headers):
+    """Changing the standings as of goes back to the first page, paging does not."""
+    # Past the cutoff, so freeze first rather than race the freeze timer's bump.
+    freeze_choices(create_loader(config_path))
+    app, _ = create_app(str(config_path))
+    client = app.server.test_client()
+
+    response = client.post(
+        "/_dash-update-component",
+        json=_standings_request("standings-as-of.value", 36, page=1),
+        headers=auth_headers,
+    )
+    assert response.json["response"]["current-standings"]["page_current"] == 0
+
+    response = client.post(
+        "/_dash-update-component",
+        json=_standings_request("current-standings.page_current", 36, page=1),
+        headers=auth_headers,
+    )
+    assert "page_current" not in response.json["response"]["current-standings"]
+
+    # Page turns depend only on the data, so they are cached by ETag.
+    response = client.post(
+        "/_dash-update-component",
+        json=_standings_request("current-standings.page_current", 36, page=1),
+        headers={**auth_headers, "If-None-Match": response.get_etag()[0]},
+    )
+    assert response.status_code == 304
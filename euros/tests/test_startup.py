@@ -0,0 +1,33 @@
+from euros.main import create_app
+from euros.startup import import_times
+from euros.tests.test_http_cache import _groups_tab_request
+
+BUILD = 'euros_callback_wall_seconds_count{callback="build",key="%s"} 1'
+
+
+def test_tab_modules_are_imported_lazily():
+    """Importing the app does not import the per-tab modules."""
+    modules = {t.module for t in import_times("euros.main")}
+
+    assert "euros.main" in modules
+    assert not modules & {
+        "euros.knockout",
+        "euros.standings",
+        "euros.fixtures",
+        "euros.groups",
+    }
+
+
+def test_warmup(configure, auth_headers):
+    """With warm-up the tabs are built in create_app, not on the first request."""
+    app, _ = create_app(str(configure(warmup=True, profiling=True)))
+    client = app.server.test_client()
+
+    client.post(
+        "/_dash-update-component", json=_groups_tab_request(), headers=auth_headers
+    )
+    metrics = client.get("/metrics", headers=auth_headers).get_data(as_text=True)
+
+    assert 'euros_callback_wall_seconds_count{callback="warmup"} 1' in metrics
+    for key in ["groups-tab", "knockout-tab", "fixtures-tab", "standings-tab"]:
+        assert BUILD % key in metrics
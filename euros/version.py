@@ -0,0 +1,82 @@
+"""Cross-process data version counters."""
+
+import fcntl
+import mmap
+import os
+import struct
+from argparse import ArgumentParser
+from pathlib import Path
+
+_COUNTER = struct.Struct("<Q")
+
+
+class VersionCounter:
+    """A monotonically increasing counter shared by every process on the host.
+
+    The counter lives in a small memory-mapped file, so reading it is a single
+    memory access and bumping it is visible to every gunicorn worker without
+    stat-ing the underlying data files.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """Open the counter at path, creating it at zero if it is missing."""
+        self.path = path
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            with _locked(fd):
+                if os.fstat(fd).st_size < _COUNTER.size:
+                    os.ftruncate(fd, _COUNTER.size)
+            self._mmap = mmap.mmap(fd, _COUNTER.size, mmap.MAP_SHARED)
+        finally:
+            os.close(fd)
+
+    def get(self) -> int:
+        """Return the current value of the counter."""
+        value: int = _COUNTER.unpack_from(self._mmap)[0]
+        return value
+
+    def bump(self) -> int:
+        """Increment the counter and return its new value."""
+        fd = os.open(self.path, os.O_RDWR)
+        try:
+            with _locked(fd):
+                value = self.get() + 1
+                _COUNTER.pack_into(self._mmap, 0, value)
+                self._mmap.flush()
+        finally:
+            os.close(fd)
+
+        return value
+
+
+class _locked:
+    """Hold an exclusive advisory lock on an open file descriptor."""
+
+    def __init__(self, fd: int) -> None:
+        self.fd = fd
+
+    def __enter__(self) -> None:
+        fcntl.flock(self.fd, fcntl.LOCK_EX)
+
+    def __exit__(self, *args: object) -> None:
+        fcntl.flock(self.fd, fcntl.LOCK_UN)
+
+
+def main() -> None:
+    """Bump a data version by hand, e.g. after editing fixtures.csv directly."""
+    from euros.load import create_loader
+
+    parser = ArgumentParser(description="Bump the Euros data version.")
+    parser.add_argument("--filepath", "-f", type=str, help="config filepath.")
+    parser.add_argument("counter", choices=["fixtures", "choices"])
+    args = parser.parse_args()
+
+    load = create_loader(Path(args.filepath))
+    counter = (
+        load.fixtures_version if args.counter == "fixtures" else load.choices_version
+    )
+    print(f"{args.counter} version is now {counter.bump()}")
+
+
+if __name__ == "__main__":
+    main()